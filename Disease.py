@@ -1,11 +1,27 @@
+import time
+
+# Start of this script run, for time-to-interactive
+_run_started = time.perf_counter()
+
 import streamlit as st
+from streamlit import runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime
-import re
-from io import BytesIO
-import base64
+import json
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+# Scoring lives in the Streamlit-free core so the batch CLI and the HTTP
+# service share it
+from symptogen import metrics
+from symptogen.catalog import AVAILABLE_SYMPTOMS
+from symptogen.core import (
+    analyze_genetic_file, analyze_genetic_markers, analyze_symptoms, get_analyzer, get_report, watch_catalog
+)
+from symptogen.footprint import SessionRegistry, SharedCatalog, format_bytes
+from symptogen.incremental import IncrementalScorer
 
 # Page configuration
 st.set_page_config(
@@ -116,347 +132,381 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# One catalog watcher per process; every session reads the same compiled
+# indexes and sees a reloaded catalog on its next rerun
+@st.cache_resource
+def start_catalog_watcher():
+    return watch_catalog()
+
+start_catalog_watcher()
+
+# The catalog every session reads, frozen read-only and built once per
+# catalog version; sessions hold views into it, never copies
+@st.cache_resource(max_entries=2)
+def shared_catalog(version, _analyzer):
+    return SharedCatalog(_analyzer)
+
+
+def current_catalog():
+    analyzer = get_analyzer()
+    return shared_catalog(analyzer.version, analyzer)
+
+
+# Memory held by each live session, for totals across the process
+@st.cache_resource
+def session_registry():
+    return SessionRegistry()
+
 # Initialize session state
 if 'analysis_results' not in st.session_state:
     st.session_state.analysis_results = None
 
-# Sample data - Symptom to Disease Mapping
-@st.cache_data
-def load_symptom_disease_data():
-    symptom_disease_data = {
-        'Disease': [
-            'COVID-19', 'Influenza', 'Dengue Fever', 'Malaria', 'Common Cold',
-            'Pneumonia', 'Bronchitis', 'Gastroenteritis', 'Migraine', 'Hypertension',
-            'Diabetes Type 2', 'Asthma', 'Allergic Rhinitis', 'Food Poisoning', 'Anxiety Disorder'
-        ],
-        'Primary_Symptoms': [
-            ['fever', 'cough', 'fatigue', 'loss_of_taste'],
-            ['fever', 'cough', 'muscle_aches', 'fatigue'],
-            ['fever', 'headache', 'muscle_pain', 'rash'],
-            ['fever', 'chills', 'headache', 'nausea'],
-            ['runny_nose', 'sneezing', 'sore_throat', 'mild_cough'],
-            ['fever', 'cough', 'chest_pain', 'difficulty_breathing'],
-            ['cough', 'chest_pain', 'fatigue', 'mild_fever'],
-            ['nausea', 'vomiting', 'diarrhea', 'abdominal_pain'],
-            ['headache', 'nausea', 'sensitivity_to_light', 'visual_disturbances'],
-            ['headache', 'dizziness', 'chest_pain', 'shortness_of_breath'],
-            ['frequent_urination', 'excessive_thirst', 'fatigue', 'blurred_vision'],
-            ['difficulty_breathing', 'wheezing', 'chest_tightness', 'cough'],
-            ['runny_nose', 'sneezing', 'itchy_eyes', 'nasal_congestion'],
-            ['nausea', 'vomiting', 'diarrhea', 'abdominal_cramps'],
-            ['restlessness', 'fatigue', 'difficulty_concentrating', 'muscle_tension']
-        ],
-        'Severity': ['High', 'Medium', 'High', 'High', 'Low', 'High', 'Medium', 'Medium', 'Medium', 'High', 'High', 'Medium', 'Low', 'Medium', 'Medium']
-    }
-    
-    return pd.DataFrame(symptom_disease_data)
-
-# Sample genetic data - Gene to Disease Mapping
-@st.cache_data
-def load_genetic_disease_data():
-    genetic_data = {
-        'Gene': ['BRCA1', 'BRCA2', 'APOE', 'CFTR', 'HTT', 'LDLR', 'HFE', 'F5', 'MTHFR', 'CYP2D6'],
-        'Associated_Disease': [
-            'Breast Cancer', 'Breast Cancer', 'Alzheimer Disease', 'Cystic Fibrosis',
-            'Huntington Disease', 'Familial Hypercholesterolemia', 'Hemochromatosis',
-            'Factor V Leiden Thrombophilia', 'Hyperhomocysteinemia', 'Drug Metabolism Variants'
-        ],
-        'Risk_Level': ['High', 'High', 'Medium', 'High', 'High', 'Medium', 'Medium', 'Medium', 'Low', 'Low'],
-        'Prevalence': ['1 in 400', '1 in 800', '1 in 4', '1 in 2500', '1 in 10000', '1 in 500', '1 in 200', '1 in 20', '1 in 10', '1 in 4'],
-        'Description': [
-            'Increased risk of breast and ovarian cancer',
-            'Increased risk of breast and ovarian cancer',
-            'Associated with late-onset Alzheimer disease',
-            'Causes cystic fibrosis when both copies are mutated',
-            'Causes Huntington disease (dominant inheritance)',
-            'Causes high cholesterol levels',
-            'Causes iron overload in the body',
-            'Increases blood clotting risk',
-            'Affects folate metabolism',
-            'Affects drug metabolism, particularly antidepressants'
-        ]
-    }
-    
-    return pd.DataFrame(genetic_data)
-
-# Available symptoms list
-AVAILABLE_SYMPTOMS = [
-    'fever', 'cough', 'fatigue', 'headache', 'muscle_aches', 'sore_throat',
-    'runny_nose', 'sneezing', 'nausea', 'vomiting', 'diarrhea', 'abdominal_pain',
-    'chest_pain', 'difficulty_breathing', 'dizziness', 'rash', 'joint_pain',
-    'loss_of_taste', 'loss_of_smell', 'chills', 'sweating', 'blurred_vision',
-    'frequent_urination', 'excessive_thirst', 'weight_loss', 'weight_gain',
-    'restlessness', 'anxiety', 'depression', 'insomnia', 'muscle_weakness',
-    'numbness', 'tingling', 'sensitivity_to_light', 'visual_disturbances',
-    'wheezing', 'chest_tightness', 'itchy_eyes', 'nasal_congestion',
-    'abdominal_cramps', 'muscle_tension', 'difficulty_concentrating',
-    'shortness_of_breath', 'mild_cough', 'mild_fever'
-]
-
-def calculate_symptom_match_score(user_symptoms, disease_symptoms):
-    """Calculate matching score between user symptoms and disease symptoms"""
-    if not user_symptoms or not disease_symptoms:
-        return 0
-    
-    user_set = set(user_symptoms)
-    disease_set = set(disease_symptoms)
-    
-    intersection = len(user_set.intersection(disease_set))
-    union = len(user_set.union(disease_set))
-    
-    # Jaccard similarity with bonus for exact matches
-    jaccard_score = intersection / union if union > 0 else 0
-    match_bonus = intersection / len(disease_set) if len(disease_set) > 0 else 0
-    
-    return (jaccard_score * 0.6 + match_bonus * 0.4) * 100
+# Seconds between Quick Stats refreshes
+STATS_REFRESH_SECONDS = 30
 
-def analyze_symptoms(user_symptoms):
-    """Analyze user symptoms and return predicted diseases"""
-    symptom_data = load_symptom_disease_data()
-    results = []
-    
-    for _, row in symptom_data.iterrows():
-        score = calculate_symptom_match_score(user_symptoms, row['Primary_Symptoms'])
-        if score > 0:
-            results.append({
-                'Disease': row['Disease'],
-                'Confidence': score,
-                'Severity': row['Severity'],
-                'Matched_Symptoms': list(set(user_symptoms).intersection(set(row['Primary_Symptoms'])))
-            })
-    
-    # Sort by confidence score
-    results = sorted(results, key=lambda x: x['Confidence'], reverse=True)
-    return results[:10]  # Return top 10 matches
-
-def analyze_genetic_markers(genetic_input):
-    """Analyze genetic markers and return associated risks"""
-    genetic_data = load_genetic_disease_data()
-    results = []
-    
-    # Simple pattern matching for gene names
-    genes_found = []
-    for _, row in genetic_data.iterrows():
-        if row['Gene'].upper() in genetic_input.upper():
-            genes_found.append(row['Gene'])
-            results.append({
-                'Gene': row['Gene'],
-                'Disease': row['Associated_Disease'],
-                'Risk_Level': row['Risk_Level'],
-                'Prevalence': row['Prevalence'],
-                'Description': row['Description']
-            })
-    
-    return results, genes_found
+# Fragment reruns kept for the performance breakdown
+RERUN_HISTORY = 20
 
-def generate_report(symptom_results, genetic_results, user_symptoms, genetic_input):
-    """Generate a comprehensive report"""
-    report = f"""
-# SymptoGen Analysis Report
-**Generated on:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+# With the performance breakdown off, a session's memory is only measured
+# every this many page runs
+FOOTPRINT_SAMPLE_RUNS = 20
 
-## Symptom Analysis
-**Symptoms Analyzed:** {', '.join(user_symptoms) if user_symptoms else 'None'}
 
-### Top Disease Predictions:
-"""
-    
-    if symptom_results:
-        for i, result in enumerate(symptom_results[:5], 1):
-            report += f"""
-{i}. **{result['Disease']}** (Confidence: {result['Confidence']:.1f}%)
-   - Severity: {result['Severity']}
-   - Matched Symptoms: {', '.join(result['Matched_Symptoms'])}
-"""
-    else:
-        report += "No significant disease matches found based on provided symptoms.\n"
-    
-    report += f"""
-## Genetic Analysis
-**Genetic Input:** {genetic_input if genetic_input else 'None provided'}
+def record_rerun(name, seconds):
+    """Remember how long one page or fragment run took"""
+    history = st.session_state.setdefault('rerun_timings', deque(maxlen=RERUN_HISTORY))
+    history.append((name, seconds))
 
-### Genetic Risk Factors:
-"""
-    
-    if genetic_results:
-        for result in genetic_results:
-            report += f"""
-- **{result['Gene']}**: {result['Disease']}
-  - Risk Level: {result['Risk_Level']}
-  - Prevalence: {result['Prevalence']}
-  - Description: {result['Description']}
-"""
-    else:
-        report += "No genetic risk factors identified.\n"
-    
-    report += f"""
-## Important Disclaimers
-⚠️ **This analysis is for educational purposes only and should not be used as a substitute for professional medical advice.**
-
-- Consult with healthcare professionals for proper diagnosis and treatment
-- Genetic risk predictions are based on current scientific knowledge and may change
-- Individual risk factors may vary significantly
-- This tool does not account for family history, lifestyle factors, or other important variables
-
-## Recommendations
-1. Discuss these findings with your healthcare provider
-2. Consider professional genetic counseling if genetic risks are identified
-3. Maintain regular health check-ups
-4. Follow evidence-based preventive care guidelines
-"""
-    
-    return report
 
-# Main App Interface
-def main():
-    # Header
-    st.markdown("""
-    <div class="main-header">
-        <h1>🧬 SymptoGen: Symptom & Genetic Disease Insight Tool</h1>
-        <p>Advanced symptom analysis and genetic risk assessment</p>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # Sidebar for navigation
-    st.sidebar.title("🔬 Analysis Tools")
-    analysis_type = st.sidebar.selectbox(
-        "Choose Analysis Type",
-        ["Comprehensive Analysis", "Symptom Analysis Only", "Genetic Analysis Only"]
-    )
-    
-    # Main content area
-    col1, col2 = st.columns([2, 1])
-    
-    with col1:
-        # Symptom Input Section
-        if analysis_type in ["Comprehensive Analysis", "Symptom Analysis Only"]:
-            st.markdown('<div class="feature-box">', unsafe_allow_html=True)
-            st.subheader("🩺 Symptom Input")
-            
-            # Symptom input method selection
-            input_method = st.radio(
-                "How would you like to input symptoms?",
-                ["Select from checklist", "Enter manually"]
-            )
+def stash_metrics(run):
+    """Keep stages recorded outside a finished page run for the next page run's breakdown"""
+    pending = st.session_state.get('pending_metrics')
+    st.session_state.pending_metrics = run if pending is None else pending.merge(run)
+
+
+@contextmanager
+def fragment_metrics():
+    """Record the stages of a fragment rerun while the performance breakdown is on"""
+    # Inside a page run the page's own METRICS.run() already records them
+    if not st.session_state.get('debug_metrics') or metrics.METRICS.current_run() is not None:
+        yield
+        return
+    with metrics.METRICS.run() as run:
+        try:
+            yield
+        finally:
+            stash_metrics(run)
+
+
+def timed_fragment(name, run_every=None):
+    """st.fragment that records each of its reruns under ``name``"""
+    def decorate(render):
+        @st.fragment(run_every=run_every)
+        @wraps(render)
+        def fragment(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                with fragment_metrics():
+                    return render(*args, **kwargs)
+            finally:
+                record_rerun(name, time.perf_counter() - start)
+        return fragment
+    return decorate
+
+
+@timed_fragment('inputs')
+def input_panel(analysis_type):
+    """Symptom and genetic inputs; toggling a checkbox reruns only this panel"""
+    analyzer = get_analyzer()
+
+    # Symptom Input Section
+    if analysis_type in ["Comprehensive Analysis", "Symptom Analysis Only"]:
+        st.markdown('<div class="feature-box">', unsafe_allow_html=True)
+        st.subheader("🩺 Symptom Input")
+        
+        # Symptom input method selection
+        input_method = st.radio(
+            "How would you like to input symptoms?",
+            ["Select from checklist", "Enter manually"]
+        )
+        
+        user_symptoms = []
+        live_results = None
+        
+        if input_method == "Select from checklist":
+            st.write("Select all symptoms you're experiencing:")
             
-            user_symptoms = []
+            # Create columns for better layout
+            cols = st.columns(3)
+            selected_symptoms = []
             
-            if input_method == "Select from checklist":
-                st.write("Select all symptoms you're experiencing:")
-                
-                # Create columns for better layout
-                cols = st.columns(3)
-                selected_symptoms = []
-                
-                for i, symptom in enumerate(AVAILABLE_SYMPTOMS):
-                    col_idx = i % 3
-                    with cols[col_idx]:
-                        if st.checkbox(symptom.replace('_', ' ').title(), key=f"symptom_{symptom}"):
-                            selected_symptoms.append(symptom)
-                
-                user_symptoms = selected_symptoms
+            for i, symptom in enumerate(AVAILABLE_SYMPTOMS):
+                col_idx = i % 3
+                with cols[col_idx]:
+                    if st.checkbox(symptom.replace('_', ' ').title(), key=f"symptom_{symptom}"):
+                        selected_symptoms.append(symptom)
             
-            else:  # Manual input
-                manual_symptoms = st.text_area(
-                    "Enter symptoms (comma-separated):",
-                    placeholder="e.g., fever, cough, headache, fatigue"
-                )
-                if manual_symptoms:
-                    user_symptoms = [s.strip().lower().replace(' ', '_') for s in manual_symptoms.split(',')]
+            user_symptoms = selected_symptoms
             
-            st.markdown('</div>', unsafe_allow_html=True)
-        else:
-            user_symptoms = []
+            # Live predictions: each toggle only rescores the diseases
+            # listing the toggled symptom
+            scorer = st.session_state.get('live_scorer')
+            if scorer is None or scorer.index is not analyzer.symptom_index or scorer.model is not analyzer.model:
+                scorer = st.session_state.live_scorer = IncrementalScorer(analyzer.symptom_index, analyzer.model)
+            scorer.update(user_symptoms)
+            if user_symptoms:
+                live_results = scorer.top_k(10)
+                st.caption("Live predictions: " + (", ".join(
+                    f"{r['Disease']} ({r['Confidence']:.0f}%)" for r in live_results[:3]
+                ) or "no matches"))
         
-        # Genetic Input Section
-        if analysis_type in ["Comprehensive Analysis", "Genetic Analysis Only"]:
-            st.markdown('<div class="feature-box">', unsafe_allow_html=True)
-            st.subheader("🧬 Genetic Data Input")
-            
-            genetic_input_method = st.radio(
-                "Choose genetic input method:",
-                ["Enter gene names", "Paste DNA sequence (simulated)"]
+        else:  # Manual input
+            manual_symptoms = st.text_area(
+                "Enter symptoms (comma-separated):",
+                placeholder="e.g., fever, cough, headache, fatigue"
             )
-            
-            genetic_input = ""
-            
-            if genetic_input_method == "Enter gene names":
-                genetic_input = st.text_area(
-                    "Enter known gene variants or mutations:",
-                    placeholder="e.g., BRCA1, BRCA2, APOE, rs123456"
-                )
-            else:
-                genetic_input = st.text_area(
-                    "Paste DNA sequence (this is simulated analysis):",
-                    placeholder="e.g., ATCGATCGATCG... (any sequence for demonstration)"
-                )
-            
-            st.markdown('</div>', unsafe_allow_html=True)
-        else:
-            genetic_input = ""
+            if manual_symptoms:
+                # Resolve typos and synonyms to catalog symptoms
+                resolved, unrecognized = analyzer.vocabulary.resolve_all(manual_symptoms.split(','))
+                user_symptoms = resolved + unrecognized
+                if resolved:
+                    st.caption("Interpreted as: " + ", ".join(s.replace('_', ' ') for s in resolved))
+                if unrecognized:
+                    st.warning("Not recognized: " + ", ".join(s.replace('_', ' ') for s in unrecognized))
+        
+        st.markdown('</div>', unsafe_allow_html=True)
+    else:
+        user_symptoms = []
+        live_results = None
     
-    with col2:
-        # Analysis button and quick stats
+    # Genetic Input Section
+    if analysis_type in ["Comprehensive Analysis", "Genetic Analysis Only"]:
         st.markdown('<div class="feature-box">', unsafe_allow_html=True)
-        st.subheader("📊 Quick Stats")
+        st.subheader("🧬 Genetic Data Input")
+        
+        genetic_input_method = st.radio(
+            "Choose genetic input method:",
+            ["Enter gene names", "Paste DNA sequence (simulated)", "Upload FASTA/VCF file"]
+        )
         
-        symptom_data = load_symptom_disease_data()
-        genetic_data = load_genetic_disease_data()
+        genetic_input = ""
+        genetic_file = None
         
-        st.metric("Diseases in Database", len(symptom_data))
-        st.metric("Genetic Markers", len(genetic_data))
-        st.metric("Available Symptoms", len(AVAILABLE_SYMPTOMS))
+        if genetic_input_method == "Enter gene names":
+            genetic_input = st.text_area(
+                "Enter known gene variants or mutations:",
+                placeholder="e.g., BRCA1, BRCA2, APOE, rs123456"
+            )
+        elif genetic_input_method == "Paste DNA sequence (simulated)":
+            genetic_input = st.text_area(
+                "Paste DNA sequence (this is simulated analysis):",
+                placeholder="e.g., ATCGATCGATCG... (any sequence for demonstration)"
+            )
+        else:
+            genetic_file = st.file_uploader(
+                "Upload a FASTA or VCF file (read in chunks, any size):",
+                type=["vcf", "gz", "fa", "fasta", "fna", "txt"]
+            )
+            if genetic_file is not None:
+                genetic_input = f"{genetic_file.name} (uploaded file)"
         
         st.markdown('</div>', unsafe_allow_html=True)
+    else:
+        genetic_input = ""
+        genetic_file = None
+
+    # Read by the Run Analysis button, which lives in its own fragment; the
+    # analyzer the inputs were resolved and live-scored against goes with them
+    st.session_state.pending_input = {
+        'analyzer': analyzer,
+        'user_symptoms': user_symptoms,
+        'live_results': live_results,
+        'genetic_input': genetic_input,
+        'genetic_file': genetic_file
+    }
+
+# Catalog counts are computed once per catalog version and shared by every
+# session, instead of on each rerun
+@st.cache_resource(max_entries=4)
+def catalog_stats(version, _analyzer):
+    return {
+        'diseases': len(_analyzer.symptom_index),
+        'genes': len(_analyzer.gene_matcher),
+        'symptoms': len(AVAILABLE_SYMPTOMS),
+        'variants': len(_analyzer.variant_index) if _analyzer.variant_index is not None else None
+    }
+
+
+@timed_fragment('quick_stats', run_every=STATS_REFRESH_SECONDS)
+def quick_stats():
+    """Catalog counts; refreshed on a timer so a reloaded catalog shows up"""
+    analyzer = get_analyzer()
+    stats = catalog_stats(analyzer.version, analyzer)
+    st.markdown('<div class="feature-box">', unsafe_allow_html=True)
+    st.subheader("📊 Quick Stats")
+    
+    st.metric("Diseases in Database", stats['diseases'])
+    st.metric("Genetic Markers", stats['genes'])
+    st.metric("Available Symptoms", stats['symptoms'])
+    if stats['variants'] is not None:
+        st.metric("Indexed Variants (rsIDs)", f"{stats['variants']:,}")
+    
+    st.markdown('</div>', unsafe_allow_html=True)
+
+
+@timed_fragment('run_analysis')
+def run_panel(analysis_type):
+    """The Run Analysis button, scoring the inputs stored by input_panel"""
+    # Analysis button
+    if st.button("🔍 Run Analysis", type="primary", width="stretch"):
+        pending = st.session_state.get('pending_input', {})
+        # Score on the catalog the inputs panel used, even if one was reloaded since
+        analyzer = pending.get('analyzer') or get_analyzer()
+        user_symptoms = pending.get('user_symptoms', [])
+        genetic_input = pending.get('genetic_input', "")
+        genetic_file = pending.get('genetic_file')
+        live_results = pending.get('live_results')
         
-        # Analysis button
-        if st.button("🔍 Run Analysis", type="primary", use_container_width=True):
-            # Initialize variables to avoid UnboundLocalError
-            if 'user_symptoms' not in locals():
-                user_symptoms = []
-            if 'genetic_input' not in locals():
-                genetic_input = ""
+        if (analysis_type == "Symptom Analysis Only" and not user_symptoms) or \
+           (analysis_type == "Genetic Analysis Only" and not genetic_input) or \
+           (analysis_type == "Comprehensive Analysis" and not user_symptoms and not genetic_input):
+            st.error("Please provide at least one input for analysis!")
+        else:
+            with st.spinner("Analyzing your data..."):
+                # Perform analysis
+                symptom_results = []
+                genetic_results = []
                 
-            if (analysis_type == "Symptom Analysis Only" and not user_symptoms) or \
-               (analysis_type == "Genetic Analysis Only" and not genetic_input) or \
-               (analysis_type == "Comprehensive Analysis" and not user_symptoms and not genetic_input):
-                st.error("Please provide at least one input for analysis!")
-            else:
-                with st.spinner("Analyzing your data..."):
-                    # Perform analysis
-                    symptom_results = []
-                    genetic_results = []
-                    
-                    if analysis_type in ["Comprehensive Analysis", "Symptom Analysis Only"] and user_symptoms:
-                        symptom_results = analyze_symptoms(user_symptoms)
-                    
-                    if analysis_type in ["Comprehensive Analysis", "Genetic Analysis Only"] and genetic_input:
-                        genetic_results, genes_found = analyze_genetic_markers(genetic_input)
-                    
-                    # Store results in session state
-                    st.session_state.analysis_results = {
-                        'symptom_results': symptom_results,
-                        'genetic_results': genetic_results,
-                        'user_symptoms': user_symptoms,
-                        'genetic_input': genetic_input
-                    }
+                if analysis_type in ["Comprehensive Analysis", "Symptom Analysis Only"] and user_symptoms:
+                    if live_results is not None:
+                        symptom_results = live_results
+                    else:
+                        symptom_results = analyze_symptoms(user_symptoms, analyzer=analyzer)
+                
+                if analysis_type in ["Comprehensive Analysis", "Genetic Analysis Only"] and genetic_file is not None:
+                    genetic_results, genes_found = analyze_genetic_file(genetic_file, analyzer=analyzer)
+                elif analysis_type in ["Comprehensive Analysis", "Genetic Analysis Only"] and genetic_input:
+                    genetic_results, genes_found = analyze_genetic_markers(genetic_input, analyzer=analyzer)
                 
-                st.success("Analysis complete! Results shown below.")
+                # Store results in session state
+                st.session_state.analysis_results = {
+                    'analyzer': analyzer,
+                    'symptom_results': symptom_results,
+                    'genetic_results': genetic_results,
+                    'user_symptoms': user_symptoms,
+                    'genetic_input': genetic_input,
+                    'analyzed_at': datetime.now()
+                }
+            
+            # The results section is outside this fragment, so redraw the page
+            st.session_state.analysis_notice = True
+            st.rerun()
     
-    # Results Section
-    if st.session_state.analysis_results:
-        results = st.session_state.analysis_results
-        
-        st.markdown("---")
-        st.header("📋 Analysis Results")
-        
-        # Create tabs for different result views
-        tab1, tab2, tab3, tab4 = st.tabs(["🩺 Disease Predictions", "🧬 Genetic Risks", "📊 Visualizations", "📄 Full Report"])
-        
-        with tab1:
+    if st.session_state.pop('analysis_notice', False):
+        st.success("Analysis complete! Results shown below.")
+
+
+@timed_fragment('cohort')
+def cohort_panel():
+    """Upload of patient records and the button aggregating them"""
+    st.markdown('<div class="feature-box">', unsafe_allow_html=True)
+    st.subheader("👥 Cohort Analytics")
+    st.write("Upload a CSV or Parquet file with one patient per row to see symptom co-occurrence, "
+             "predicted-disease frequency and gene-hit rates across the whole cohort.")
+    upload = st.file_uploader("Patient records", type=['csv', 'parquet'], key="cohort_file")
+    cols = st.columns(3)
+    with cols[0]:
+        symptom_column = st.text_input("Symptom column", "symptoms", key="cohort_symptom_column")
+    with cols[1]:
+        gene_column = st.text_input("Gene column", "genes", key="cohort_gene_column")
+    with cols[2]:
+        group_column = st.text_input("Cohort column (optional)", "", key="cohort_group_column")
+    st.markdown('</div>', unsafe_allow_html=True)
+
+    if st.button("📈 Aggregate Cohort", type="primary", width="stretch", disabled=upload is None):
+        # Imported on first use, like the other result-only modules
+        from symptogen.batch import read_records
+        from symptogen.cohort import aggregate_records
+
+        analyzer = get_analyzer()
+        with st.spinner("Aggregating patient records..."):
+            upload.seek(0)
+            cohorts = aggregate_records(read_records(upload), analyzer, symptom_column=symptom_column,
+                                        gene_column=gene_column, group_column=group_column or None)
+        st.session_state.cohort_results = {'cohorts': cohorts, 'file': upload.name}
+        # The cohort results are outside this fragment, so redraw the page
+        st.rerun()
+
+
+def cohort_results_panel():
+    """Summary tables and charts of the last aggregated cohort file"""
+    from symptogen.charts import cooccurrence_chart, disease_frequency_chart
+
+    analyzer = get_analyzer()
+    results = st.session_state.cohort_results
+    cohorts = results['cohorts']
+    if any(aggregate.version != analyzer.version for aggregate in cohorts.values()):
+        st.warning("The catalog changed since this cohort was aggregated; aggregate it again.")
+        return
+
+    st.markdown("---")
+    st.header(f"👥 Cohort Results: {results['file']}")
+    label = st.selectbox("Cohort", list(cohorts), key="cohort_label") if len(cohorts) > 1 else next(iter(cohorts))
+    cohort = cohorts[label]
+
+    cols = st.columns(3)
+    cols[0].metric("Patients", f"{cohort.patients:,}")
+    cols[1].metric("With recognized symptoms", f"{cohort.symptom_patients:,}")
+    cols[2].metric("With genetic input", f"{cohort.genetic_patients:,}")
+
+    frequency = cohort.disease_frequency(analyzer)
+    if len(frequency):
+        st.plotly_chart(disease_frequency_chart(frequency), width="stretch")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("Most Reported Symptoms")
+        st.dataframe(cohort.symptom_prevalence(analyzer), hide_index=True, width="stretch")
+    with col2:
+        st.subheader("Most Frequent Symptom Pairs")
+        st.dataframe(cohort.cooccurrence_pairs(analyzer), hide_index=True, width="stretch")
+    matrix = cohort.cooccurrence_matrix(analyzer)
+    if len(matrix):
+        st.plotly_chart(cooccurrence_chart(matrix), width="stretch")
+    st.subheader("Gene Hit Rates")
+    st.caption("Share of patients with genetic input in whom each catalog gene was found")
+    st.dataframe(cohort.gene_hit_rates(analyzer), hide_index=True, width="stretch")
+    st.download_button("📥 Download Summary (JSON)",
+                       data=json.dumps({name: aggregate.summary(analyzer) for name, aggregate in cohorts.items()},
+                                       indent=2, default=lambda value: value.item()),
+                       file_name="symptogen_cohort.json", mime="application/json")
+
+
+@timed_fragment('results')
+def results_panel():
+    """Result tabs; switching tabs or downloading reruns only this panel"""
+    results = st.session_state.analysis_results
+    # Results are shown against the catalog they were computed on, not the
+    # process's current one
+    analyzer = results['analyzer']
+    
+    st.markdown("---")
+    st.header("📋 Analysis Results")
+    if analyzer.version != get_analyzer().version:
+        st.info("The catalog was reloaded after this analysis; these results use the previous catalog. "
+                "Run the analysis again to use the new one.")
+    
+    # Create tabs for different result views; only the selected tab runs, so
+    # Plotly and the report are loaded when their tab is first opened
+    tab1, tab2, tab3, tab4 = st.tabs(
+        ["🩺 Disease Predictions", "🧬 Genetic Risks", "📊 Visualizations", "📄 Full Report"],
+        key="results_tab", on_change="rerun"
+    )
+    
+    if tab1.open:
+        with tab1, metrics.timer('render'):
             if results['symptom_results']:
                 st.subheader("Top Disease Predictions")
-                
+            
                 for i, result in enumerate(results['symptom_results'][:5], 1):
                     severity_class = f"risk-{result['Severity'].lower()}"
                     st.markdown(f"""
@@ -468,11 +518,12 @@ def main():
                     """, unsafe_allow_html=True)
             else:
                 st.info("No symptom analysis performed or no matches found.")
-        
-        with tab2:
+    
+    if tab2.open:
+        with tab2, metrics.timer('render'):
             if results['genetic_results']:
                 st.subheader("Genetic Risk Assessment")
-                
+            
                 for result in results['genetic_results']:
                     risk_class = f"risk-{result['Risk_Level'].lower()}"
                     st.markdown(f"""
@@ -485,105 +536,117 @@ def main():
                     """, unsafe_allow_html=True)
             else:
                 st.info("No genetic analysis performed or no risk factors identified.")
-        
-        with tab3:
-            # Visualizations
+    
+    if tab3.open:
+        with tab3, metrics.timer('render'):
+            # Visualizations; figures are cached per result and shared
+            # across sessions
+            from symptogen.charts import prediction_chart, risk_chart
+
             col1, col2 = st.columns(2)
-            
+        
             with col1:
                 if results['symptom_results']:
                     st.subheader("Disease Prediction Confidence")
-                    
-                    # Create bar chart
-                    diseases = [r['Disease'] for r in results['symptom_results'][:8]]
-                    confidences = [r['Confidence'] for r in results['symptom_results'][:8]]
-                    
-                    fig = px.bar(
-                        x=confidences,
-                        y=diseases,
-                        orientation='h',
-                        title="Disease Prediction Confidence Scores",
-                        labels={'x': 'Confidence (%)', 'y': 'Disease'},
-                        color=confidences,
-                        color_continuous_scale='Viridis'
-                    )
-                    fig.update_layout(height=400)
-                    st.plotly_chart(fig, use_container_width=True)
-            
+                
+                    st.plotly_chart(prediction_chart(results['symptom_results']), width="stretch")
+        
             with col2:
                 if results['genetic_results']:
                     st.subheader("Genetic Risk Distribution")
-                    
-                    # Risk level pie chart
-                    risk_counts = {}
-                    for result in results['genetic_results']:
-                        risk_level = result['Risk_Level']
-                        risk_counts[risk_level] = risk_counts.get(risk_level, 0) + 1
-                    
-                    fig = px.pie(
-                        values=list(risk_counts.values()),
-                        names=list(risk_counts.keys()),
-                        title="Genetic Risk Level Distribution",
-                        color_discrete_map={
-                            'High': '#ff4444',
-                            'Medium': '#ffaa00',
-                            'Low': '#44ff44'
-                        }
-                    )
-                    st.plotly_chart(fig, use_container_width=True)
-        
+                
+                    st.plotly_chart(risk_chart(results['genetic_results']), width="stretch")
+    
+    if tab4.open:
         with tab4:
             st.subheader("Comprehensive Analysis Report")
-            
-            # Generate and display report
-            report = generate_report(
+        
+            # The report body is rendered once per analysis result and stamped
+            # with this session's analysis time; the download formats are only
+            # produced when their button is clicked
+            report = get_report(
                 results['symptom_results'],
                 results['genetic_results'],
                 results['user_symptoms'],
-                results['genetic_input']
+                results['genetic_input'],
+                results['analyzed_at'],
+                results['analyzer'].version
             )
-            
-            st.markdown(report)
-            
+        
+            with metrics.timer('report'):
+                st.markdown(report.markdown)
+        
             # Download options
             st.subheader("📥 Export Options")
-            
-            col1, col2 = st.columns(2)
-            
+        
+            col1, col2, col3 = st.columns(3)
+            file_stem = f"symptogen_report_{report.generated_at.strftime('%Y%m%d_%H%M%S')}"
+        
             with col1:
-                # Text download
                 st.download_button(
                     label="📄 Download as Text",
-                    data=report,
-                    file_name=f"symptogen_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
+                    data=lambda: report.markdown,
+                    file_name=f"{file_stem}.txt",
                     mime="text/plain"
                 )
-            
+        
             with col2:
-                # Create a simple HTML version for better formatting
-                html_report = f"""
-                <!DOCTYPE html>
-                <html>
-                <head>
-                    <title>SymptoGen Analysis Report</title>
-                    <style>
-                        body {{ font-family: Arial, sans-serif; margin: 40px; }}
-                        h1, h2, h3 {{ color: #333; }}
-                        .disclaimer {{ background-color: #fff3cd; padding: 15px; border-radius: 5px; border-left: 4px solid #ffc107; margin: 20px 0; }}
-                    </style>
-                </head>
-                <body>
-                    {report.replace('⚠️', '').replace('🧬', '').replace('🩺', '').replace('📊', '').replace('📄', '')}
-                </body>
-                </html>
-                """
-                
                 st.download_button(
                     label="🌐 Download as HTML",
-                    data=html_report,
-                    file_name=f"symptogen_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html",
+                    data=lambda: report.html,
+                    file_name=f"{file_stem}.html",
                     mime="text/html"
                 )
+        
+            with col3:
+                st.download_button(
+                    label="🗂️ Download as JSON",
+                    data=lambda: report.json,
+                    file_name=f"{file_stem}.json",
+                    mime="application/json"
+                )
+
+
+# Main App Interface
+def render_page():
+    # Header
+    st.markdown("""
+    <div class="main-header">
+        <h1>🧬 SymptoGen: Symptom & Genetic Disease Insight Tool</h1>
+        <p>Advanced symptom analysis and genetic risk assessment</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Sidebar for navigation
+    st.sidebar.title("🔬 Analysis Tools")
+    analysis_type = st.sidebar.selectbox(
+        "Choose Analysis Type",
+        ["Comprehensive Analysis", "Symptom Analysis Only", "Genetic Analysis Only", "Cohort Analytics"]
+    )
+    st.sidebar.checkbox("Show performance breakdown", key="debug_metrics",
+                        help="Time each analysis stage of this page run")
+    
+    # Main content area
+    col1, col2 = st.columns([2, 1])
+    
+    if analysis_type == "Cohort Analytics":
+        with col1:
+            cohort_panel()
+        with col2:
+            quick_stats()
+        if st.session_state.get('cohort_results'):
+            cohort_results_panel()
+    else:
+        with col1:
+            input_panel(analysis_type)
+        
+        with col2:
+            quick_stats()
+            run_panel(analysis_type)
+        
+        # Results Section
+        if st.session_state.analysis_results:
+            results_panel()
     
     # Bioethics and Disclaimer Section
     st.markdown("---")
@@ -630,5 +693,82 @@ def main():
     </div>
     """, unsafe_allow_html=True)
 
+def show_debug_panel(run):
+    """Per-stage timings and counters of the last page run, plus recent fragment reruns"""
+    with st.expander("⏱️ Performance breakdown (last run)", expanded=True):
+        st.caption(f"Page run: {run.seconds * 1000:.1f} ms · "
+                   f"time to interactive: {st.session_state.time_to_interactive * 1000:.1f} ms")
+        if run.stages:
+            stages = pd.DataFrame(
+                {'Stage': list(run.stages), 'Time (ms)': [s * 1000 for s in run.stages.values()]}
+            )
+            st.dataframe(stages, hide_index=True, width="stretch")
+        if run.counters:
+            st.dataframe(
+                pd.DataFrame({'Counter': list(run.counters), 'Value': list(run.counters.values())}),
+                hide_index=True, width="stretch"
+            )
+        catalog = current_catalog().stats()
+        sessions = session_registry().stats()
+        st.caption(f"Memory: this session {format_bytes(st.session_state.get('session_bytes', 0))} · "
+                   f"{sessions['sessions']} sessions {format_bytes(sessions['total_bytes'])} "
+                   f"(mean {format_bytes(sessions['mean_bytes'])}) · "
+                   f"shared catalog {format_bytes(catalog['heap_bytes'])} + "
+                   f"{format_bytes(catalog['mapped_bytes'])} mapped")
+        reruns = st.session_state.get('rerun_timings')
+        if reruns:
+            st.dataframe(
+                pd.DataFrame({'Rerun': [name for name, _ in reruns],
+                              'Time (ms)': [seconds * 1000 for _, seconds in reruns]}),
+                hide_index=True, width="stretch"
+            )
+        st.download_button("Download as JSON", data=json.dumps(run.as_dict(), indent=2),
+                           file_name="symptogen_metrics.json", mime="application/json")
+
+
+def main():
+    # Stages of fragment reruns (such as Run Analysis) and of runs cut short
+    # by st.rerun() since the last full page run
+    pending = st.session_state.pop('pending_metrics', None)
+    if not st.session_state.get("debug_metrics"):
+        render_page()
+        finish_page_run()
+        return
+    with metrics.METRICS.run() as run:
+        if pending is not None:
+            run.merge(pending)
+        try:
+            render_page()
+        except BaseException:
+            # st.rerun() ends this run early; its stages belong to the next one
+            stash_metrics(run)
+            raise
+    finish_page_run()
+    show_debug_panel(run)
+
+
+def finish_page_run():
+    """Record this full run; a session's first one is its time to interactive"""
+    seconds = time.perf_counter() - _run_started
+    st.session_state.setdefault('time_to_interactive', seconds)
+    record_rerun('page', seconds)
+    # Walking the session state costs time on every rerun, so unless the
+    # breakdown is showing it the measurement is sampled
+    runs = st.session_state.page_runs = st.session_state.get('page_runs', 0) + 1
+    if st.session_state.get('debug_metrics') or (runs - 1) % FOOTPRINT_SAMPLE_RUNS == 0:
+        record_footprint()
+
+
+def record_footprint():
+    """Measure what this session holds beyond the shared catalog and update the process totals"""
+    nbytes = current_catalog().session_bytes(st.session_state)
+    st.session_state.session_bytes = nbytes
+    ctx = get_script_run_ctx()
+    if ctx is not None:
+        registry = session_registry()
+        registry.update(ctx.session_id, nbytes)
+        registry.prune(runtime.get_instance().is_active_session if runtime.exists() else None)
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1 @@
+"""Micro-benchmarks and load tests for the SymptoGen scoring hot paths"""
@@ -0,0 +1,100 @@
+"""Time-to-interactive and per-interaction rerun time of the Streamlit app
+
+Drives Disease.py headlessly with streamlit.testing and reports, per
+scripted interaction, the wall time of the rerun and the page and fragment
+timings the app itself recorded (see record_rerun in Disease.py).  The
+first run happens in a fresh interpreter, so its time includes the app's
+imports, as a new server process would.
+
+Usage::
+
+    python -m benchmarks.app_startup --repeat 5 --output app.json
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+APP = Path(__file__).resolve().parent.parent / 'Disease.py'
+
+INTERACTIONS = [
+    ('toggle_symptom', lambda at: at.checkbox(key='symptom_fever').check()),
+    ('toggle_second_symptom', lambda at: at.checkbox(key='symptom_cough').check()),
+    ('run_analysis', lambda at: at.button[0].click()),
+    ('toggle_debug_panel', lambda at: at.checkbox(key='debug_metrics').check()),
+    ('change_analysis_type', lambda at: at.selectbox[0].select('Symptom Analysis Only')),
+]
+
+
+def _app_timings(at):
+    """Page and fragment timings the app recorded since the last call, which clears them"""
+    if 'rerun_timings' not in at.session_state:
+        return []
+    # The history is a bounded deque, so it is emptied rather than sliced
+    history = at.session_state['rerun_timings']
+    timings = [{'name': name, 'ms': seconds * 1000} for name, seconds in history]
+    history.clear()
+    return timings
+
+
+def run_once(timeout=60):
+    from streamlit.testing.v1 import AppTest
+
+    start = time.perf_counter()
+    at = AppTest.from_file(str(APP), default_timeout=timeout).run()
+    result = {
+        'time_to_interactive_ms': (time.perf_counter() - start) * 1000,
+        'app_time_to_interactive_ms': at.session_state['time_to_interactive'] * 1000,
+        'interactions': []
+    }
+    _app_timings(at)
+    for name, interact in INTERACTIONS:
+        start = time.perf_counter()
+        interact(at).run()
+        if at.exception:
+            raise RuntimeError(f'{name} raised: {at.exception}')
+        ms = (time.perf_counter() - start) * 1000
+        result['interactions'].append({'name': name, 'ms': ms, 'app': _app_timings(at)})
+    return result
+
+
+def summarize(runs):
+    summary = {
+        'time_to_interactive_ms': statistics.median(r['time_to_interactive_ms'] for r in runs),
+        'cold_time_to_interactive_ms': runs[0]['time_to_interactive_ms'],
+        'interactions': {}
+    }
+    for i, (name, _) in enumerate(INTERACTIONS):
+        summary['interactions'][name] = statistics.median(r['interactions'][i]['ms'] for r in runs)
+    return summary
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.app_startup', description=__doc__.split('\n')[0])
+    parser.add_argument('--repeat', type=int, default=3, help='app sessions to script (the first one is cold)')
+    parser.add_argument('--output', help='write JSON results here (default: stdout)')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    runs = [run_once() for _ in range(args.repeat)]
+    summary = summarize(runs)
+    print(f"time to interactive: {summary['cold_time_to_interactive_ms']:.0f} ms cold, "
+          f"{summary['time_to_interactive_ms']:.0f} ms median", file=sys.stderr)
+    for name, ms in summary['interactions'].items():
+        print(f"  {name:<24} {ms:8.1f} ms", file=sys.stderr)
+
+    text = json.dumps({'summary': summary, 'runs': runs}, indent=2)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            handle.write(text)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""The original row-by-row implementations, kept as a benchmark baseline"""
+
+
+def calculate_symptom_match_score(user_symptoms, disease_symptoms):
+    """Calculate matching score between user symptoms and disease symptoms"""
+    if not user_symptoms or not disease_symptoms:
+        return 0
+
+    user_set = set(user_symptoms)
+    disease_set = set(disease_symptoms)
+
+    intersection = len(user_set.intersection(disease_set))
+    union = len(user_set.union(disease_set))
+
+    # Jaccard similarity with bonus for exact matches
+    jaccard_score = intersection / union if union > 0 else 0
+    match_bonus = intersection / len(disease_set) if len(disease_set) > 0 else 0
+
+    return (jaccard_score * 0.6 + match_bonus * 0.4) * 100
+
+
+def analyze_symptoms(symptom_data, user_symptoms):
+    """Analyze user symptoms and return predicted diseases"""
+    results = []
+
+    for _, row in symptom_data.iterrows():
+        score = calculate_symptom_match_score(user_symptoms, row['Primary_Symptoms'])
+        if score > 0:
+            results.append({
+                'Disease': row['Disease'],
+                'Confidence': score,
+                'Severity': row['Severity'],
+                'Matched_Symptoms': list(set(user_symptoms).intersection(set(row['Primary_Symptoms'])))
+            })
+
+    # Sort by confidence score
+    results = sorted(results, key=lambda x: x['Confidence'], reverse=True)
+    return results[:10]  # Return top 10 matches
+
+
+def analyze_genetic_markers(genetic_data, genetic_input):
+    """Analyze genetic markers and return associated risks"""
+    results = []
+
+    # Simple pattern matching for gene names
+    genes_found = []
+    for _, row in genetic_data.iterrows():
+        if row['Gene'].upper() in genetic_input.upper():
+            genes_found.append(row['Gene'])
+            results.append({
+                'Gene': row['Gene'],
+                'Disease': row['Associated_Disease'],
+                'Risk_Level': row['Risk_Level'],
+                'Prevalence': row['Prevalence'],
+                'Description': row['Description']
+            })
+
+    return results, genes_found
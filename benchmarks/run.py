@@ -0,0 +1,197 @@
+"""Benchmark the scoring hot paths across catalog sizes
+
+Scales the disease, symptom and gene tables from today's 15/45/10 rows up to
+10^5-10^6 rows and records, per scale, latency percentiles, throughput and
+peak traced memory for:
+
+* catalog compilation
+* single analyze_symptoms / analyze_genetic_markers queries (uncached)
+* batch symptom scoring
+* generate_report
+* the original iterrows implementation, as a baseline (small scales only)
+
+Results are written as JSON; ``--compare`` prints the change against an
+earlier results file.
+
+Usage::
+
+    python -m benchmarks.run --scales 15 1000 100000 --output bench.json
+    python -m benchmarks.run --output new.json --compare bench.json
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+
+from benchmarks import baseline
+from benchmarks.synthetic import (
+    default_symptom_count, symptom_names, synthetic_gene_inputs, synthetic_genetic_frame,
+    synthetic_symptom_frame, synthetic_symptom_queries
+)
+from symptogen.analyzer import Analyzer
+from symptogen.cache import ResultCache
+from symptogen.core import analyze_genetic_markers, analyze_symptoms, generate_report
+from symptogen.engine import SymptomIndex
+from symptogen.genetics import GeneMatcher
+
+DEFAULT_SCALES = [15, 1000, 10000, 100000]
+
+
+def _latencies(fn, inputs):
+    timings = []
+    for item in inputs:
+        start = time.perf_counter()
+        fn(item)
+        timings.append(time.perf_counter() - start)
+    return np.array(timings)
+
+
+def latency_summary(timings):
+    """Percentiles (milliseconds) and throughput for per-call timings"""
+    total = float(timings.sum())
+    return {
+        'calls': int(len(timings)),
+        'p50_ms': float(np.percentile(timings, 50) * 1e3),
+        'p95_ms': float(np.percentile(timings, 95) * 1e3),
+        'p99_ms': float(np.percentile(timings, 99) * 1e3),
+        'mean_ms': float(timings.mean() * 1e3),
+        'throughput_per_sec': len(timings) / total if total > 0 else 0.0
+    }
+
+
+def peak_memory_mb(fn):
+    """Peak traced allocation, in MiB, while running ``fn`` once"""
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 2 ** 20
+
+
+def bench_scale(n_diseases, n_genes, queries, batch_size, baseline_max, gene_tokens):
+    n_symptoms = default_symptom_count(n_diseases)
+    symptom_frame = synthetic_symptom_frame(n_diseases, n_symptoms)
+    genetic_frame = synthetic_genetic_frame(n_genes)
+    symptom_queries = synthetic_symptom_queries(queries, n_symptoms)
+    gene_inputs = synthetic_gene_inputs(max(queries // 10, 5), n_genes, gene_tokens)
+    stages = {}
+
+    def build():
+        return (SymptomIndex.from_frame(symptom_frame, vocabulary=symptom_names(n_symptoms)),
+                GeneMatcher.from_frame(genetic_frame))
+
+    start = time.perf_counter()
+    symptom_index, gene_matcher = build()
+    stages['build'] = {'seconds': time.perf_counter() - start, 'peak_mb': peak_memory_mb(build)}
+
+    # A zero-size cache measures the scoring path itself, never a cache hit
+    analyzer = Analyzer(symptom_index, gene_matcher, cache=ResultCache(maxsize=0))
+
+    stages['symptoms_single'] = latency_summary(
+        _latencies(lambda q: analyze_symptoms(q, analyzer=analyzer), symptom_queries))
+    stages['symptoms_single']['peak_mb'] = peak_memory_mb(
+        lambda: [analyze_symptoms(q, analyzer=analyzer) for q in symptom_queries[:100]])
+
+    batches = [symptom_queries[i:i + batch_size] for i in range(0, len(symptom_queries), batch_size)]
+    batch_timings = _latencies(lambda b: analyzer.analyze_symptoms_batch(b), batches)
+    stages['symptoms_batch'] = latency_summary(batch_timings)
+    stages['symptoms_batch']['records_per_sec'] = len(symptom_queries) / float(batch_timings.sum())
+    stages['symptoms_batch']['peak_mb'] = peak_memory_mb(lambda: analyzer.analyze_symptoms_batch(batches[0]))
+
+    stages['genetics_single'] = latency_summary(
+        _latencies(lambda g: analyze_genetic_markers(g, analyzer=analyzer), gene_inputs))
+    stages['genetics_single']['input_tokens'] = gene_tokens
+
+    report_inputs = [
+        (analyze_symptoms(q, analyzer=analyzer), analyze_genetic_markers(g, analyzer=analyzer)[0], q, g)
+        for q, g in zip(symptom_queries, gene_inputs)
+    ]
+    stages['report'] = latency_summary(_latencies(lambda args: generate_report(*args), report_inputs))
+
+    if n_diseases <= baseline_max:
+        sample = symptom_queries[:max(10, min(len(symptom_queries), 200_000 // max(n_diseases, 1)))]
+        stages['baseline_symptoms_single'] = latency_summary(
+            _latencies(lambda q: baseline.analyze_symptoms(symptom_frame, q), sample))
+        gene_sample = gene_inputs[:10]
+        stages['baseline_genetics_single'] = latency_summary(
+            _latencies(lambda g: baseline.analyze_genetic_markers(genetic_frame, g), gene_sample))
+
+    return {
+        'diseases': n_diseases,
+        'symptoms': n_symptoms,
+        'genes': n_genes,
+        'catalog_nnz': int(symptom_index.indptr[-1]),
+        'stages': stages
+    }
+
+
+def compare(current, previous):
+    """Print per-stage ratios (current / previous) of p50 latency, or build time, for matching scales"""
+    earlier = {run['diseases']: run for run in previous['runs']}
+    for run in current['runs']:
+        old = earlier.get(run['diseases'])
+        if old is None:
+            continue
+        for stage, values in run['stages'].items():
+            metric = 'p50_ms' if 'p50_ms' in values else 'seconds'
+            before = old['stages'].get(stage, {}).get(metric)
+            now = values.get(metric)
+            if before and now:
+                print(f"{run['diseases']:>9} {stage:<26} {metric:<8} {before:10.3f} -> {now:10.3f}  x{now / before:6.2f}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.run', description=__doc__.split('\n')[0])
+    parser.add_argument('--scales', type=int, nargs='+', default=DEFAULT_SCALES, help='disease counts to benchmark')
+    parser.add_argument('--genes', type=int, nargs='+',
+                        help='gene table size per scale (default: the disease count / 10, at least 10)')
+    parser.add_argument('--queries', type=int, default=2000, help='single queries per scale')
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--gene-tokens', type=int, default=200, help='tokens per synthetic gene input')
+    parser.add_argument('--baseline-max', type=int, default=10000,
+                        help='largest catalog the iterrows baseline is run against')
+    parser.add_argument('--output', help='write JSON results here (default: stdout)')
+    parser.add_argument('--compare', help='earlier results file to compare against')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    genes = args.genes or [max(10, n // 10) for n in args.scales]
+    runs = []
+    for n_diseases, n_genes in zip(args.scales, genes):
+        print(f"benchmarking {n_diseases} diseases / {n_genes} genes", file=sys.stderr)
+        runs.append(bench_scale(n_diseases, n_genes, args.queries, args.batch_size,
+                                args.baseline_max, args.gene_tokens))
+
+    results = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform()
+        },
+        'runs': runs
+    }
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            handle.write(text)
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as handle:
+            compare(results, json.load(handle))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""Synthetic catalogs and queries at arbitrary scale
+
+Symptom popularity follows a power law so that, as in real catalogs, a few
+symptoms ("fever", "fatigue") appear in a large share of diseases and
+produce long posting lists.
+"""
+import numpy as np
+import pandas as pd
+
+SEVERITIES = np.array(['High', 'Medium', 'Low'])
+RISK_LEVELS = np.array(['High', 'Medium', 'Low'])
+
+
+def default_symptom_count(n_diseases):
+    """Vocabulary size for a catalog of ``n_diseases`` (45 at today's size)"""
+    return int(min(max(45, n_diseases // 5), 50000))
+
+
+def symptom_names(n_symptoms):
+    return [f'symptom_{i}' for i in range(n_symptoms)]
+
+
+def _popularity(n_symptoms, exponent=1.1):
+    weights = 1.0 / np.arange(1, n_symptoms + 1) ** exponent
+    return weights / weights.sum()
+
+
+def synthetic_symptom_frame(n_diseases, n_symptoms=None, min_size=3, max_size=8, seed=0):
+    """DataFrame shaped like load_symptom_disease_data() with ``n_diseases`` rows"""
+    rng = np.random.default_rng(seed)
+    n_symptoms = n_symptoms or default_symptom_count(n_diseases)
+    names = np.array(symptom_names(n_symptoms))
+    probabilities = _popularity(n_symptoms)
+    sizes = rng.integers(min_size, max_size + 1, size=n_diseases)
+    draws = rng.choice(n_symptoms, size=(n_diseases, max_size), p=probabilities)
+    return pd.DataFrame({
+        'Disease': [f'Disease {i}' for i in range(n_diseases)],
+        'Primary_Symptoms': [list(dict.fromkeys(names[row[:size]].tolist())) for row, size in zip(draws, sizes)],
+        'Severity': SEVERITIES[rng.integers(0, 3, size=n_diseases)].tolist()
+    })
+
+
+def synthetic_genetic_frame(n_genes, seed=0):
+    """DataFrame shaped like load_genetic_disease_data() with ``n_genes`` rows"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Gene': [f'GENE{i}' for i in range(n_genes)],
+        'Associated_Disease': [f'Genetic Disease {i}' for i in range(n_genes)],
+        'Risk_Level': RISK_LEVELS[rng.integers(0, 3, size=n_genes)].tolist(),
+        'Prevalence': [f'1 in {n}' for n in rng.integers(2, 10000, size=n_genes)],
+        'Description': ['Synthetic gene-disease association'] * n_genes
+    })
+
+
+def synthetic_symptom_queries(n_queries, n_symptoms, min_size=1, max_size=6, seed=1):
+    """Symptom lists drawn with the same popularity skew as the catalog"""
+    rng = np.random.default_rng(seed)
+    names = np.array(symptom_names(n_symptoms))
+    probabilities = _popularity(n_symptoms)
+    sizes = rng.integers(min_size, max_size + 1, size=n_queries)
+    draws = rng.choice(n_symptoms, size=(n_queries, max_size), p=probabilities)
+    return [list(dict.fromkeys(names[row[:size]].tolist())) for row, size in zip(draws, sizes)]
+
+
+def synthetic_gene_inputs(n_inputs, n_genes, tokens_per_input, hit_rate=0.05, seed=2):
+    """Comma separated gene panels mixing catalog genes with unknown tokens"""
+    rng = np.random.default_rng(seed)
+    inputs = []
+    for _ in range(n_inputs):
+        hits = rng.random(tokens_per_input) < hit_rate
+        genes = rng.integers(0, n_genes, size=tokens_per_input)
+        inputs.append(', '.join(f'GENE{g}' if hit else f'OTHER{g}X' for g, hit in zip(genes, hits)))
+    return inputs
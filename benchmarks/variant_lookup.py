@@ -0,0 +1,107 @@
+"""Build time and lookup latency of the variant index at ClinVar scale
+
+Generates a synthetic variant table (rsID, chromosome, position, gene) with
+genes laid out as intervals along each chromosome, compiles a VariantIndex,
+and times rsID and position lookups one token at a time and in batches,
+checking every answer against a brute-force scan of a sample.
+
+Usage::
+
+    python -m benchmarks.variant_lookup --variants 2000000 --genes 20000
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from symptogen.variants import CHROMOSOMES, VariantIndex
+
+
+def synthetic_variant_frames(n_variants, n_genes, seed=0):
+    """A variant table and the gene intervals it was drawn from"""
+    rng = np.random.default_rng(seed)
+    chrom = rng.integers(0, len(CHROMOSOMES) - 1, n_genes)
+    starts = rng.integers(1, 200_000_000, n_genes)
+    ends = starts + rng.integers(1_000, 200_000, n_genes)
+    genes = pd.DataFrame({'gene': [f'GENE{i}' for i in range(n_genes)],
+                          'chrom': np.array(CHROMOSOMES)[chrom], 'start': starts, 'end': ends})
+    owner = rng.integers(0, n_genes, n_variants)
+    variants = pd.DataFrame({
+        'rsid': [f'rs{number}' for number in rng.choice(50 * n_variants, n_variants, replace=False) + 1],
+        'chrom': genes['chrom'].to_numpy()[owner],
+        'pos': starts[owner] + rng.integers(0, ends[owner] - starts[owner]),
+        'gene': genes['gene'].to_numpy()[owner]
+    })
+    return variants, genes
+
+
+def _time_per_token(index, tokens, batch):
+    timings = []
+    for start in range(0, len(tokens), batch):
+        text = ' '.join(tokens[start:start + batch])
+        began = time.perf_counter()
+        index.resolve(text)
+        timings.append((time.perf_counter() - began) / len(tokens[start:start + batch]))
+    return {'batch': batch, 'mean_us': statistics.mean(timings) * 1e6,
+            'p99_us': float(np.percentile(timings, 99)) * 1e6}
+
+
+def _check(index, variants, genes, sample):
+    # Brute force over the tables for a sample of rsIDs and positions
+    for _, row in variants.sample(sample, random_state=1).iterrows():
+        expected = set(variants.loc[variants['rsid'] == row['rsid'], 'gene'])
+        found = {str(index.genes[g]) for g in index.resolve(row['rsid'])}
+        assert found == expected, (row['rsid'], found, expected)
+        expected = set(genes.loc[(genes['chrom'] == row['chrom']) & (genes['start'] <= row['pos'])
+                                 & (genes['end'] >= row['pos']), 'gene'])
+        expected |= set(variants.loc[(variants['chrom'] == row['chrom']) & (variants['pos'] == row['pos']), 'gene'])
+        found = {str(index.genes[g]) for g in index.resolve(f"chr{row['chrom']}:{row['pos']}")}
+        assert found == expected, (row['chrom'], row['pos'], found, expected)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.variant_lookup', description=__doc__.split('\n')[0])
+    parser.add_argument('--variants', type=int, default=2_000_000)
+    parser.add_argument('--genes', type=int, default=20_000)
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--batches', type=int, nargs='+', default=[1, 100])
+    parser.add_argument('--check', type=int, default=50, help='lookups checked against a brute-force scan')
+    parser.add_argument('--output', help='write JSON results here (default: stdout)')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    variants, genes = synthetic_variant_frames(args.variants, args.genes)
+    start = time.perf_counter()
+    index = VariantIndex.from_frames(variants, genes)
+    result = {'variants': args.variants, 'genes': args.genes, 'build_seconds': time.perf_counter() - start}
+    if args.check:
+        _check(index, variants, genes, args.check)
+
+    sample = variants.sample(args.queries, random_state=2)
+    rsids = sample['rsid'].tolist()
+    positions = [f'chr{chrom}:{pos}' for chrom, pos in zip(sample['chrom'], sample['pos'])]
+    result['rsid'] = [_time_per_token(index, rsids, batch) for batch in args.batches]
+    result['position'] = [_time_per_token(index, positions, batch) for batch in args.batches]
+    print(f"built in {result['build_seconds']:.1f}s", file=sys.stderr)
+    for kind in ('rsid', 'position'):
+        for row in result[kind]:
+            print(f"  {kind:<8} batch={row['batch']:<5} {row['mean_us']:8.1f} us/token "
+                  f"(p99 {row['p99_us']:.1f} us)", file=sys.stderr)
+
+    text = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            handle.write(text)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1 @@
+"""Scoring core for the SymptoGen symptom & genetic disease insight tool"""
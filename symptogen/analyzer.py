@@ -0,0 +1,134 @@
+"""Symptom and genetic analysis over compiled catalogs with result memoization
+
+Analyzer is the layer both the Streamlit app and batch jobs call.  Queries
+are canonicalized before the cache lookup: symptoms become their sorted
+interned ids and gene input becomes its sorted set of tokens, so equivalent
+inputs share one cache entry.
+"""
+import re
+from functools import cached_property
+
+from symptogen import metrics
+from symptogen.cache import ResultCache
+from symptogen.scoring import get_model
+from symptogen.vocabulary import SymptomVocabulary
+
+# Gene patterns never contain these, so reordering the tokens between them
+# cannot change which genes match
+_GENE_SEPARATORS = re.compile(r'[\s,;]+')
+
+
+def gene_query_key(genetic_input):
+    """Canonical form of a gene input: its sorted, de-duplicated upper-case tokens"""
+    return tuple(sorted({token for token in _GENE_SEPARATORS.split(genetic_input.upper()) if token}))
+
+
+class Analyzer:
+    """Memoized analysis against one symptom index and gene matcher"""
+
+    def __init__(self, symptom_index, gene_matcher, vocabulary=None, cache=None, model=None, lsh=None,
+                 variant_index=None, lsh_options=None):
+        self.symptom_index = symptom_index
+        self.gene_matcher = gene_matcher
+        self.variant_index = variant_index
+        self.model = get_model(model)
+        self._lsh = lsh
+        # MinHashLSH keyword arguments (num_perm, bands, max_bucket_size)
+        self.lsh_options = dict(lsh_options or {})
+        self.vocabulary = vocabulary if vocabulary is not None else SymptomVocabulary.from_index(symptom_index)
+        self.cache = cache if cache is not None else ResultCache()
+
+    @property
+    def version(self):
+        """Catalog version the cached results belong to"""
+        version = f'{self.symptom_index.version}:{self.gene_matcher.version}'
+        return version if self.variant_index is None else f'{version}:{self.variant_index.version}'
+
+    @property
+    def lsh(self):
+        """MinHash/LSH index for approximate search, built with ``lsh_options`` on first use"""
+        if self._lsh is None:
+            from symptogen.lsh import MinHashLSH
+
+            self._lsh = MinHashLSH(self.symptom_index, **self.lsh_options)
+        return self._lsh
+
+    def symptom_key(self, user_symptoms, k=10, approximate=False, max_bucket_size=None):
+        """Return the interned query and its cache key"""
+        with metrics.timer('normalize'):
+            symptom_ids, n_user = self.vocabulary.encode(user_symptoms)
+        mode = ('approximate', max_bucket_size) if approximate else 'symptoms'
+        return (symptom_ids, n_user), (mode, self.model.name, tuple(symptom_ids.tolist()), n_user, k)
+
+    def analyze_symptoms(self, user_symptoms, k=10, approximate=False, max_bucket_size=None):
+        """Top ``k`` disease predictions for ``user_symptoms``
+
+        With ``approximate`` only the MinHash/LSH candidates are scored, and
+        ``max_bucket_size`` overrides the index's bucket cap for this query
+        (0 for none); see symptogen.lsh.
+        """
+        version = self.version
+        (symptom_ids, n_user), key = self.symptom_key(user_symptoms, k, approximate, max_bucket_size)
+        results = self.cache.get(key, version)
+        if results is None:
+            metrics.count('cache_misses')
+            with metrics.timer('score'):
+                if approximate:
+                    results = self.lsh.top_k_ids(symptom_ids, n_user, k, self.model, max_bucket_size)
+                else:
+                    results = self.symptom_index.top_k_ids(symptom_ids, n_user, k, self.model)
+            self.cache.put(key, results, version)
+        else:
+            metrics.count('cache_hits')
+        # Results are read-only, so the cached object is handed out as is
+        return results
+
+    def analyze_symptoms_batch(self, symptom_lists, k=10):
+        """analyze_symptoms for many records; only cache misses are scored, in one vectorized pass"""
+        version = self.version
+        queries = [self.symptom_key(symptoms, k) for symptoms in symptom_lists]
+        results = [self.cache.get(key, version) for _, key in queries]
+
+        missing = [i for i, result in enumerate(results) if result is None]
+        metrics.count('cache_hits', len(results) - len(missing))
+        metrics.count('cache_misses', len(missing))
+        with metrics.timer('score'):
+            scored = self.symptom_index.top_k_batch_ids([queries[i][0] for i in missing], k, self.model)
+        for i, result in zip(missing, scored):
+            self.cache.put(queries[i][1], result, version)
+            results[i] = result
+        return results
+
+    @cached_property
+    def _variant_gene_rows(self):
+        # Variant index gene id -> gene catalog rows of that symbol
+        gene_rows = {}
+        for row, gene_id in enumerate(self.variant_index.gene_ids(self.gene_matcher.genes).tolist()):
+            if gene_id >= 0:
+                gene_rows.setdefault(gene_id, []).append(row)
+        return gene_rows
+
+    def with_variant_rows(self, rows, text):
+        """``rows`` plus the catalog rows of genes hit by the rsIDs and positions in ``text``"""
+        gene_rows = self._variant_gene_rows
+        found = set(rows)
+        for gene_id in self.variant_index.resolve(text).tolist():
+            found.update(gene_rows.get(gene_id, ()))
+        return sorted(found)
+
+    def analyze_genetic_markers(self, genetic_input):
+        """Matched genetic risk results and gene names for ``genetic_input``"""
+        version = self.version
+        with metrics.timer('normalize'):
+            tokens = gene_query_key(genetic_input)
+        rows = self.cache.get(('genes', tokens), version)
+        if rows is None:
+            metrics.count('cache_misses')
+            with metrics.timer('gene_match'):
+                rows = self.gene_matcher.match(' '.join(tokens))
+                if self.variant_index is not None:
+                    rows = self.with_variant_rows(rows, ' '.join(tokens))
+            self.cache.put(('genes', tokens), rows, version)
+        else:
+            metrics.count('cache_hits')
+        return self.gene_matcher.results(rows), self.gene_matcher.gene_names(rows)
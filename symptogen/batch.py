@@ -0,0 +1,337 @@
+"""Headless batch analysis of patient intake files
+
+Reads a CSV or Parquet file with one patient per row, scores the symptom
+lists in vectorized chunks against the compiled catalog, matches the gene
+strings and streams one result per patient to a JSON Lines or CSV file.
+
+Usage::
+
+    python -m symptogen.batch patients.csv results.jsonl --top-k 5
+    python -m symptogen.batch patients.csv results.jsonl --charts cohort.html
+    python -m symptogen.batch patients.csv results.jsonl --store results.db
+"""
+import argparse
+import csv
+import json
+import re
+import sys
+import time
+from collections import deque
+from collections.abc import Iterable, Mapping
+
+import pandas as pd
+
+from symptogen.analyzer import Analyzer
+from symptogen.charts import CohortChartData, cohort_html, risk_levels
+from symptogen.report import FORMATS as REPORT_FORMATS
+from symptogen.report import ReportCache
+from symptogen.results import as_dicts, json_default
+from symptogen.scoring import MODELS
+
+DEFAULT_CHUNK_SIZE = 10000
+
+_SYMPTOM_SEPARATORS = re.compile(r'[,;|]')
+
+# Records with the same analysis result share one rendered report
+_reports = ReportCache()
+
+
+def parse_symptoms(value):
+    """Split a symptom cell into normalized symptom names"""
+    if isinstance(value, str):
+        # Same normalization as manual input in the app
+        return [s.strip().lower().replace(' ', '_') for s in _SYMPTOM_SEPARATORS.split(value) if s.strip()]
+    # Lists, tuples and the NumPy arrays of Parquet list<string> columns
+    if isinstance(value, Iterable) and not isinstance(value, (bytes, Mapping)):
+        return list(value)
+    if pd.isna(value):
+        return []
+    raise TypeError(f'Cannot read symptoms from a {type(value).__name__} cell')
+
+
+def parse_genes(value):
+    """Return a gene cell as a string, treating missing values as empty"""
+    return value if isinstance(value, str) else ''
+
+
+def read_records(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield DataFrame chunks of at most ``chunk_size`` rows from a CSV or Parquet file or upload"""
+    if str(getattr(path, 'name', path)).endswith('.parquet'):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size, dtype=str, keep_default_na=False)
+
+
+def analyze_chunk(frame, analyzer, k=10, id_column='id', symptom_column='symptoms', gene_column='genes',
+                  report_format=None):
+    """Score one chunk of patient records with an Analyzer and return a result dict per record
+
+    Records whose canonical query is already in the analyzer's cache are not
+    rescored; the rest of the chunk is scored in one vectorized pass.  With
+    ``report_format`` each record also carries its rendered report.
+    """
+    n = len(frame)
+    ids = frame[id_column].tolist() if id_column in frame else [None] * n
+    symptom_cells = frame[symptom_column].tolist() if symptom_column in frame else [None] * n
+    gene_cells = frame[gene_column].tolist() if gene_column in frame else [None] * n
+
+    symptom_lists = [parse_symptoms(cell) for cell in symptom_cells]
+    predictions = analyzer.analyze_symptoms_batch(symptom_lists, k=k)
+
+    records = []
+    for record_id, symptoms, symptom_results, genes in zip(ids, symptom_lists, predictions, gene_cells):
+        genetic_input = parse_genes(genes)
+        genetic_results, genes_found = analyzer.analyze_genetic_markers(genetic_input)
+        record = {
+            'id': record_id,
+            'symptoms': symptoms,
+            'symptom_results': symptom_results,
+            'genes_found': genes_found,
+            'genetic_results': genetic_results
+        }
+        if report_format is not None:
+            report = _reports.get(symptom_results, genetic_results, symptoms, genetic_input, version=analyzer.version)
+            record['report'] = report.data if report_format == 'json' else report.render(report_format)
+        records.append(record)
+    return records
+
+
+class _JsonLinesWriter:
+    def __init__(self, handle):
+        self.handle = handle
+
+    def write(self, record):
+        self.handle.write(json.dumps(record, default=json_default) + '\n')
+
+
+class _CsvWriter:
+    # Nested fields are stored as JSON strings, one row per patient
+    fields = ['id', 'top_disease', 'top_confidence', 'symptom_results', 'genes_found', 'genetic_results']
+
+    def __init__(self, handle, report=False):
+        self.writer = csv.DictWriter(handle, fieldnames=self.fields + ['report'] if report else self.fields)
+        self.writer.writeheader()
+
+    def write(self, record):
+        top = record['symptom_results'][0] if record['symptom_results'] else None
+        row = {
+            'id': record['id'],
+            'top_disease': top['Disease'] if top else '',
+            'top_confidence': f"{top['Confidence']:.4f}" if top else '',
+            'symptom_results': json.dumps(as_dicts(record['symptom_results'])),
+            'genes_found': ','.join(record['genes_found']),
+            'genetic_results': json.dumps(as_dicts(record['genetic_results']))
+        }
+        if 'report' in record:
+            report = record['report']
+            row['report'] = report if isinstance(report, str) else json.dumps(report)
+        self.writer.writerow(row)
+
+
+def _open_writer(handle, output_path, report_format=None):
+    if str(output_path).endswith('.csv'):
+        return _CsvWriter(handle, report=report_format is not None)
+    return _JsonLinesWriter(handle)
+
+
+def run_batch(input_path, output_path, k=10, chunk_size=DEFAULT_CHUNK_SIZE,
+              id_column='id', symptom_column='symptoms', gene_column='genes',
+              symptom_index=None, gene_matcher=None, workers=1, model=None, report_format=None,
+              charts_path=None, variant_index=None, store_path=None, store_max_bytes=None, catalog=None):
+    """Score every record of ``input_path`` and stream the results to ``output_path``
+
+    With ``workers`` > 1 the chunks are scored by a process pool (see
+    symptogen.parallel); output order always follows the input.  ``model``
+    names a symptom scoring model (see symptogen.scoring) and
+    ``report_format`` (markdown, html or json) adds a rendered report to every
+    record.  ``charts_path`` writes an HTML page of cohort charts (see
+    symptogen.charts).  ``variant_index`` (see symptogen.variants) also
+    resolves rsIDs and positions in the gene column.  With ``store_path``,
+    records already in that result store (see symptogen.result_store) are
+    not rescored.  ``catalog`` names a compiled catalog directory (see
+    symptogen.catalog_store).  Whatever is not given comes from the
+    configuration symptogen.core reads: ``SYMPTOGEN_CATALOG``,
+    ``SYMPTOGEN_SCORING_MODEL`` and ``SYMPTOGEN_VARIANTS``.  Returns a dict
+    with the record count, elapsed seconds and throughput, plus the skipped
+    count and skip rate when a store is used.
+    """
+    analyzer = _batch_analyzer(symptom_index, gene_matcher, catalog, model, variant_index)
+    columns = (id_column, symptom_column, gene_column)
+
+    store = None
+    if store_path is not None:
+        from symptogen.result_store import DEFAULT_MAX_BYTES, ResultStore
+
+        store = ResultStore(store_path, max_bytes=store_max_bytes or DEFAULT_MAX_BYTES)
+
+    start = time.perf_counter()
+    count = 0
+    charts = CohortChartData() if charts_path else None
+    frames = read_records(input_path, chunk_size)
+    if store is None:
+        chunks = _scored_chunks(frames, analyzer, k, columns, workers, report_format)
+    else:
+        chunks = _stored_chunks(frames, store, analyzer, k, columns, report_format,
+                                lambda misses: _scored_chunks(misses, analyzer, k, columns, workers, report_format))
+    with open(output_path, 'w', newline='', encoding='utf-8') as handle:
+        writer = _open_writer(handle, output_path, report_format)
+        for records in chunks:
+            for record in records:
+                writer.write(record)
+            if charts is not None:
+                _add_chart_data(charts, records)
+            count += len(records)
+    if charts is not None:
+        with open(charts_path, 'w', encoding='utf-8') as handle:
+            handle.write(cohort_html(charts.charts()))
+    elapsed = time.perf_counter() - start
+
+    stats = {
+        'records': count,
+        'seconds': elapsed,
+        'records_per_sec': count / elapsed if elapsed > 0 else 0.0
+    }
+    if store is not None:
+        with store:
+            store.record_run(analyzer.version)
+            # Entries of earlier catalog versions can never be hit again
+            store.compact(analyzer.version)
+            stats['skipped'] = store.hits
+            stats['skip_rate'] = store.stats()['skip_rate']
+    return stats
+
+
+def _add_chart_data(charts, records):
+    tops = [record['symptom_results'][0] for record in records if len(record['symptom_results'])]
+    levels = [level for record in records for level in risk_levels(record['genetic_results'])]
+    charts.add([top['Disease'] for top in tops], [top['Confidence'] for top in tops], levels)
+
+
+def _batch_analyzer(symptom_index, gene_matcher, catalog, model, variant_index):
+    from symptogen import core
+
+    if catalog is not None:
+        from symptogen.catalog_store import load_catalog
+
+        compiled = load_catalog(catalog)
+        symptom_index, gene_matcher = compiled.symptom_index, compiled.gene_matcher
+    if symptom_index is None or gene_matcher is None:
+        default = core.load_default_analyzer()
+        symptom_index = symptom_index if symptom_index is not None else default.symptom_index
+        gene_matcher = gene_matcher if gene_matcher is not None else default.gene_matcher
+        variant_index = variant_index if variant_index is not None else default.variant_index
+    model = model if model is not None else core.default_model()
+    variant_index = variant_index if variant_index is not None else core.load_variant_index()
+    return Analyzer(symptom_index, gene_matcher, model=model, variant_index=variant_index)
+
+
+def _scored_chunks(frames, analyzer, k, columns, workers, report_format):
+    if workers is not None and workers <= 1:
+        for frame in frames:
+            yield analyze_chunk(frame, analyzer, k, *columns, report_format=report_format)
+        return
+
+    from symptogen.parallel import ParallelAnalyzer
+
+    with ParallelAnalyzer(analyzer.symptom_index, analyzer.gene_matcher, workers, k, *columns, model=analyzer.model,
+                          report_format=report_format, variant_index=analyzer.variant_index) as pool:
+        yield from pool.map_frames(frames)
+
+
+def _stored_chunks(frames, store, analyzer, k, columns, report_format, score):
+    """Each chunk's records, passing only those missing from ``store`` to ``score`` and storing what it returns"""
+    from symptogen.result_store import record_key
+
+    id_column, symptom_column, gene_column = columns
+    version = analyzer.version
+    # Looked-up chunks waiting for their misses to come back from ``score``
+    pending = deque()
+
+    def misses():
+        for frame in frames:
+            n = len(frame)
+            symptom_lists = [parse_symptoms(cell) for cell in frame[symptom_column]] if symptom_column in frame \
+                else [[]] * n
+            genetic_inputs = [parse_genes(cell) for cell in frame[gene_column]] if gene_column in frame else [''] * n
+            keys = [record_key(version, symptoms, genetic_input, analyzer.model.name, k)
+                    for symptoms, genetic_input in zip(symptom_lists, genetic_inputs)]
+            found = store.get_many(keys)
+            missing = [i for i, key in enumerate(keys) if key not in found]
+            store.count(n - len(missing), len(missing))
+            pending.append((frame, symptom_lists, genetic_inputs, keys, found, missing))
+            yield frame.iloc[missing]
+
+    def stored(record_id, symptoms, genetic_input, payload):
+        record = {'id': record_id, 'symptoms': symptoms, **payload}
+        if report_format is not None:
+            report = _reports.get(payload['symptom_results'], payload['genetic_results'], symptoms, genetic_input,
+                                  version=version)
+            record['report'] = report.data if report_format == 'json' else report.render(report_format)
+        return record
+
+    for scored in score(misses()):
+        frame, symptom_lists, genetic_inputs, keys, found, missing = pending.popleft()
+        store.put_many([(keys[i], record) for i, record in zip(missing, scored)], version)
+        scored = dict(zip(missing, scored))
+        ids = frame[id_column].tolist() if id_column in frame else [None] * len(frame)
+        yield [scored[i] if i in scored else stored(ids[i], symptom_lists[i], genetic_inputs[i], found[key])
+               for i, key in enumerate(keys)]
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m symptogen.batch',
+        description='Score a CSV/Parquet file of patient records against the SymptoGen catalog.'
+    )
+    parser.add_argument('input', help='CSV or .parquet file with one patient per row')
+    parser.add_argument('output', help='output file; .csv writes CSV, anything else JSON Lines')
+    parser.add_argument('--top-k', type=int, default=10, help='disease predictions kept per record')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='records scored per vectorized chunk')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='worker processes; 0 uses every core (default: 1, in-process)')
+    parser.add_argument('--id-column', default='id')
+    parser.add_argument('--symptom-column', default='symptoms', help='comma/semicolon separated symptoms')
+    parser.add_argument('--gene-column', default='genes')
+    parser.add_argument('--catalog', metavar='DIR',
+                        help='compiled catalog (python -m symptogen.catalog_store build); '
+                             'default: $SYMPTOGEN_CATALOG, else the built-in catalog')
+    parser.add_argument('--model', choices=sorted(MODELS),
+                        help='symptom scoring model (default: $SYMPTOGEN_SCORING_MODEL, else blend)')
+    parser.add_argument('--report', choices=REPORT_FORMATS, help='add a rendered report to every record')
+    parser.add_argument('--charts', metavar='HTML', help='also write cohort charts to this HTML file')
+    parser.add_argument('--store', metavar='DB',
+                        help='SQLite result store; records already in it are not rescored (see symptogen.result_store)')
+    parser.add_argument('--store-max-mb', type=float, help='size cap of the result store (default: 512)')
+    parser.add_argument('--variants', metavar='DIR',
+                        help='compiled variant index (python -m symptogen.variants build) for rsIDs and positions '
+                             '(default: $SYMPTOGEN_VARIANTS)')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    variant_index = None
+    if args.variants:
+        from symptogen.variants import VariantIndex
+
+        variant_index = VariantIndex.load(args.variants)
+    stats = run_batch(
+        args.input, args.output, k=args.top_k, chunk_size=args.chunk_size,
+        id_column=args.id_column, symptom_column=args.symptom_column, gene_column=args.gene_column,
+        workers=args.workers or None, model=args.model, report_format=args.report, charts_path=args.charts,
+        variant_index=variant_index, store_path=args.store, catalog=args.catalog,
+        store_max_bytes=int(args.store_max_mb * 1024 * 1024) if args.store_max_mb else None
+    )
+    print(f"Scored {stats['records']} records in {stats['seconds']:.2f}s "
+          f"({stats['records_per_sec']:.0f} records/sec)", file=sys.stderr)
+    if 'skipped' in stats:
+        print(f"Served {stats['skipped']} records from the result store "
+              f"(skip rate {stats['skip_rate']:.1%})", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
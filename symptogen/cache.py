@@ -0,0 +1,93 @@
+"""Bounded memoization of analysis results
+
+Entries are evicted least-recently-used once ``maxsize`` is reached and,
+optionally, after ``ttl`` seconds.  Every lookup carries the catalog version
+the result was computed against; a different version empties the cache so
+stale results are never served after a catalog update.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_MAXSIZE = 4096
+
+_MISSING = object()
+
+
+class ResultCache:
+    """Thread-safe LRU/TTL cache with hit/miss counters and version invalidation"""
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, ttl=None, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _check_version(self, version):
+        if version != self.version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self.version = version
+
+    def get(self, key, version=None, default=None):
+        """Return the cached value for ``key`` or ``default``, counting a hit or miss"""
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expires = entry
+                if expires is None or expires > self.clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value, version=None):
+        """Store ``value`` under ``key``, evicting the least recently used entries"""
+        with self._lock:
+            self._check_version(version)
+            expires = self.clock() + self.ttl if self.ttl is not None else None
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute, version=None):
+        """Return the cached value for ``key``, calling ``compute()`` on a miss"""
+        value = self.get(key, version, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.put(key, value, version)
+        return value
+
+    def clear(self):
+        """Drop every entry, keeping the counters"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return the cache counters as a dict"""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'version': self.version
+        }
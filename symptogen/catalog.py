@@ -0,0 +1,90 @@
+"""Built-in symptom and genetic disease catalogs
+
+These are plain functions with no Streamlit dependency so the catalogs can
+be loaded by headless entry points; the app wraps them in its own caches.
+"""
+import pandas as pd
+
+from symptogen.engine import SymptomIndex
+from symptogen.genetics import GeneMatcher
+
+# Sample data - Symptom to Disease Mapping
+def symptom_disease_frame():
+    """Return the symptom to disease catalog as a DataFrame"""
+    symptom_disease_data = {
+        'Disease': [
+            'COVID-19', 'Influenza', 'Dengue Fever', 'Malaria', 'Common Cold',
+            'Pneumonia', 'Bronchitis', 'Gastroenteritis', 'Migraine', 'Hypertension',
+            'Diabetes Type 2', 'Asthma', 'Allergic Rhinitis', 'Food Poisoning', 'Anxiety Disorder'
+        ],
+        'Primary_Symptoms': [
+            ['fever', 'cough', 'fatigue', 'loss_of_taste'],
+            ['fever', 'cough', 'muscle_aches', 'fatigue'],
+            ['fever', 'headache', 'muscle_pain', 'rash'],
+            ['fever', 'chills', 'headache', 'nausea'],
+            ['runny_nose', 'sneezing', 'sore_throat', 'mild_cough'],
+            ['fever', 'cough', 'chest_pain', 'difficulty_breathing'],
+            ['cough', 'chest_pain', 'fatigue', 'mild_fever'],
+            ['nausea', 'vomiting', 'diarrhea', 'abdominal_pain'],
+            ['headache', 'nausea', 'sensitivity_to_light', 'visual_disturbances'],
+            ['headache', 'dizziness', 'chest_pain', 'shortness_of_breath'],
+            ['frequent_urination', 'excessive_thirst', 'fatigue', 'blurred_vision'],
+            ['difficulty_breathing', 'wheezing', 'chest_tightness', 'cough'],
+            ['runny_nose', 'sneezing', 'itchy_eyes', 'nasal_congestion'],
+            ['nausea', 'vomiting', 'diarrhea', 'abdominal_cramps'],
+            ['restlessness', 'fatigue', 'difficulty_concentrating', 'muscle_tension']
+        ],
+        'Severity': ['High', 'Medium', 'High', 'High', 'Low', 'High', 'Medium', 'Medium', 'Medium', 'High', 'High', 'Medium', 'Low', 'Medium', 'Medium']
+    }
+    
+    return pd.DataFrame(symptom_disease_data)
+
+# Sample genetic data - Gene to Disease Mapping
+def genetic_disease_frame():
+    """Return the gene to disease catalog as a DataFrame"""
+    genetic_data = {
+        'Gene': ['BRCA1', 'BRCA2', 'APOE', 'CFTR', 'HTT', 'LDLR', 'HFE', 'F5', 'MTHFR', 'CYP2D6'],
+        'Associated_Disease': [
+            'Breast Cancer', 'Breast Cancer', 'Alzheimer Disease', 'Cystic Fibrosis',
+            'Huntington Disease', 'Familial Hypercholesterolemia', 'Hemochromatosis',
+            'Factor V Leiden Thrombophilia', 'Hyperhomocysteinemia', 'Drug Metabolism Variants'
+        ],
+        'Risk_Level': ['High', 'High', 'Medium', 'High', 'High', 'Medium', 'Medium', 'Medium', 'Low', 'Low'],
+        'Prevalence': ['1 in 400', '1 in 800', '1 in 4', '1 in 2500', '1 in 10000', '1 in 500', '1 in 200', '1 in 20', '1 in 10', '1 in 4'],
+        'Description': [
+            'Increased risk of breast and ovarian cancer',
+            'Increased risk of breast and ovarian cancer',
+            'Associated with late-onset Alzheimer disease',
+            'Causes cystic fibrosis when both copies are mutated',
+            'Causes Huntington disease (dominant inheritance)',
+            'Causes high cholesterol levels',
+            'Causes iron overload in the body',
+            'Increases blood clotting risk',
+            'Affects folate metabolism',
+            'Affects drug metabolism, particularly antidepressants'
+        ]
+    }
+    
+    return pd.DataFrame(genetic_data)
+
+# Available symptoms list
+AVAILABLE_SYMPTOMS = [
+    'fever', 'cough', 'fatigue', 'headache', 'muscle_aches', 'sore_throat',
+    'runny_nose', 'sneezing', 'nausea', 'vomiting', 'diarrhea', 'abdominal_pain',
+    'chest_pain', 'difficulty_breathing', 'dizziness', 'rash', 'joint_pain',
+    'loss_of_taste', 'loss_of_smell', 'chills', 'sweating', 'blurred_vision',
+    'frequent_urination', 'excessive_thirst', 'weight_loss', 'weight_gain',
+    'restlessness', 'anxiety', 'depression', 'insomnia', 'muscle_weakness',
+    'numbness', 'tingling', 'sensitivity_to_light', 'visual_disturbances',
+    'wheezing', 'chest_tightness', 'itchy_eyes', 'nasal_congestion',
+    'abdominal_cramps', 'muscle_tension', 'difficulty_concentrating',
+    'shortness_of_breath', 'mild_cough', 'mild_fever'
+]
+
+def compile_symptom_index():
+    """Compile the built-in symptom catalog into a SymptomIndex"""
+    return SymptomIndex.from_frame(symptom_disease_frame(), vocabulary=AVAILABLE_SYMPTOMS)
+
+def compile_gene_matcher():
+    """Compile the built-in genetic catalog into a GeneMatcher"""
+    return GeneMatcher.from_frame(genetic_disease_frame())
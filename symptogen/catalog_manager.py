@@ -0,0 +1,174 @@
+"""Hot-reloadable catalogs with atomic, versioned swaps
+
+CatalogManager watches a data directory and, when its files change, builds a
+new Analyzer in a background thread and swaps it in with a single reference
+assignment.  Queries already running keep the Analyzer they started with;
+new queries see the new one.  Nothing blocks on the build.
+
+The data directory is either a compiled catalog (see symptogen.catalog_store;
+``catalog.json`` is written last, so its change marks a finished write) or a
+source directory holding ``symptoms.csv`` and/or ``genes.csv``, with the
+built-in catalogs standing in for a missing file.  Compiled arrays are
+memory-mapped, so publish a new compiled catalog into a fresh directory and
+repoint a symlink at it rather than overwriting the files in place.
+
+Every swap bumps ``generation``; the catalog's content hash stays available
+as Analyzer.version.  Each generation gets a result cache of its own, sized
+like the previous one, so queries still running on the old catalog do not
+empty the new one (ResultCache clears itself on any version change) and the
+old entries are freed together with the old Analyzer.
+
+Usage::
+
+    manager = CatalogManager('./data', on_swap=set_analyzer).start()
+"""
+import logging
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+from symptogen import metrics
+from symptogen.analyzer import Analyzer
+from symptogen.cache import ResultCache
+from symptogen.catalog import AVAILABLE_SYMPTOMS, genetic_disease_frame, symptom_disease_frame
+from symptogen.catalog_store import load_catalog, read_symptom_csv
+from symptogen.engine import SymptomIndex
+from symptogen.genetics import GeneMatcher
+
+DEFAULT_POLL_INTERVAL = 2.0
+
+SOURCE_FILES = ('catalog.json', 'symptoms.csv', 'genes.csv')
+
+logger = logging.getLogger(__name__)
+
+
+def directory_signature(directory):
+    """(name, mtime, size) of the watched files present in ``directory``"""
+    signature = []
+    for name in SOURCE_FILES:
+        try:
+            stat = (Path(directory) / name).stat()
+        except FileNotFoundError:
+            continue
+        signature.append((name, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+def build_analyzer(directory, model=None, cache=None, variant_index=None):
+    """Compile the catalog in ``directory`` into a fresh Analyzer"""
+    with metrics.timer('catalog_load'):
+        return _build_analyzer(Path(directory), model, cache, variant_index)
+
+
+def _build_analyzer(directory, model, cache, variant_index):
+    if (directory / 'catalog.json').exists():
+        catalog = load_catalog(directory)
+        return Analyzer(catalog.symptom_index, catalog.gene_matcher, model=model, cache=cache,
+                        variant_index=variant_index)
+
+    symptoms_csv = directory / 'symptoms.csv'
+    genes_csv = directory / 'genes.csv'
+    symptom_frame = read_symptom_csv(symptoms_csv) if symptoms_csv.exists() else symptom_disease_frame()
+    genetic_frame = pd.read_csv(genes_csv, dtype=str, keep_default_na=False) if genes_csv.exists() else genetic_disease_frame()
+    symptom_index = SymptomIndex.from_frame(symptom_frame, vocabulary=AVAILABLE_SYMPTOMS)
+    return Analyzer(symptom_index, GeneMatcher.from_frame(genetic_frame), model=model, cache=cache,
+                    variant_index=variant_index)
+
+
+class CatalogManager:
+    """Watches a data directory and swaps in a rebuilt Analyzer when it changes"""
+
+    def __init__(self, directory, poll_interval=DEFAULT_POLL_INTERVAL, model=None, on_swap=None, variant_index=None):
+        self.directory = Path(directory)
+        self.poll_interval = poll_interval
+        self.model = model
+        # Not watched; it is shared by every catalog generation
+        self.variant_index = variant_index
+        self.generation = 0
+        self.failures = 0
+        self.last_error = None
+        self._on_swap = [on_swap] if on_swap is not None else []
+        self._analyzer = None
+        self._signature = None
+        self._swap_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def analyzer(self):
+        """The current Analyzer, loading the catalog on first use"""
+        if self._analyzer is None:
+            self.reload()
+        return self._analyzer
+
+    @property
+    def version(self):
+        return self.analyzer.version
+
+    def subscribe(self, callback):
+        """Call ``callback(analyzer)`` after every swap"""
+        self._on_swap.append(callback)
+
+    def reload(self, force=False):
+        """Rebuild and swap if the directory changed; returns True if a new catalog was swapped in
+
+        Readers never take the lock, so queries are not blocked by a build;
+        it only serializes concurrent reloads.
+        """
+        with self._swap_lock:
+            signature = directory_signature(self.directory)
+            if not force and self._analyzer is not None and signature == self._signature:
+                return False
+            current = self._analyzer
+            # Recorded before building so a broken file is retried only once it changes again
+            self._signature = signature
+            cache = ResultCache(current.cache.maxsize, current.cache.ttl) if current is not None else None
+            analyzer = build_analyzer(self.directory, self.model, cache=cache, variant_index=self.variant_index)
+            if current is not None and analyzer.version == current.version:
+                # Touched but unchanged; keep the warm Analyzer
+                return False
+            self._analyzer = analyzer
+            self.generation += 1
+        logger.info("Catalog generation %d (%s) loaded from %s", self.generation, analyzer.version, self.directory)
+        for callback in self._on_swap:
+            callback(analyzer)
+        return True
+
+    def poll(self):
+        """One watch step: reload if needed, keeping the old catalog on failure"""
+        try:
+            return self.reload()
+        except Exception as exc:
+            self.failures += 1
+            self.last_error = f'{type(exc).__name__}: {exc}'
+            logger.exception("Catalog reload from %s failed; keeping generation %d", self.directory, self.generation)
+            return False
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            self.poll()
+
+    def start(self):
+        """Load the catalog now and watch for changes in a daemon thread"""
+        if self._thread is None:
+            self.analyzer
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name='symptogen-catalog-watch', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def stats(self):
+        return {
+            'directory': str(self.directory),
+            'generation': self.generation,
+            'version': self._analyzer.version if self._analyzer is not None else None,
+            'failures': self.failures,
+            'last_error': self.last_error
+        }
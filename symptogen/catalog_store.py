@@ -0,0 +1,141 @@
+"""Compact on-disk catalog format with memory-mapped cold start
+
+A compiled catalog is a directory::
+
+    catalog.json        format version, content hash and row counts
+    symptoms/*.npy      SymptomIndex arrays (symptoms interned to integer ids,
+                        CSR incidence matrix and inverted index)
+    genes/*.npy         one string array per genetic catalog column
+
+Opening it only memory-maps the arrays, so start-up cost does not depend on
+the catalog size.  The DataFrame views used by the app are rebuilt lazily,
+only when something asks for them.
+
+Usage::
+
+    python -m symptogen.catalog_store build ./catalog
+    python -m symptogen.catalog_store build ./catalog --symptoms diseases.csv --genes genes.csv
+"""
+import argparse
+import json
+import sys
+from functools import cached_property
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from symptogen.catalog import AVAILABLE_SYMPTOMS, genetic_disease_frame, symptom_disease_frame
+from symptogen.engine import SymptomIndex, array_fingerprint
+from symptogen.genetics import GeneMatcher
+
+FORMAT_VERSION = 1
+
+GENE_COLUMNS = ('Gene', 'Associated_Disease', 'Risk_Level', 'Prevalence', 'Description')
+
+
+def save_catalog(directory, symptom_frame, genetic_frame, vocabulary=()):
+    """Compile both catalogs and write them to ``directory``; returns the catalog version"""
+    directory = Path(directory)
+    index = SymptomIndex.from_frame(symptom_frame, vocabulary=vocabulary)
+    index.save(directory / 'symptoms')
+
+    gene_dir = directory / 'genes'
+    gene_dir.mkdir(parents=True, exist_ok=True)
+    gene_arrays = [np.array(genetic_frame[column].astype(str).tolist(), dtype=str) for column in GENE_COLUMNS]
+    for column, array in zip(GENE_COLUMNS, gene_arrays):
+        np.save(gene_dir / f'{column}.npy', array, allow_pickle=False)
+
+    symptom_arrays = [
+        np.array(index.diseases, dtype=str), np.array(index.severities, dtype=str),
+        np.array(index.vocabulary, dtype=str), index.indptr, index.indices
+    ]
+    meta = {
+        'format': FORMAT_VERSION,
+        'version': array_fingerprint(symptom_arrays + gene_arrays),
+        'diseases': len(index),
+        'symptoms': len(index.vocabulary),
+        'genes': len(genetic_frame)
+    }
+    (directory / 'catalog.json').write_text(json.dumps(meta, indent=2))
+    return meta['version']
+
+
+class CompiledCatalog:
+    """A compiled catalog directory opened with memory-mapped arrays"""
+
+    def __init__(self, directory, mmap_mode='r'):
+        self.directory = Path(directory)
+        self.meta = json.loads((self.directory / 'catalog.json').read_text())
+        if self.meta.get('format') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported catalog format {self.meta.get('format')!r} in {self.directory}")
+        self.symptom_index = SymptomIndex.load(self.directory / 'symptoms', mmap_mode=mmap_mode)
+        # The stored content hash stands in for hashing the arrays again
+        self.symptom_index.version = self.version
+        self._gene_columns = {
+            column: np.load(self.directory / 'genes' / f'{column}.npy', mmap_mode=mmap_mode, allow_pickle=False)
+            for column in GENE_COLUMNS
+        }
+
+    @property
+    def version(self):
+        return self.meta['version']
+
+    @cached_property
+    def symptom_frame(self):
+        """DataFrame view shaped like load_symptom_disease_data(), built on first access"""
+        index = self.symptom_index
+        return pd.DataFrame({
+            'Disease': index.diseases.tolist(),
+            'Primary_Symptoms': [index.disease_symptoms(row) for row in range(len(index))],
+            'Severity': index.severities.tolist()
+        })
+
+    @cached_property
+    def genetic_frame(self):
+        """DataFrame view shaped like load_genetic_disease_data(), built on first access"""
+        return pd.DataFrame({column: values.tolist() for column, values in self._gene_columns.items()})
+
+    @cached_property
+    def gene_matcher(self):
+        matcher = GeneMatcher(*(self._gene_columns[column].tolist() for column in GENE_COLUMNS))
+        matcher.version = self.version
+        return matcher
+
+
+def load_catalog(directory, mmap_mode='r'):
+    """Open a catalog written by save_catalog()"""
+    return CompiledCatalog(directory, mmap_mode=mmap_mode)
+
+
+def read_symptom_csv(path):
+    """Read a Disease/Primary_Symptoms/Severity CSV; symptoms are ';' or ',' separated"""
+    frame = pd.read_csv(path, dtype=str, keep_default_na=False)
+    frame['Primary_Symptoms'] = [
+        [s.strip() for s in cell.replace(';', ',').split(',') if s.strip()] for cell in frame['Primary_Symptoms']
+    ]
+    return frame
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m symptogen.catalog_store',
+                                     description='Compile SymptoGen catalogs to the on-disk format.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help='compile a catalog directory')
+    build.add_argument('directory')
+    build.add_argument('--symptoms', help='Disease/Primary_Symptoms/Severity CSV (default: built-in catalog)')
+    build.add_argument('--genes', help='genetic catalog CSV (default: built-in catalog)')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    symptom_frame = read_symptom_csv(args.symptoms) if args.symptoms else symptom_disease_frame()
+    genetic_frame = pd.read_csv(args.genes, dtype=str, keep_default_na=False) if args.genes else genetic_disease_frame()
+    version = save_catalog(args.directory, symptom_frame, genetic_frame, vocabulary=AVAILABLE_SYMPTOMS)
+    print(f"Wrote catalog {version} to {args.directory}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
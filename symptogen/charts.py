@@ -0,0 +1,402 @@
+"""Pre-aggregated, cached figures for the results tabs and batch cohorts
+
+Chart data is aggregated with vectorized group-bys before any figure is
+built, and each figure's JSON is cached under a key derived from the
+aggregated data, so a rerun over the same result (or any session showing
+the same result) skips both the aggregation of Python lists and the
+comparatively slow plotly express call.  Figures are handed out as dicts,
+which st.plotly_chart accepts directly.
+
+Cohort charts stay responsive over thousands of patients: counts and
+histograms are computed server-side, and per-patient scatter traces switch
+to WebGL above WEBGL_THRESHOLD points and are downsampled (keeping each
+bucket's extremes) above MAX_POINTS.  CohortChartData accumulates the same
+data chunk by chunk in constant memory, for cohorts streamed from a file.
+"""
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+
+from symptogen import metrics
+from symptogen.cache import ResultCache
+from symptogen.results import GeneticResults, SymptomResults
+
+TOP_PREDICTIONS = 8
+TOP_COHORT_DISEASES = 20
+
+RISK_LEVELS = ('High', 'Medium', 'Low')
+RISK_COLORS = {'High': '#ff4444', 'Medium': '#ffaa00', 'Low': '#44ff44'}
+
+WEBGL_THRESHOLD = 5000
+MAX_POINTS = 10000
+HISTOGRAM_BINS = 20
+
+
+# Aggregation
+
+def prediction_frame(symptom_results, top=TOP_PREDICTIONS):
+    """Disease and Confidence columns of the ``top`` predictions"""
+    if isinstance(symptom_results, SymptomResults):
+        head = symptom_results[:top]
+        return pd.DataFrame({'Disease': head.diseases, 'Confidence': head.scores})
+    head = list(symptom_results or [])[:top]
+    return pd.DataFrame({'Disease': [r['Disease'] for r in head], 'Confidence': [float(r['Confidence']) for r in head]})
+
+
+def risk_levels(genetic_results):
+    """Risk level of every genetic result"""
+    if isinstance(genetic_results, GeneticResults) and hasattr(genetic_results.catalog, 'risk_levels'):
+        levels = genetic_results.catalog.risk_levels
+        return [levels[row] for row in genetic_results.rows]
+    return [r['Risk_Level'] for r in genetic_results or []]
+
+
+def risk_distribution(levels):
+    """Count per risk level, in first-seen order"""
+    counts = pd.Series(np.asarray(levels, dtype=object), dtype=object).value_counts(sort=False)
+    return pd.DataFrame({'Risk_Level': counts.index.astype(str), 'Count': counts.to_numpy(dtype=np.int64)})
+
+
+def prediction_frequency(top_diseases, top_confidences, top=TOP_COHORT_DISEASES):
+    """How often each disease is a patient's top prediction, with its mean confidence"""
+    frame = pd.DataFrame({'Disease': top_diseases, 'Confidence': np.asarray(top_confidences, dtype=np.float64)})
+    grouped = frame.groupby('Disease', sort=False)['Confidence'].agg(['size', 'mean'])
+    grouped = grouped.rename(columns={'size': 'Patients', 'mean': 'Mean_Confidence'})
+    grouped = grouped.sort_values('Patients', ascending=False, kind='stable').head(top)
+    return grouped.reset_index()
+
+
+def confidence_histogram(confidences, bins=HISTOGRAM_BINS):
+    """Patient counts per confidence bin over 0-100%"""
+    counts, edges = np.histogram(np.asarray(confidences, dtype=np.float64), bins=bins, range=(0, 100))
+    return pd.DataFrame({'Start': edges[:-1], 'End': edges[1:], 'Patients': counts})
+
+
+def downsample(y, max_points=MAX_POINTS):
+    """Indices of at most ``max_points`` of ``y`` that keep each bucket's minimum and maximum"""
+    y = np.asarray(y)
+    if len(y) <= max_points:
+        return np.arange(len(y))
+    buckets = max_points // 2
+    edges = np.linspace(0, len(y), buckets + 1).astype(np.int64)
+    bucket_of = np.repeat(np.arange(buckets), np.diff(edges))
+    order = np.lexsort((y, bucket_of))
+    first = order[edges[:-1]]
+    last = order[edges[1:] - 1]
+    return np.unique(np.concatenate([first, last]))
+
+
+def data_key(*parts):
+    """Content hash of the aggregated data a figure is drawn from"""
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, pd.DataFrame):
+            digest.update(pd.util.hash_pandas_object(part, index=False).to_numpy().tobytes())
+            digest.update(','.join(map(str, part.columns)).encode())
+        else:
+            array = np.ascontiguousarray(np.asarray(part))
+            digest.update(array.dtype.str.encode())
+            digest.update(array.tobytes() if array.dtype != object else repr(array.tolist()).encode())
+    return digest.hexdigest()[:16]
+
+
+# Figures
+
+def _confidence_bar(frame):
+    import plotly.express as px
+
+    fig = px.bar(
+        x=frame['Confidence'],
+        y=frame['Disease'],
+        orientation='h',
+        title="Disease Prediction Confidence Scores",
+        labels={'x': 'Confidence (%)', 'y': 'Disease'},
+        color=frame['Confidence'],
+        color_continuous_scale='Viridis'
+    )
+    fig.update_layout(height=400)
+    return fig
+
+
+def _risk_pie(frame):
+    import plotly.express as px
+
+    return px.pie(
+        frame,
+        values='Count',
+        names='Risk_Level',
+        color='Risk_Level',
+        title="Genetic Risk Level Distribution",
+        color_discrete_map=RISK_COLORS
+    )
+
+
+def _frequency_bar(frame):
+    import plotly.express as px
+
+    fig = px.bar(
+        frame,
+        x='Patients',
+        y='Disease',
+        orientation='h',
+        title="Top Prediction Frequency Across the Cohort",
+        color='Mean_Confidence',
+        color_continuous_scale='Viridis',
+        labels={'Mean_Confidence': 'Mean confidence (%)'}
+    )
+    fig.update_layout(height=max(400, 22 * len(frame)), yaxis={'autorange': 'reversed'})
+    return fig
+
+
+def _histogram_bar(frame):
+    import plotly.graph_objects as go
+
+    fig = go.Figure(go.Bar(x=(frame['Start'] + frame['End']) / 2, y=frame['Patients'],
+                           width=frame['End'] - frame['Start'], marker_color='#667eea'))
+    fig.update_layout(title="Top Prediction Confidence Across the Cohort",
+                      xaxis_title='Confidence (%)', yaxis_title='Patients', bargap=0.05)
+    return fig
+
+
+def _confidence_scatter(patients, confidences, total):
+    import plotly.graph_objects as go
+
+    trace = go.Scattergl if total > WEBGL_THRESHOLD else go.Scatter
+    fig = go.Figure(trace(x=patients, y=confidences, mode='markers', marker={'size': 4, 'opacity': 0.6}))
+    title = "Top Prediction Confidence per Patient"
+    if len(patients) < total:
+        title += f" ({len(patients):,} of {total:,} patients shown)"
+    fig.update_layout(title=title, xaxis_title='Patient', yaxis_title='Confidence (%)')
+    return fig
+
+
+def _cooccurrence_heatmap(matrix):
+    import plotly.express as px
+
+    fig = px.imshow(matrix, title="Symptom Co-occurrence (patients)", color_continuous_scale='Viridis',
+                    labels={'color': 'Patients'})
+    fig.update_layout(height=max(400, 28 * len(matrix)))
+    return fig
+
+
+class FigureCache:
+    """Figure JSON memoized per chart and aggregated data"""
+
+    def __init__(self, maxsize=256):
+        self.cache = ResultCache(maxsize=maxsize)
+
+    def figure(self, name, key, build):
+        """The figure ``name`` for data ``key`` as a dict, calling ``build()`` on a miss"""
+        def render():
+            with metrics.timer('chart_build'):
+                return build().to_json()
+
+        return json.loads(self.cache.get_or_compute((name, key), render))
+
+    def stats(self):
+        return self.cache.stats()
+
+
+_figures = FigureCache()
+
+
+def prediction_chart(symptom_results, top=TOP_PREDICTIONS, cache=None):
+    """Horizontal bar chart of the top predictions' confidence"""
+    frame = prediction_frame(symptom_results, top)
+    return (cache or _figures).figure('predictions', data_key(frame), lambda: _confidence_bar(frame))
+
+
+def risk_chart(genetic_results, cache=None):
+    """Pie chart of the genetic results' risk levels"""
+    frame = risk_distribution(risk_levels(genetic_results))
+    return (cache or _figures).figure('risks', data_key(frame), lambda: _risk_pie(frame))
+
+
+class CohortChartData:
+    """The data behind cohort_charts, accumulated chunk by chunk in constant memory
+
+    Keeps the top-prediction count and confidence sum per disease, a
+    confidence histogram, a count per risk level and at most ``max_points``
+    per-patient confidences.  Up to ``max_points`` patients every confidence
+    is kept; beyond that patients are grouped into equal buckets of
+    consecutive patients, each kept by its minimum and maximum, and
+    neighbouring buckets are merged whenever the buckets run out.
+    """
+
+    def __init__(self, max_points=MAX_POINTS, bins=HISTOGRAM_BINS):
+        self.patients = 0
+        self.top_counts = {}
+        self.top_confidence = {}
+        self.histogram = np.zeros(bins, dtype=np.int64)
+        self.risk_counts = {}
+        self.max_points = max_points
+        # Complete buckets of ``bucket_size`` patients: (index, confidence) of their minimum and maximum
+        self.bucket_size = 1
+        self._buckets = 0
+        self._index = np.empty((max_points, 2), dtype=np.int64)
+        self._value = np.empty((max_points, 2))
+        # Patients so far in the incomplete last bucket, whose extremes are kept as a one-row bucket
+        self._fill = 0
+        self._last_index = np.empty(2, dtype=np.int64)
+        self._last_value = np.empty(2)
+
+    def add(self, top_diseases, top_confidences, levels=()):
+        """Count one chunk: each patient's top disease and confidence, and all risk levels"""
+        top_confidences = np.asarray(top_confidences, dtype=np.float64)
+        for disease, confidence in zip(top_diseases, top_confidences.tolist()):
+            self.top_counts[disease] = self.top_counts.get(disease, 0) + 1
+            self.top_confidence[disease] = self.top_confidence.get(disease, 0.0) + confidence
+        self.histogram += np.histogram(top_confidences, bins=len(self.histogram), range=(0, 100))[0]
+        for level in levels:
+            self.risk_counts[level] = self.risk_counts.get(level, 0) + 1
+        self._sample(top_confidences)
+        self.patients += len(top_confidences)
+        return self
+
+    def _capacity(self):
+        # A one-patient bucket is a single point, larger ones are two
+        return self.max_points if self.bucket_size == 1 else self.max_points // 2
+
+    def _sample(self, values):
+        start = 0
+        while start < len(values):
+            size = self.bucket_size
+            if self._fill:
+                take = min(size - self._fill, len(values) - start)
+                self._extend_last(values[start:start + take], self.patients + start)
+                start += take
+                if self._fill == size:
+                    self._push(self._last_index[None], self._last_value[None])
+                    self._fill = 0
+                continue
+            room = self._capacity() - self._buckets
+            if not room:
+                self._halve()
+                continue
+            full = min((len(values) - start) // size, room)
+            if not full:
+                self._extend_last(values[start:], self.patients + start)
+                break
+            block = values[start:start + full * size].reshape(full, size)
+            rows = np.arange(full)
+            first = self.patients + start + rows * size
+            low, high = block.argmin(axis=1), block.argmax(axis=1)
+            self._push(np.column_stack([first + low, first + high]),
+                       np.column_stack([block[rows, low], block[rows, high]]))
+            start += full * size
+
+    def _extend_last(self, values, first):
+        low, high = int(values.argmin()), int(values.argmax())
+        if not self._fill or values[low] < self._last_value[0]:
+            self._last_index[0], self._last_value[0] = first + low, values[low]
+        if not self._fill or values[high] >= self._last_value[1]:
+            self._last_index[1], self._last_value[1] = first + high, values[high]
+        self._fill += len(values)
+
+    def _push(self, index, value):
+        end = self._buckets + len(index)
+        self._index[self._buckets:end] = index
+        self._value[self._buckets:end] = value
+        self._buckets = end
+
+    def _halve(self):
+        # Merge neighbouring buckets pairwise; an odd last one continues as the incomplete bucket
+        pairs = self._buckets // 2
+        index = self._index[:2 * pairs].reshape(pairs, 2, 2)
+        value = self._value[:2 * pairs].reshape(pairs, 2, 2)
+        rows = np.arange(pairs)
+        low = value[:, :, 0].argmin(axis=1)
+        high = value[:, :, 1].argmax(axis=1)
+        merged_index = np.column_stack([index[rows, low, 0], index[rows, high, 1]])
+        merged_value = np.column_stack([value[rows, low, 0], value[rows, high, 1]])
+        if self._buckets % 2:
+            self._last_index[:] = self._index[self._buckets - 1]
+            self._last_value[:] = self._value[self._buckets - 1]
+            self._fill = self.bucket_size
+        self._buckets = 0
+        self._push(merged_index, merged_value)
+        self.bucket_size *= 2
+
+    def sample(self):
+        """Patient numbers and confidences of the kept points, in patient order"""
+        index = [self._index[:self._buckets].ravel()]
+        value = [self._value[:self._buckets].ravel()]
+        if self._fill:
+            index.append(self._last_index)
+            value.append(self._last_value)
+        index, first = np.unique(np.concatenate(index), return_index=True)
+        return index, np.concatenate(value)[first]
+
+    def prediction_frequency(self, top=TOP_COHORT_DISEASES):
+        """Like prediction_frequency() over the patients added so far"""
+        frame = pd.DataFrame({'Disease': list(self.top_counts),
+                              'Patients': np.fromiter(self.top_counts.values(), dtype=np.int64,
+                                                      count=len(self.top_counts))})
+        frame['Mean_Confidence'] = np.fromiter(self.top_confidence.values(), dtype=np.float64,
+                                               count=len(frame)) / frame['Patients']
+        return frame.sort_values('Patients', ascending=False, kind='stable').head(top).reset_index(drop=True)
+
+    def confidence_histogram(self):
+        """Like confidence_histogram() over the patients added so far"""
+        edges = np.linspace(0, 100, len(self.histogram) + 1)
+        return pd.DataFrame({'Start': edges[:-1], 'End': edges[1:], 'Patients': self.histogram.copy()})
+
+    def risk_distribution(self):
+        """Like risk_distribution() over the levels added so far"""
+        return pd.DataFrame({'Risk_Level': [str(level) for level in self.risk_counts],
+                             'Count': np.fromiter(self.risk_counts.values(), dtype=np.int64,
+                                                  count=len(self.risk_counts))})
+
+    def charts(self, cache=None):
+        """Figures summarizing the cohort, as returned by cohort_charts"""
+        cache = cache or _figures
+        charts = {}
+        if self.patients:
+            frequency = self.prediction_frequency()
+            charts['prediction_frequency'] = cache.figure('cohort_frequency', data_key(frequency),
+                                                          lambda: _frequency_bar(frequency))
+            histogram = self.confidence_histogram()
+            charts['confidence_histogram'] = cache.figure('cohort_histogram', data_key(histogram),
+                                                          lambda: _histogram_bar(histogram))
+            patients, confidences = self.sample()
+            charts['confidence_scatter'] = cache.figure(
+                'cohort_scatter', data_key(patients, confidences, [self.patients]),
+                lambda: _confidence_scatter(patients, confidences, self.patients)
+            )
+        if self.risk_counts:
+            risks = self.risk_distribution()
+            charts['risk_distribution'] = cache.figure('risks', data_key(risks), lambda: _risk_pie(risks))
+        return charts
+
+
+def cohort_charts(top_diseases, top_confidences, levels=(), cache=None):
+    """Figures summarizing a cohort, given each patient's top disease and confidence and all risk levels
+
+    Returns a dict of chart name to figure dict; charts without data are
+    left out.
+    """
+    return CohortChartData().add(top_diseases, top_confidences, levels).charts(cache)
+
+
+def disease_frequency_chart(frequency, cache=None):
+    """Bar chart of a CohortAggregate.disease_frequency() table"""
+    frame = frequency.rename(columns={'Top_Predictions': 'Patients'})[['Disease', 'Patients', 'Mean_Confidence']]
+    return (cache or _figures).figure('cohort_frequency', data_key(frame), lambda: _frequency_bar(frame))
+
+
+def cooccurrence_chart(matrix, cache=None):
+    """Heatmap of a CohortAggregate.cooccurrence_matrix() table"""
+    return (cache or _figures).figure('cohort_cooccurrence', data_key(matrix.reset_index()),
+                                      lambda: _cooccurrence_heatmap(matrix))
+
+
+def cohort_html(charts, title='SymptoGen Cohort Summary'):
+    """Standalone HTML page showing ``charts`` (as returned by cohort_charts)"""
+    import plotly.io as pio
+
+    divs = [pio.to_html(figure, full_html=False, include_plotlyjs='cdn' if i == 0 else False)
+            for i, figure in enumerate(charts.values())]
+    return (f'<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n<title>{title}</title>\n</head>\n'
+            f'<body>\n<h1>{title}</h1>\n' + '\n'.join(divs) + '\n</body>\n</html>\n')
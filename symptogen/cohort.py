@@ -0,0 +1,381 @@
+"""Population-level aggregates over large patient sets
+
+Where symptogen.batch scores and writes out every patient, cohort analytics
+keeps only counts: how often each symptom is reported, how often each pair
+of symptoms is reported together, which disease is each patient's top
+prediction (and how confidently), which diseases make the top ``k``, and how
+often each catalog gene is found in the patients' genetic input.
+
+Records are read in chunks and every chunk is reduced with vectorized NumPy
+passes to a CohortAggregate, so memory is bounded by the catalog, not by the
+number of patients.  Aggregates are plain count arrays: merging two of them
+adds the arrays, so partial results can be combined across chunks, worker
+processes, and shards run on other machines (see save_cohorts() and
+the CLI below).  Symptom pairs are kept sparse, as sorted pair keys and
+counts, since most pairs of a large vocabulary never co-occur.
+
+Usage::
+
+    python -m symptogen.cohort patients.csv --save part1.npz
+    python -m symptogen.cohort part1.npz part2.npz --group-column site --output summary.json
+"""
+import argparse
+import json
+import sys
+
+import numpy as np
+import pandas as pd
+
+from symptogen import metrics
+from symptogen.batch import DEFAULT_CHUNK_SIZE, parse_genes, parse_symptoms, read_records
+
+# Group label used when records are not split into cohorts
+ALL_PATIENTS = 'All patients'
+
+_COUNT_FIELDS = ('symptom_counts', 'top_counts', 'top_confidence', 'predicted_counts', 'gene_hits')
+
+
+def _merge_pairs(keys, counts, other_keys, other_counts):
+    """Sum two sparse pair-count vectors given as sorted keys and counts"""
+    if not len(other_keys):
+        return keys, counts
+    if not len(keys):
+        return other_keys, other_counts
+    merged, inverse = np.unique(np.concatenate([keys, other_keys]), return_inverse=True)
+    return merged, np.bincount(inverse.ravel(), weights=np.concatenate([counts, other_counts]),
+                               minlength=len(merged)).astype(np.int64)
+
+
+def symptom_pairs(indptr, ids, n_symptoms):
+    """Sorted keys ``a * n_symptoms + b`` (a < b) of the symptom pairs reported together, and their counts
+
+    ``indptr`` and ``ids`` list each patient's sorted, distinct symptom ids
+    in CSR form.
+    """
+    lengths = np.diff(indptr)
+    positions = np.arange(len(ids)) - np.repeat(indptr[:-1], lengths)
+    # Every entry pairs with the entries after it in the same patient
+    partners = np.repeat(lengths, lengths) - positions - 1
+    total = int(partners.sum())
+    if not total:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    first = np.repeat(np.arange(len(ids)), partners)
+    offsets = np.arange(total) - np.repeat(np.cumsum(partners) - partners, partners) + 1
+    ids = np.asarray(ids, dtype=np.int64)
+    return np.unique(ids[first] * n_symptoms + ids[first + offsets], return_counts=True)
+
+
+class CohortAggregate:
+    """Mergeable symptom, co-occurrence, prediction and gene-hit counts for one cohort"""
+
+    def __init__(self, version, n_symptoms, n_diseases, n_genes, k=1):
+        self.version = version
+        self.k = k
+        self.n_symptoms = n_symptoms
+        self.patients = 0
+        # Patients with at least one recognized symptom, and with genetic input
+        self.symptom_patients = 0
+        self.genetic_patients = 0
+        self.symptom_counts = np.zeros(n_symptoms, dtype=np.int64)
+        self.pair_keys = np.empty(0, dtype=np.int64)
+        self.pair_counts = np.empty(0, dtype=np.int64)
+        self.top_counts = np.zeros(n_diseases, dtype=np.int64)
+        self.top_confidence = np.zeros(n_diseases)
+        self.predicted_counts = np.zeros(n_diseases, dtype=np.int64)
+        self.gene_hits = np.zeros(n_genes, dtype=np.int64)
+
+    @classmethod
+    def for_analyzer(cls, analyzer, k=1):
+        """An empty aggregate shaped for ``analyzer``'s catalog"""
+        return cls(analyzer.version, len(analyzer.vocabulary), len(analyzer.symptom_index),
+                   len(analyzer.gene_matcher), k)
+
+    def merge(self, other):
+        """Add ``other``'s counts into this aggregate and return it"""
+        if (other.version, other.k) != (self.version, self.k):
+            raise ValueError(f'Cannot merge cohort aggregates of catalog {other.version} (k={other.k}) '
+                             f'into {self.version} (k={self.k})')
+        self.patients += other.patients
+        self.symptom_patients += other.symptom_patients
+        self.genetic_patients += other.genetic_patients
+        for name in _COUNT_FIELDS:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.pair_keys, self.pair_counts = _merge_pairs(self.pair_keys, self.pair_counts,
+                                                        other.pair_keys, other.pair_counts)
+        return self
+
+    def add(self, analyzer, symptom_lists, genetic_inputs):
+        """Count one chunk of patients: lists of symptom phrases and aligned gene strings"""
+        with metrics.timer('cohort_symptoms'):
+            encoded = [analyzer.vocabulary.encode(symptoms)[0] for symptoms in symptom_lists]
+            lengths = np.fromiter((len(ids) for ids in encoded), dtype=np.int64, count=len(encoded))
+            indptr = np.concatenate([[0], np.cumsum(lengths)])
+            ids = np.concatenate(encoded).astype(np.int64) if encoded else np.empty(0, dtype=np.int64)
+            self.symptom_counts += np.bincount(ids, minlength=self.n_symptoms)
+            self.symptom_patients += int(np.count_nonzero(lengths))
+            keys, counts = symptom_pairs(indptr, ids, self.n_symptoms)
+            self.pair_keys, self.pair_counts = _merge_pairs(self.pair_keys, self.pair_counts, keys, counts)
+
+        with metrics.timer('cohort_predictions'):
+            predictions = [results for results in analyzer.analyze_symptoms_batch(symptom_lists, k=self.k)
+                           if len(results)]
+            if predictions:
+                top_rows = np.fromiter((results.rows[0] for results in predictions), dtype=np.int64,
+                                       count=len(predictions))
+                top_scores = np.fromiter((results.scores[0] for results in predictions), dtype=np.float64,
+                                         count=len(predictions))
+                self.top_counts += np.bincount(top_rows, minlength=len(self.top_counts))
+                self.top_confidence += np.bincount(top_rows, weights=top_scores, minlength=len(self.top_confidence))
+                self.predicted_counts += np.bincount(np.concatenate([results.rows for results in predictions]),
+                                                     minlength=len(self.predicted_counts))
+
+        with metrics.timer('cohort_genes'):
+            hits = []
+            for genetic_input in genetic_inputs:
+                if genetic_input.strip():
+                    self.genetic_patients += 1
+                    hits.append(analyzer.analyze_genetic_markers(genetic_input)[0].rows)
+            if hits:
+                self.gene_hits += np.bincount(np.concatenate(hits), minlength=len(self.gene_hits))
+
+        self.patients += len(symptom_lists)
+        return self
+
+    # Summaries; names come from the catalog the counts were taken against
+
+    def _check(self, analyzer):
+        if analyzer.version != self.version:
+            raise ValueError(f'Cohort aggregate belongs to catalog {self.version}, not {analyzer.version}')
+
+    def symptom_prevalence(self, analyzer, top=20):
+        """Most reported symptoms with their patient count and share of the cohort"""
+        self._check(analyzer)
+        order = np.argsort(-self.symptom_counts, kind='stable')[:top]
+        order = order[self.symptom_counts[order] > 0]
+        return pd.DataFrame({
+            'Symptom': [analyzer.vocabulary.symptoms[i] for i in order],
+            'Patients': self.symptom_counts[order],
+            'Rate': self.symptom_counts[order] / max(self.patients, 1)
+        })
+
+    def cooccurrence_pairs(self, analyzer, top=20):
+        """Most frequent symptom pairs with their count, rate and lift over independence"""
+        self._check(analyzer)
+        order = np.argsort(-self.pair_counts, kind='stable')[:top]
+        a, b = np.divmod(self.pair_keys[order], self.n_symptoms)
+        counts = self.pair_counts[order]
+        expected = self.symptom_counts[a] * self.symptom_counts[b] / max(self.patients, 1)
+        symptoms = analyzer.vocabulary.symptoms
+        return pd.DataFrame({
+            'Symptom_A': [symptoms[i] for i in a],
+            'Symptom_B': [symptoms[i] for i in b],
+            'Patients': counts,
+            'Rate': counts / max(self.patients, 1),
+            'Lift': np.divide(counts, expected, out=np.zeros(len(counts)), where=expected > 0)
+        })
+
+    def cooccurrence_matrix(self, analyzer, top=15):
+        """Symmetric patient counts for pairs of the ``top`` most reported symptoms, counts on the diagonal"""
+        self._check(analyzer)
+        order = np.argsort(-self.symptom_counts, kind='stable')[:top]
+        order = order[self.symptom_counts[order] > 0]
+        position = np.full(self.n_symptoms, -1)
+        position[order] = np.arange(len(order))
+        a, b = np.divmod(self.pair_keys, self.n_symptoms)
+        keep = (position[a] >= 0) & (position[b] >= 0)
+        matrix = np.zeros((len(order), len(order)), dtype=np.int64)
+        matrix[position[a[keep]], position[b[keep]]] = self.pair_counts[keep]
+        matrix += matrix.T
+        matrix[np.diag_indices(len(order))] = self.symptom_counts[order]
+        names = [analyzer.vocabulary.symptoms[i] for i in order]
+        return pd.DataFrame(matrix, index=names, columns=names)
+
+    def disease_frequency(self, analyzer, top=20):
+        """Diseases most often predicted first, with share of patients and mean top confidence"""
+        self._check(analyzer)
+        order = np.argsort(-self.top_counts, kind='stable')[:top]
+        order = order[self.top_counts[order] > 0]
+        diseases = analyzer.symptom_index.diseases
+        return pd.DataFrame({
+            'Disease': [str(diseases[row]) for row in order],
+            'Top_Predictions': self.top_counts[order],
+            'Share': self.top_counts[order] / max(self.symptom_patients, 1),
+            'Mean_Confidence': self.top_confidence[order] / self.top_counts[order],
+            f'In_Top_{self.k}': self.predicted_counts[order]
+        })
+
+    def gene_hit_rates(self, analyzer, top=20):
+        """Catalog genes most often found, as a rate over patients with genetic input"""
+        self._check(analyzer)
+        order = np.argsort(-self.gene_hits, kind='stable')[:top]
+        order = order[self.gene_hits[order] > 0]
+        matcher = analyzer.gene_matcher
+        return pd.DataFrame({
+            'Gene': [matcher.genes[row] for row in order],
+            'Disease': [matcher.diseases[row] for row in order],
+            'Risk_Level': [matcher.risk_levels[row] for row in order],
+            'Patients': self.gene_hits[order],
+            'Hit_Rate': self.gene_hits[order] / max(self.genetic_patients, 1)
+        })
+
+    def summary(self, analyzer, top=20):
+        """All summaries as JSON-ready dicts"""
+        return {
+            'version': self.version,
+            'patients': self.patients,
+            'symptom_patients': self.symptom_patients,
+            'genetic_patients': self.genetic_patients,
+            'symptoms': self.symptom_prevalence(analyzer, top).to_dict('records'),
+            'symptom_pairs': self.cooccurrence_pairs(analyzer, top).to_dict('records'),
+            'diseases': self.disease_frequency(analyzer, top).to_dict('records'),
+            'genes': self.gene_hit_rates(analyzer, top).to_dict('records')
+        }
+
+    def arrays(self):
+        """The aggregate's state as a dict of arrays, for np.savez"""
+        state = {name: getattr(self, name) for name in _COUNT_FIELDS + ('pair_keys', 'pair_counts')}
+        state['scalars'] = np.array([self.k, self.n_symptoms, self.patients, self.symptom_patients,
+                                     self.genetic_patients], dtype=np.int64)
+        state['version'] = np.array(self.version)
+        return state
+
+    @classmethod
+    def from_arrays(cls, state):
+        k, n_symptoms, patients, symptom_patients, genetic_patients = (int(v) for v in state['scalars'])
+        aggregate = cls(str(state['version']), n_symptoms, len(state['top_counts']), len(state['gene_hits']), k)
+        aggregate.patients, aggregate.symptom_patients, aggregate.genetic_patients = \
+            patients, symptom_patients, genetic_patients
+        for name in _COUNT_FIELDS + ('pair_keys', 'pair_counts'):
+            setattr(aggregate, name, np.array(state[name]))
+        return aggregate
+
+
+def merge_cohorts(cohorts, other):
+    """Merge a dict of group label -> CohortAggregate into ``cohorts``, in place"""
+    for label, aggregate in other.items():
+        if label in cohorts:
+            cohorts[label].merge(aggregate)
+        else:
+            cohorts[label] = aggregate
+    return cohorts
+
+
+def aggregate_frame(frame, analyzer, k=1, symptom_column='symptoms', gene_column='genes', group_column=None):
+    """Reduce one chunk of patient records to a dict of group label -> CohortAggregate"""
+    n = len(frame)
+    symptom_lists = [parse_symptoms(cell) for cell in frame[symptom_column]] if symptom_column in frame else [[]] * n
+    genetic_inputs = [parse_genes(cell) for cell in frame[gene_column]] if gene_column in frame else [''] * n
+    if group_column is None or group_column not in frame:
+        groups = {ALL_PATIENTS: np.arange(n)}
+    else:
+        labels = frame[group_column].fillna('').astype(str).to_numpy()
+        groups = {label or '(blank)': positions for label, positions in pd.Series(labels).groupby(labels).indices.items()}
+
+    cohorts = {}
+    for label, positions in groups.items():
+        cohorts[label] = CohortAggregate.for_analyzer(analyzer, k).add(
+            analyzer, [symptom_lists[i] for i in positions], [genetic_inputs[i] for i in positions]
+        )
+    return cohorts
+
+
+def aggregate_records(frames, analyzer, k=1, symptom_column='symptoms', gene_column='genes', group_column=None,
+                      workers=1):
+    """Aggregate DataFrame chunks into a dict of group label -> CohortAggregate
+
+    With ``workers`` > 1 the chunks are reduced by a process pool (see
+    symptogen.parallel) and the partial aggregates merged as they arrive.
+    """
+    cohorts = {}
+    if workers is not None and workers <= 1:
+        for frame in frames:
+            merge_cohorts(cohorts, aggregate_frame(frame, analyzer, k, symptom_column, gene_column, group_column))
+        return cohorts
+
+    from symptogen.parallel import ParallelAnalyzer
+
+    with ParallelAnalyzer(analyzer.symptom_index, analyzer.gene_matcher, workers, symptom_column=symptom_column,
+                          gene_column=gene_column, model=analyzer.model,
+                          variant_index=analyzer.variant_index) as pool:
+        for partial in pool.aggregate_frames(frames, k, group_column):
+            merge_cohorts(cohorts, partial)
+    return cohorts
+
+
+def save_cohorts(path, cohorts):
+    """Write a dict of group label -> CohortAggregate to one .npz file"""
+    state = {'labels': np.array(list(cohorts), dtype=str)}
+    for i, aggregate in enumerate(cohorts.values()):
+        state.update({f'{i}.{name}': value for name, value in aggregate.arrays().items()})
+    np.savez_compressed(path, **state)
+
+
+def load_cohorts(path):
+    """Read cohorts written by save_cohorts()"""
+    with np.load(path, allow_pickle=False) as data:
+        return {
+            str(label): CohortAggregate.from_arrays(
+                {name.split('.', 1)[1]: data[name] for name in data.files if name.startswith(f'{i}.')}
+            )
+            for i, label in enumerate(data['labels'])
+        }
+
+
+def _json_scalar(value):
+    # NumPy scalars left in the summary tables
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m symptogen.cohort',
+        description='Aggregate symptom, prediction and gene-hit counts over patient records.'
+    )
+    parser.add_argument('inputs', nargs='+',
+                        help='CSV or .parquet patient files, or .npz partial aggregates to merge')
+    parser.add_argument('--save', metavar='NPZ', help='write the merged aggregates here for later merging')
+    parser.add_argument('--output', help='write the JSON summary here (default: stdout)')
+    parser.add_argument('--top-k', type=int, default=1, help='predictions per patient counted in In_Top_K')
+    parser.add_argument('--top', type=int, default=20, help='rows per summary table')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='records reduced per chunk')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='worker processes; 0 uses every core (default: 1, in-process)')
+    parser.add_argument('--symptom-column', default='symptoms')
+    parser.add_argument('--gene-column', default='genes')
+    parser.add_argument('--group-column', help='column splitting the records into cohorts')
+    return parser
+
+
+def main(argv=None):
+    from symptogen.core import get_analyzer
+
+    args = build_parser().parse_args(argv)
+    analyzer = get_analyzer()
+    cohorts = {}
+    for path in args.inputs:
+        if str(path).endswith('.npz'):
+            merge_cohorts(cohorts, load_cohorts(path))
+        else:
+            merge_cohorts(cohorts, aggregate_records(
+                read_records(path, args.chunk_size), analyzer, args.top_k, args.symptom_column,
+                args.gene_column, args.group_column, workers=args.workers or None
+            ))
+    if args.save:
+        save_cohorts(args.save, cohorts)
+
+    text = json.dumps({label: aggregate.summary(analyzer, args.top) for label, aggregate in cohorts.items()},
+                      indent=2, default=_json_scalar)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            handle.write(text)
+    else:
+        print(text)
+    print(f"Aggregated {sum(a.patients for a in cohorts.values())} records into {len(cohorts)} cohorts",
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
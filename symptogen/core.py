@@ -0,0 +1,188 @@
+"""Importable scoring core of SymptoGen, free of any Streamlit dependency
+
+The functions here are what the Streamlit app, the batch CLI and the HTTP
+service all call.  They run against a process-wide Analyzer built on first
+use from the compiled catalog named by ``SYMPTOGEN_CATALOG`` or, when that
+is not set, from the built-in sample catalogs.  ``SYMPTOGEN_SCORING_MODEL``
+selects a scoring model from symptogen.scoring.MODELS, and
+``SYMPTOGEN_VARIANTS`` names a compiled variant index (see
+symptogen.variants) that resolves rsIDs and positions in genetic input.
+
+With ``SYMPTOGEN_DATA_DIR`` set (or after watch_catalog()), the analyzer
+comes from a CatalogManager instead and is swapped atomically whenever the
+data directory changes.
+"""
+import os
+import threading
+
+from symptogen import metrics
+from symptogen.analyzer import Analyzer
+from symptogen.catalog import AVAILABLE_SYMPTOMS, genetic_disease_frame, symptom_disease_frame
+from symptogen.engine import SymptomIndex
+from symptogen.genetic_io import iter_genetic_pieces
+from symptogen.genetics import GeneMatcher
+
+_analyzer = None
+_analyzer_lock = threading.Lock()
+_manager = None
+_manager_lock = threading.Lock()
+_reports = None
+
+
+def load_default_analyzer():
+    """Build an Analyzer over the configured catalog"""
+    with metrics.timer('catalog_load'):
+        return _load_analyzer()
+
+
+def _load_analyzer():
+    catalog_dir = os.environ.get('SYMPTOGEN_CATALOG')
+    model = default_model()
+    variant_index = load_variant_index()
+    if catalog_dir:
+        from symptogen.catalog_store import load_catalog
+
+        catalog = load_catalog(catalog_dir)
+        return Analyzer(catalog.symptom_index, catalog.gene_matcher, model=model, variant_index=variant_index)
+    symptom_index = SymptomIndex.from_frame(symptom_disease_frame(), vocabulary=AVAILABLE_SYMPTOMS)
+    return Analyzer(symptom_index, GeneMatcher.from_frame(genetic_disease_frame()), model=model,
+                    variant_index=variant_index)
+
+
+def default_model():
+    """The scoring model named by ``SYMPTOGEN_SCORING_MODEL``, or None for the default blend"""
+    return os.environ.get('SYMPTOGEN_SCORING_MODEL') or None
+
+
+def load_variant_index():
+    """The compiled variant index named by ``SYMPTOGEN_VARIANTS``, or None"""
+    directory = os.environ.get('SYMPTOGEN_VARIANTS')
+    if not directory:
+        return None
+    from symptogen.variants import VariantIndex
+
+    return VariantIndex.load(directory)
+
+
+def get_analyzer():
+    """Return the process-wide Analyzer, building it on first use"""
+    global _analyzer
+    if _analyzer is None:
+        if os.environ.get('SYMPTOGEN_DATA_DIR'):
+            watch_catalog()
+        with _analyzer_lock:
+            if _analyzer is None:
+                _analyzer = load_default_analyzer()
+    return _analyzer
+
+
+def set_analyzer(analyzer):
+    """Replace the process-wide Analyzer, e.g. after loading another catalog"""
+    global _analyzer
+    with _analyzer_lock:
+        _analyzer = analyzer
+
+
+def watch_catalog(directory=None, poll_interval=None):
+    """Return the process-wide CatalogManager, starting it on first call
+
+    ``directory`` defaults to ``SYMPTOGEN_DATA_DIR``; returns None when
+    neither is given.  Every swap replaces the process-wide Analyzer.
+    """
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                directory = directory or os.environ.get('SYMPTOGEN_DATA_DIR')
+                if not directory:
+                    return None
+                from symptogen.catalog_manager import DEFAULT_POLL_INTERVAL, CatalogManager
+
+                _manager = CatalogManager(
+                    directory, poll_interval or DEFAULT_POLL_INTERVAL,
+                    model=default_model(), on_swap=set_analyzer,
+                    variant_index=load_variant_index()
+                ).start()
+    return _manager
+
+
+def get_catalog_manager():
+    """The running CatalogManager, or None when catalogs are not watched"""
+    return _manager
+
+
+def calculate_symptom_match_score(user_symptoms, disease_symptoms):
+    """Calculate matching score between user symptoms and disease symptoms"""
+    if not user_symptoms or not disease_symptoms:
+        return 0
+    
+    user_set = set(user_symptoms)
+    disease_set = set(disease_symptoms)
+    
+    intersection = len(user_set.intersection(disease_set))
+    union = len(user_set.union(disease_set))
+    
+    # Jaccard similarity with bonus for exact matches
+    jaccard_score = intersection / union if union > 0 else 0
+    match_bonus = intersection / len(disease_set) if len(disease_set) > 0 else 0
+    
+    return (jaccard_score * 0.6 + match_bonus * 0.4) * 100
+
+
+def analyze_symptoms(user_symptoms, k=10, analyzer=None, approximate=False, max_bucket_size=None):
+    """Analyze user symptoms and return the top ``k`` predicted diseases"""
+    # Symptoms are interned to integer ids and only diseases sharing one are
+    # scored; with the default model this is equivalent to
+    # calculate_symptom_match_score over every row.
+    # Repeated symptom sets are served from the analyzer's result cache.
+    # With ``approximate``, MinHash/LSH retrieval picks the candidates first;
+    # ``max_bucket_size`` overrides the analyzer's bucket cap (0 for none).
+    return (analyzer or get_analyzer()).analyze_symptoms(user_symptoms, k=k, approximate=approximate,
+                                                         max_bucket_size=max_bucket_size)
+
+
+def analyze_genetic_markers(genetic_input, analyzer=None):
+    """Analyze genetic markers and return associated risks"""
+    return (analyzer or get_analyzer()).analyze_genetic_markers(genetic_input)
+
+
+def analyze_genetic_file(source, name=None, analyzer=None):
+    """Analyze a FASTA/VCF/text file or upload without loading it as one string"""
+    analyzer = analyzer or get_analyzer()
+    matcher = analyzer.gene_matcher
+    pieces = iter_genetic_pieces(source, name=name or getattr(source, 'name', None))
+    with metrics.timer('gene_match'):
+        if analyzer.variant_index is None:
+            rows = matcher.match_stream(pieces)
+        else:
+            from symptogen.variants import VariantCollector
+
+            # rsIDs and positions are collected in the same pass over the file
+            collector = VariantCollector()
+            rows = analyzer.with_variant_rows(matcher.match_stream(collector.watch(pieces)), collector.finish())
+    return matcher.results(rows), matcher.gene_names(rows)
+
+
+def get_report(symptom_results, genetic_results, user_symptoms, genetic_input, generated_at=None, version=None):
+    """Return the Report for an analysis result, stamped ``generated_at`` (default: now)
+
+    The timestamp-free body is shared by identical results of the same
+    catalog ``version`` (default: the process-wide Analyzer's) and renders
+    each format once, on first use.
+    """
+    global _reports
+    if _reports is None:
+        # Imported on first use so callers that never report skip it
+        from symptogen.report import ReportCache
+
+        _reports = ReportCache()
+    if version is None:
+        version = get_analyzer().version
+    return _reports.get(symptom_results, genetic_results, user_symptoms, genetic_input, generated_at, version)
+
+
+def generate_report(symptom_results, genetic_results, user_symptoms, genetic_input, fmt='markdown', version=None):
+    """Generate a comprehensive report"""
+    with metrics.timer('report'):
+        return get_report(symptom_results, genetic_results, user_symptoms, genetic_input,
+                          version=version).render(fmt)
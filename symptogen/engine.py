@@ -0,0 +1,313 @@
+"""Vectorized symptom scoring engine
+
+The symptom catalog is compiled once into a binary disease x symptom
+incidence matrix stored in CSR form (``indptr``/``indices``), so that every
+disease can be scored against a symptom set in a single NumPy pass.  The
+transposed matrix doubles as an inverted symptom -> disease index
+(``posting_indptr``/``posting_rows``) so that a query only touches the
+diseases sharing at least one symptom with the user.
+"""
+import hashlib
+from functools import cached_property
+from pathlib import Path
+
+import numpy as np
+
+from symptogen import metrics
+from symptogen.results import SymptomResults, match_masks
+from symptogen.scoring import get_model
+
+
+def array_fingerprint(arrays):
+    """Short content hash of a sequence of arrays (or lists of strings)"""
+    digest = hashlib.sha256()
+    for array in arrays:
+        array = np.ascontiguousarray(np.asarray(array, dtype=str) if isinstance(array, list) else array)
+        digest.update(array.dtype.str.encode())
+        digest.update(array.tobytes())
+    return digest.hexdigest()[:16]
+
+
+def _merge_top_k(rows, scores, k):
+    """Keep the ``k`` best (row, score) pairs ordered by score, then catalog order"""
+    if len(scores) > k:
+        kth = np.partition(scores, len(scores) - k)[len(scores) - k]
+        keep = scores >= kth
+        rows, scores = rows[keep], scores[keep]
+    order = np.lexsort((rows, -scores))[:k]
+    return rows[order], scores[order]
+
+
+class SymptomIndex:
+    """Disease x symptom incidence matrix compiled from the symptom catalog"""
+
+    # Arrays persisted by save() and memory-mapped back by load()
+    _ARRAYS = ('diseases', 'severities', 'vocabulary', 'indptr', 'indices', 'posting_indptr', 'posting_rows')
+
+    def __init__(self, diseases, severities, symptom_lists, vocabulary=()):
+        # Intern every symptom seen in the catalog to a column id; symptoms in
+        # ``vocabulary`` get an id (and an empty posting list) even if unused
+        symptom_ids = {s: i for i, s in enumerate(dict.fromkeys(vocabulary))}
+        rows = []
+        for symptoms in symptom_lists:
+            # Deduplicated, keeping the catalog's own symptom order
+            rows.append(list(dict.fromkeys(symptom_ids.setdefault(s, len(symptom_ids)) for s in symptoms)))
+
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum([len(r) for r in rows], out=indptr[1:])
+        indices = np.fromiter((i for r in rows for i in r), dtype=np.int32, count=int(indptr[-1]))
+
+        # Inverted index: posting list of disease rows for every symptom id
+        entry_rows = np.repeat(np.arange(len(rows), dtype=np.int32), np.diff(indptr))
+        posting_rows = entry_rows[np.argsort(indices, kind='stable')]
+        posting_indptr = np.zeros(len(symptom_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(indices, minlength=len(symptom_ids)), out=posting_indptr[1:])
+
+        self._set_arrays(list(diseases), list(severities), list(symptom_ids),
+                         indptr, indices, posting_indptr, posting_rows)
+
+    def _set_arrays(self, diseases, severities, vocabulary, indptr, indices, posting_indptr, posting_rows):
+        self.diseases = diseases
+        self.severities = severities
+        self.vocabulary = vocabulary
+        self.symptom_ids = {s: i for i, s in enumerate(vocabulary)}
+        self.indptr = indptr
+        self.indices = indices
+        self.disease_sizes = np.diff(indptr)
+        self.posting_indptr = posting_indptr
+        self.posting_rows = posting_rows
+
+    @classmethod
+    def from_frame(cls, frame, vocabulary=()):
+        """Compile an index from a DataFrame shaped like load_symptom_disease_data()"""
+        return cls(
+            frame['Disease'].tolist(), frame['Severity'].tolist(), frame['Primary_Symptoms'].tolist(),
+            vocabulary=vocabulary
+        )
+
+    def save(self, directory):
+        """Write the compiled arrays to ``directory`` as one .npy file each"""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for name in self._ARRAYS:
+            value = getattr(self, name)
+            if isinstance(value, list):
+                value = np.array(value, dtype=str)
+            np.save(directory / f'{name}.npy', value, allow_pickle=False)
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r'):
+        """Load an index written by save(), memory-mapping the arrays by default
+
+        Memory-mapped arrays are backed by the OS page cache, so several
+        processes loading the same directory share one physical copy.
+        """
+        directory = Path(directory)
+        arrays = {name: np.load(directory / f'{name}.npy', mmap_mode=mmap_mode, allow_pickle=False)
+                  for name in cls._ARRAYS}
+        index = cls.__new__(cls)
+        index._set_arrays(
+            arrays['diseases'], arrays['severities'], arrays['vocabulary'].tolist(),
+            arrays['indptr'], arrays['indices'], arrays['posting_indptr'], arrays['posting_rows']
+        )
+        return index
+
+    def __len__(self):
+        return len(self.diseases)
+
+    @cached_property
+    def version(self):
+        """Content hash of the compiled catalog, used to invalidate derived caches"""
+        return array_fingerprint([self.diseases, self.severities, self.vocabulary, self.indptr, self.indices])
+
+    def encode(self, user_symptoms):
+        """Return the known symptom ids and the size of the user symptom set"""
+        user_set = set(user_symptoms)
+        ids = sorted(self.symptom_ids[s] for s in user_set if s in self.symptom_ids)
+        return np.array(ids, dtype=np.int32), len(user_set)
+
+    def postings(self, symptom_id):
+        """Return the disease rows listing the symptom ``symptom_id``"""
+        return self.posting_rows[self.posting_indptr[symptom_id]:self.posting_indptr[symptom_id + 1]]
+
+    def candidates(self, symptom_ids, symptom_weights=None):
+        """Return the rows sharing a symptom with ``symptom_ids`` and their intersection counts
+
+        Only the posting lists of the query symptoms are read, so the cost
+        depends on the number of candidates rather than on the catalog size.
+        With ``symptom_weights`` (one per symptom id) the intersections are
+        weight sums instead of counts.
+        """
+        if len(symptom_ids) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        postings = [self.postings(i) for i in symptom_ids]
+        hits = np.concatenate(postings)
+        if symptom_weights is None:
+            rows, counts = np.unique(hits, return_counts=True)
+            return rows.astype(np.int64), counts
+        hit_weights = np.repeat(symptom_weights[np.asarray(symptom_ids)], [len(p) for p in postings])
+        rows, inverse = np.unique(hits, return_inverse=True)
+        return rows.astype(np.int64), np.bincount(inverse.ravel(), weights=hit_weights, minlength=len(rows))
+
+    def _gather_postings(self, record_ids, symptom_ids):
+        """Expand (record, symptom) pairs into (record, disease row) hits"""
+        starts = self.posting_indptr[symptom_ids]
+        lengths = self.posting_indptr[symptom_ids + 1] - starts
+        ends = np.cumsum(lengths)
+        offsets = np.repeat(starts - ends + lengths, lengths) + np.arange(ends[-1] if len(ends) else 0)
+        return np.repeat(record_ids, lengths), self.posting_rows[offsets]
+
+    def row_intersections(self, rows, symptom_ids, symptom_weights=None):
+        """Intersection counts (or weight sums) of ``symptom_ids`` with the given disease rows
+
+        Reads the rows' own entries of the incidence matrix instead of the
+        posting lists, for when the candidate rows are already known.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        starts = self.indptr[rows]
+        lengths = self.disease_sizes[rows]
+        ends = np.cumsum(lengths)
+        offsets = np.repeat(starts - ends + lengths, lengths) + np.arange(ends[-1] if len(ends) else 0)
+        entries = self.indices[offsets]
+        owners = np.repeat(np.arange(len(rows)), lengths)
+        hit = np.isin(entries, symptom_ids)
+        if symptom_weights is None:
+            return np.bincount(owners[hit], minlength=len(rows))
+        return np.bincount(owners[hit], weights=symptom_weights[entries[hit]], minlength=len(rows))
+
+    def intersections(self, symptom_ids):
+        """Count, for every disease, how many of ``symptom_ids`` it lists"""
+        counts = np.zeros(len(self), dtype=np.int64)
+        rows, hits = self.candidates(symptom_ids)
+        counts[rows] = hits
+        return counts
+
+    def scores(self, user_symptoms, model=None):
+        """Score every disease against ``user_symptoms`` in one batched pass"""
+        ids, n_user = self.encode(user_symptoms)
+        if n_user == 0:
+            return np.zeros(len(self), dtype=np.float64)
+        compiled = get_model(model).compile(self)
+        intersections = np.zeros(len(self), dtype=np.float64 if compiled.weighted else np.int64)
+        rows, hits = self.candidates(ids, compiled.symptom_weights)
+        intersections[rows] = hits
+        return compiled.scores(intersections, compiled.user_total(ids, n_user), slice(None))
+
+    def disease_symptoms(self, row):
+        """Return the catalog symptoms of the disease at ``row``"""
+        return [self.vocabulary[i] for i in self.indices[self.indptr[row]:self.indptr[row + 1]]]
+
+    def matched_symptoms(self, row, symptom_ids):
+        """Return the symptoms of the disease at ``row`` whose id is in ``symptom_ids``"""
+        return [self.vocabulary[i] for i in self.indices[self.indptr[row]:self.indptr[row + 1]] if i in symptom_ids]
+
+    def result(self, row, score, symptom_ids):
+        """Build the result dict returned by analyze_symptoms"""
+        return {
+            'Disease': str(self.diseases[row]),
+            'Confidence': float(score),
+            'Severity': str(self.severities[row]),
+            'Matched_Symptoms': self.matched_symptoms(row, symptom_ids)
+        }
+
+    def top_k(self, user_symptoms, k=10, model=None):
+        """Return SymptomResults for the ``k`` best scoring diseases, highest first
+
+        Ties keep catalog order, matching a stable sort of the full ranking.
+        ``model`` is a ScoringModel or model name; the default is the
+        calculate_symptom_match_score blend.
+        """
+        ids, n_user = self.encode(user_symptoms)
+        return self.top_k_ids(ids, n_user, k, model)
+
+    def top_k_ids(self, symptom_ids, n_user, k=10, model=None):
+        """top_k for an already interned query: symptom ids plus the user set size"""
+        if k <= 0 or len(symptom_ids) == 0:
+            return SymptomResults.empty(self)
+        compiled = get_model(model).compile(self)
+        rows, intersections = self.candidates(symptom_ids, compiled.symptom_weights)
+        metrics.count('candidates_scored', len(rows))
+        rows, scores = self._select_top_k(rows, intersections, compiled.user_total(symptom_ids, n_user), k, compiled)
+        return SymptomResults.from_rows(self, rows, scores, symptom_ids)
+
+    def _select_top_k(self, rows, counts, n_user, k, compiled=None):
+        """Pick the ``k`` best candidate rows given their intersection counts
+
+        Candidates are visited in decreasing order of their size-based score
+        bound and scoring stops as soon as no remaining candidate can beat the
+        current k-th score.  ``compiled`` is the CompiledModel to score with;
+        ``counts`` and ``n_user`` are then its weighted intersections and user
+        total.
+        """
+        compiled = compiled or get_model().compile(self)
+        bounds = compiled.upper_bounds(n_user, rows)
+        order = np.lexsort((rows, -bounds))
+        rows, counts, bounds = rows[order], counts[order], bounds[order]
+
+        best_rows = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0, dtype=np.float64)
+        block = max(k, 256)
+        for start in range(0, len(rows), block):
+            # Equal bounds may still win a tie on catalog order, so prune strictly
+            if len(best_rows) == k and bounds[start] < best_scores[-1]:
+                break
+            stop = start + block
+            scores = compiled.scores(counts[start:stop], n_user, rows[start:stop])
+            best_rows, best_scores = _merge_top_k(
+                np.concatenate([best_rows, rows[start:stop]]),
+                np.concatenate([best_scores, scores]),
+                k
+            )
+        return best_rows, best_scores
+
+    def top_k_batch(self, symptom_lists, k=10, model=None):
+        """Vectorized top_k over many symptom lists at once
+
+        All (record, disease) intersection counts of the batch are produced by
+        a single expansion of the posting lists, scored in one pass and ranked
+        with one lexsort.  Returns one SymptomResults per input record.
+        """
+        return self.top_k_batch_ids([self.encode(symptoms) for symptoms in symptom_lists], k, model)
+
+    def top_k_batch_ids(self, encoded, k=10, model=None):
+        """top_k_batch for already interned queries, given as (symptom ids, user set size) pairs"""
+        encoded = list(encoded)
+        results = [SymptomResults.empty(self) for _ in encoded]
+        if k <= 0 or not encoded or len(self) == 0:
+            return results
+
+        compiled = get_model(model).compile(self)
+        user_totals = np.array([compiled.user_total(ids, n) for ids, n in encoded])
+        symptom_ids = np.concatenate([ids for ids, _ in encoded]).astype(np.int64)
+        record_ids = np.repeat(np.arange(len(encoded)), [len(ids) for ids, _ in encoded])
+        entries, rows = self._gather_postings(np.arange(len(symptom_ids)), symptom_ids)
+        if len(rows) == 0:
+            return results
+        records = record_ids[entries]
+
+        if compiled.weighted:
+            keys, inverse = np.unique(records * len(self) + rows, return_inverse=True)
+            counts = np.bincount(inverse.ravel(), weights=compiled.symptom_weights[symptom_ids[entries]],
+                                 minlength=len(keys))
+        else:
+            keys, counts = np.unique(records * len(self) + rows, return_counts=True)
+        metrics.count('candidates_scored', len(keys))
+        records, rows = np.divmod(keys, len(self))
+        scores = compiled.scores(counts, user_totals[records], rows)
+
+        # Per record: highest score first, catalog order between ties
+        order = np.lexsort((rows, -scores, records))
+        records, rows, scores = records[order], rows[order], scores[order]
+        rank = np.arange(len(records)) - np.searchsorted(records, records)
+        keep = rank < k
+        records, rows, scores = records[keep], rows[keep], scores[keep]
+
+        # Matched-symptom masks of the whole batch in one pass
+        masks = match_masks(self, rows, symptom_ids, row_groups=records, id_groups=record_ids)
+        rows = rows.astype(np.int32)
+        bounds = np.searchsorted(records, np.arange(len(encoded) + 1))
+        for i in range(len(encoded)):
+            start, stop = bounds[i], bounds[i + 1]
+            if start < stop:
+                results[i] = SymptomResults(self, rows[start:stop], scores[start:stop], masks[start:stop])
+        return results
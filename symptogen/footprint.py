@@ -0,0 +1,173 @@
+"""Shared read-only catalogs and per-session memory accounting
+
+Every Streamlit session and service request reads the same process-wide
+Analyzer.  SharedCatalog marks its compiled arrays read-only, so a session
+can be handed views into them (results, incremental scorers, slices) with no
+copy and no risk of one session changing another's catalog, and it records
+which objects are shared so they are not charged to any one session.
+
+deep_sizeof() then measures what a session really holds on its own: result
+rows and bitmasks, incremental scorer counts, uploads, widget values.
+SessionRegistry keeps the latest measurement per session so the total across
+concurrent sessions can be reported for capacity planning; a node needs
+roughly ``catalog bytes + sessions * bytes per session``.
+"""
+import sys
+import threading
+import time
+import types
+from collections import deque
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+
+# Sessions not measured for this long are dropped from the totals
+DEFAULT_SESSION_TTL = 3600.0
+
+# Objects that are never owned by a session
+_SKIPPED_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType)
+
+
+def freeze_arrays(obj):
+    """Mark the NumPy arrays among ``obj``'s attributes read-only"""
+    for value in vars(obj).values():
+        if isinstance(value, np.ndarray) and value.flags.writeable:
+            value.flags.writeable = False
+
+
+def deep_sizeof(obj, shared=frozenset()):
+    """Bytes held by ``obj`` and everything it references, except the objects whose id is in ``shared``
+
+    Arrays count their own buffer, views count only their header (plus their
+    base when it is not shared), memory-mapped data counts nothing since it
+    lives in the page cache, and DataFrames count their deep memory usage.
+    """
+    seen = set()
+    stack = [obj]
+    total = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or id(obj) in shared or isinstance(obj, _SKIPPED_TYPES):
+            continue
+        seen.add(id(obj))
+        if isinstance(obj, np.ndarray):
+            total += sys.getsizeof(obj)
+            if obj.base is not None and not isinstance(obj, np.memmap):
+                stack.append(obj.base)
+            continue
+        if isinstance(obj, (pd.DataFrame, pd.Series)):
+            total += int(obj.memory_usage(deep=True).sum()) if isinstance(obj, pd.DataFrame) else \
+                int(obj.memory_usage(deep=True))
+            continue
+        total += sys.getsizeof(obj)
+        if isinstance(obj, (str, bytes, bytearray, int, float, complex, bool, memoryview)):
+            continue
+        if isinstance(obj, Mapping):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+            stack.extend(obj)
+        if hasattr(obj, '__dict__'):
+            stack.append(vars(obj))
+        for name in getattr(type(obj), '__slots__', ()):
+            if hasattr(obj, name):
+                stack.append(getattr(obj, name))
+    return total
+
+
+def _array_bytes(arrays):
+    """(heap, mapped) bytes of ``arrays``"""
+    heap = mapped = 0
+    for array in arrays:
+        if not isinstance(array, np.ndarray):
+            continue
+        if isinstance(array, np.memmap) or isinstance(array.base, np.memmap):
+            mapped += array.nbytes
+        elif array.base is None:
+            heap += array.nbytes
+    return heap, mapped
+
+
+class SharedCatalog:
+    """One Analyzer's catalog, frozen for sharing between sessions"""
+
+    def __init__(self, analyzer):
+        self.analyzer = analyzer
+        self.version = analyzer.version
+        index = analyzer.symptom_index
+        compiled = analyzer.model.compile(index)
+        freeze_arrays(index)
+        freeze_arrays(compiled)
+
+        roots = [analyzer, index, analyzer.gene_matcher, analyzer.vocabulary, analyzer.cache, analyzer.model,
+                 analyzer.model._compiled, compiled]
+        roots.extend(vars(index).values())
+        roots.extend(vars(compiled).values())
+        roots.extend(vars(analyzer.gene_matcher).values())
+        if analyzer.variant_index is not None:
+            freeze_arrays(analyzer.variant_index)
+            roots.append(analyzer.variant_index)
+            roots.extend(vars(analyzer.variant_index).values())
+        self._roots = roots
+        self.shared_ids = frozenset(id(obj) for obj in roots)
+
+    def session_bytes(self, session_state):
+        """Bytes held by one session's state beyond the shared catalog"""
+        return deep_sizeof({key: session_state[key] for key in session_state}, self.shared_ids)
+
+    def stats(self):
+        """Bytes held by the shared catalog, on the heap and memory-mapped"""
+        index = self.analyzer.symptom_index
+        heap, mapped = _array_bytes(vars(index).values())
+        if self.analyzer.variant_index is not None:
+            variant_heap, variant_mapped = _array_bytes(vars(self.analyzer.variant_index).values())
+            heap, mapped = heap + variant_heap, mapped + variant_mapped
+        # Catalog lists, the gene matcher's automaton and the vocabulary
+        owned = frozenset(id(value) for value in vars(index).values() if isinstance(value, np.ndarray))
+        heap += deep_sizeof([index, self.analyzer.gene_matcher, self.analyzer.vocabulary], owned)
+        return {'version': self.version, 'heap_bytes': heap, 'mapped_bytes': mapped}
+
+
+class SessionRegistry:
+    """Latest memory footprint of every live session, for process-wide totals"""
+
+    def __init__(self, ttl=DEFAULT_SESSION_TTL):
+        self.ttl = ttl
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def update(self, session_id, nbytes):
+        with self._lock:
+            self._sessions[session_id] = (nbytes, time.monotonic())
+
+    def discard(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def prune(self, is_active=None):
+        """Drop sessions not seen within the TTL or, given ``is_active``, no longer connected"""
+        cutoff = time.monotonic() - self.ttl
+        with self._lock:
+            for session_id, (_, seen) in list(self._sessions.items()):
+                if seen < cutoff or (is_active is not None and not is_active(session_id)):
+                    del self._sessions[session_id]
+
+    def stats(self):
+        with self._lock:
+            sizes = [nbytes for nbytes, _ in self._sessions.values()]
+        return {
+            'sessions': len(sizes),
+            'total_bytes': sum(sizes),
+            'mean_bytes': sum(sizes) / len(sizes) if sizes else 0,
+            'max_bytes': max(sizes, default=0)
+        }
+
+
+def format_bytes(nbytes):
+    """``nbytes`` in B, KB, MB or GB"""
+    for unit in ('B', 'KB', 'MB'):
+        if abs(nbytes) < 1024:
+            return f'{nbytes:.0f} {unit}' if unit == 'B' else f'{nbytes:.1f} {unit}'
+        nbytes /= 1024
+    return f'{nbytes:.1f} GB'
@@ -0,0 +1,169 @@
+"""Streaming ingestion of FASTA, VCF and plain-text genetic inputs
+
+Files are memory-mapped (or read in bounded chunks for file objects and
+gzip files, which are recognized by name or, for file objects, by content)
+and turned into a generator of text pieces for a GeneScanner, so peak
+memory stays flat regardless of the input size:
+
+* VCF: the ID column (rsIDs) and the GENE / GENEINFO INFO keys
+* FASTA: the header lines; sequence lines are skipped
+* anything else: the raw text, chunk by chunk
+"""
+import codecs
+import gzip
+import itertools
+import mmap
+import os
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+# Longer lines are truncated so a single unwrapped sequence line cannot
+# grow the line buffer without bound
+MAX_LINE_LENGTH = 1 << 16
+
+FASTA_SUFFIXES = ('.fa', '.fasta', '.fna', '.faa')
+VCF_SUFFIXES = ('.vcf',)
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+# Leading characters detect_format() looks at
+SNIFF_LENGTH = 64
+
+
+def iter_text_chunks(source, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield decoded text from a path or binary file object in bounded chunks"""
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+    if isinstance(source, (str, os.PathLike)):
+        if str(source).endswith('.gz'):
+            with gzip.open(source, 'rb') as handle:
+                yield from _decode_reads(handle, decoder, chunk_size)
+        else:
+            with open(source, 'rb') as handle:
+                if os.fstat(handle.fileno()).st_size == 0:
+                    return
+                with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    for start in range(0, len(mapped), chunk_size):
+                        yield decoder.decode(mapped[start:start + chunk_size])
+    elif _is_gzip(source):
+        # Uploads keep their compression; detect it from the content
+        with gzip.GzipFile(fileobj=source, mode='rb') as handle:
+            yield from _decode_reads(handle, decoder, chunk_size)
+    else:
+        yield from _decode_reads(source, decoder, chunk_size)
+
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+
+def _is_gzip(handle):
+    """Whether a file object holds gzip data, from its first bytes or else its name"""
+    if hasattr(handle, 'peek'):
+        return handle.peek(2)[:2] == GZIP_MAGIC
+    if hasattr(handle, 'seekable') and handle.seekable():
+        position = handle.tell()
+        head = handle.read(2)
+        handle.seek(position)
+        return head == GZIP_MAGIC
+    return str(getattr(handle, 'name', '')).endswith('.gz')
+
+
+def _decode_reads(handle, decoder, chunk_size):
+    while True:
+        data = handle.read(chunk_size)
+        if not data:
+            return
+        yield decoder.decode(data) if isinstance(data, bytes) else data
+
+
+def iter_lines(chunks, max_length=MAX_LINE_LENGTH):
+    """Reassemble lines split across chunk boundaries, truncating overlong lines"""
+    partial = []
+    size = 0
+    for chunk in chunks:
+        start = 0
+        while True:
+            end = chunk.find('\n', start)
+            piece = chunk[start:] if end < 0 else chunk[start:end]
+            if size < max_length:
+                partial.append(piece[:max_length - size])
+                size += len(partial[-1])
+            if end < 0:
+                break
+            yield ''.join(partial).rstrip('\r')
+            partial = []
+            size = 0
+            start = end + 1
+    if partial:
+        yield ''.join(partial).rstrip('\r')
+
+
+def iter_vcf_tokens(lines):
+    """Yield rsIDs and gene symbols from VCF data lines"""
+    for line in lines:
+        if not line or line.startswith('#'):
+            continue
+        fields = line.split('\t', 8)
+        if len(fields) < 3:
+            continue
+        for rsid in fields[2].split(';'):
+            if rsid != '.':
+                yield rsid
+        if len(fields) > 7:
+            for entry in fields[7].split(';'):
+                key, _, value = entry.partition('=')
+                if key == 'GENE':
+                    yield from value.split(',')
+                elif key == 'GENEINFO':
+                    # ClinVar style: SYMBOL:GeneID|SYMBOL:GeneID
+                    for gene in value.split('|'):
+                        yield gene.partition(':')[0]
+
+
+def iter_fasta_tokens(lines):
+    """Yield the header text of FASTA records"""
+    for line in lines:
+        if line.startswith('>'):
+            yield line[1:]
+
+
+def detect_format(name, first_chunk):
+    """Return 'vcf', 'fasta' or 'text' from a file name and its first chunk"""
+    name = (name or '').lower()
+    if name.endswith('.gz'):
+        name = name[:-3]
+    if name.endswith(VCF_SUFFIXES) or first_chunk.startswith('##fileformat=VCF'):
+        return 'vcf'
+    if name.endswith(FASTA_SUFFIXES) or first_chunk.lstrip().startswith('>'):
+        return 'fasta'
+    return 'text'
+
+
+def iter_genetic_pieces(source, name=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield text pieces of a genetic input file ready to feed a GeneScanner
+
+    ``source`` is a path or a binary file object (such as a Streamlit
+    upload); ``name`` is used for format detection when it is not a path.
+    """
+    if name is None and isinstance(source, (str, os.PathLike)):
+        name = os.fspath(source)
+    chunks = iter_text_chunks(source, chunk_size)
+    # Small chunks are gathered until the format can be told from the content
+    head = []
+    while sum(map(len, head)) < SNIFF_LENGTH:
+        chunk = next(chunks, None)
+        if chunk is None:
+            break
+        head.append(chunk)
+    first = ''.join(head)
+    chunks = itertools.chain([first] if first else [], chunks)
+
+    fmt = detect_format(name, first)
+    if fmt == 'text':
+        # Raw text keeps chunk boundaries; the scanner stitches matches across them
+        yield from chunks
+        return
+    tokens = iter_vcf_tokens(iter_lines(chunks)) if fmt == 'vcf' else iter_fasta_tokens(iter_lines(chunks))
+    for token in tokens:
+        yield token + '\n'
@@ -0,0 +1,179 @@
+"""Gene marker matching against the genetic disease catalog
+
+Every gene symbol (and rsID, when the catalog lists them) is compiled into a
+single Aho-Corasick automaton, so all markers are found in one linear pass
+over the input regardless of the size of the gene table.  Matches only count
+when they form whole tokens: "BRCA1" is found in "BRCA1, APOE" but not in
+"BRCA12".
+"""
+from collections import deque
+from functools import cached_property
+
+from symptogen.engine import array_fingerprint
+from symptogen.results import GeneticResults
+
+
+def _is_token_char(ch):
+    return ch.isalnum()
+
+
+class GeneMatcher:
+    """Genetic catalog compiled for matching gene names in free-text input"""
+
+    def __init__(self, genes, diseases, risk_levels, prevalences, descriptions, variants=None):
+        self.genes = list(genes)
+        self.diseases = list(diseases)
+        self.risk_levels = list(risk_levels)
+        self.prevalences = list(prevalences)
+        self.descriptions = list(descriptions)
+
+        # Upper-cased pattern -> catalog rows it identifies
+        patterns = {}
+        for row, gene in enumerate(self.genes):
+            patterns.setdefault(gene.upper(), []).append(row)
+        for row, rsids in enumerate(variants or []):
+            for rsid in rsids:
+                patterns.setdefault(rsid.upper(), []).append(row)
+        self._pattern_rows = list(patterns.values())
+        self._compile(list(patterns))
+
+    def _compile(self, patterns):
+        """Build the Aho-Corasick goto, failure and output tables"""
+        goto = [{}]
+        out = [[]]
+        for pattern_id, pattern in enumerate(patterns):
+            state = 0
+            for ch in pattern:
+                if ch not in goto[state]:
+                    goto.append({})
+                    out.append([])
+                    goto[state][ch] = len(goto) - 1
+                state = goto[state][ch]
+            out[state].append((len(pattern), pattern_id))
+
+        fail = [0] * len(goto)
+        # Depth-one states fail back to the root
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, child in goto[state].items():
+                queue.append(child)
+                fallback = fail[state]
+                while fallback and ch not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[child] = goto[fallback].get(ch, 0)
+                out[child] = out[child] + out[fail[child]]
+
+        self._goto = goto
+        self._fail = fail
+        self._out = out
+        self._max_length = max((len(p) for p in patterns), default=0)
+
+    @classmethod
+    def from_frame(cls, frame):
+        """Compile a matcher from a DataFrame shaped like load_genetic_disease_data()
+
+        An optional ``rsIDs`` column holding lists of variant identifiers adds
+        those identifiers as patterns for their row.
+        """
+        return cls(
+            frame['Gene'].tolist(), frame['Associated_Disease'].tolist(), frame['Risk_Level'].tolist(),
+            frame['Prevalence'].tolist(), frame['Description'].tolist(),
+            variants=frame['rsIDs'].tolist() if 'rsIDs' in frame else None
+        )
+
+    def __len__(self):
+        return len(self.genes)
+
+    @cached_property
+    def version(self):
+        """Content hash of the genetic catalog, used to invalidate derived caches"""
+        return array_fingerprint([self.genes, self.diseases, self.risk_levels, self.prevalences, self.descriptions])
+
+    def scanner(self):
+        """Return a GeneScanner that can be fed the input in consecutive pieces"""
+        return GeneScanner(self)
+
+    def match(self, genetic_input):
+        """Return the catalog rows, in catalog order, whose gene appears in ``genetic_input``"""
+        scanner = self.scanner()
+        scanner.feed(genetic_input)
+        return scanner.finish()
+
+    def match_stream(self, pieces):
+        """Like match(), for input delivered as an iterable of text pieces"""
+        scanner = self.scanner()
+        for piece in pieces:
+            scanner.feed(piece)
+        return scanner.finish()
+
+    def result(self, row):
+        """Build the result dict returned by analyze_genetic_markers"""
+        return {
+            'Gene': self.genes[row],
+            'Disease': self.diseases[row],
+            'Risk_Level': self.risk_levels[row],
+            'Prevalence': self.prevalences[row],
+            'Description': self.descriptions[row]
+        }
+
+    def results(self, rows):
+        """GeneticResults for the matched ``rows``"""
+        return GeneticResults(self, rows)
+
+    def gene_names(self, rows):
+        """Return the gene names of the matched ``rows``"""
+        return [self.genes[row] for row in rows]
+
+
+class GeneScanner:
+    """Incremental Aho-Corasick scan over text delivered in chunks
+
+    Automaton state and the token-boundary context are carried between
+    feed() calls, so markers split across chunk boundaries are still found.
+    """
+
+    def __init__(self, matcher):
+        self.matcher = matcher
+        self._state = 0
+        # Token flags of the last characters seen, enough to check the start
+        # boundary of the longest pattern
+        self._tail = []
+        self._pending = []
+        self._found = set()
+
+    def feed(self, text):
+        """Scan the next piece of input"""
+        goto, fail, out = self.matcher._goto, self.matcher._fail, self.matcher._out
+        text = text.upper()
+        flags = self._tail + [_is_token_char(ch) for ch in text]
+        offset = len(self._tail)
+        state = self._state
+        pending = self._pending
+        found = self._found
+
+        for i, ch in enumerate(text):
+            position = offset + i
+            if pending:
+                # Matches ending on the previous character need a boundary here
+                if not flags[position]:
+                    found.update(pending)
+                pending = []
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for length, pattern_id in out[state]:
+                start = position - length + 1
+                if start == 0 or not flags[start - 1]:
+                    pending.append(pattern_id)
+
+        self._state = state
+        self._pending = pending
+        self._tail = flags[-self.matcher._max_length:] if self.matcher._max_length else []
+
+    def finish(self):
+        """Return the matched catalog rows in catalog order"""
+        self._found.update(self._pending)
+        self._pending = []
+        rows = {row for pattern_id in self._found for row in self.matcher._pattern_rows[pattern_id]}
+        return sorted(rows)
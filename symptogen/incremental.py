@@ -0,0 +1,98 @@
+"""Incremental symptom scoring for interactive sessions
+
+A checklist session changes its symptom set one symptom at a time.
+IncrementalScorer keeps the per-disease intersection counts of the current
+set, so adding or removing a symptom only touches that symptom's posting
+list and the live top-k can be refreshed on every toggle.  Rankings are
+identical to SymptomIndex.top_k() over the same set; with a weighted
+scoring model the weight sums are accumulated in toggle order, so scores can
+differ from a full recompute in the last bits.
+"""
+import numpy as np
+
+from symptogen import metrics
+from symptogen.results import SymptomResults
+from symptogen.scoring import get_model
+
+
+class IncrementalScorer:
+    """Intersection counts of one evolving symptom set against a SymptomIndex"""
+
+    def __init__(self, symptom_index, model=None):
+        self.index = symptom_index
+        self.model = get_model(model)
+        self.compiled = self.model.compile(symptom_index)
+        self.counts = np.zeros(len(symptom_index), dtype=np.int32)
+        # Weighted intersections, for weighted models only
+        self.totals = np.zeros(len(symptom_index)) if self.compiled.weighted else None
+        self.symptoms = set()
+        # Sorted rows with a non-zero count
+        self._candidates = np.empty(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.symptoms)
+
+    def add(self, symptom):
+        """Add ``symptom`` to the set; returns False if it was already present"""
+        if symptom in self.symptoms:
+            return False
+        self.symptoms.add(symptom)
+        symptom_id = self.index.symptom_ids.get(symptom)
+        if symptom_id is not None:
+            rows = self.index.postings(symptom_id)
+            self.counts[rows] += 1
+            if self.totals is not None:
+                self.totals[rows] += self.compiled.symptom_weights[symptom_id]
+            new = rows[self.counts[rows] == 1]
+            if len(new):
+                self._candidates = np.union1d(self._candidates, new.astype(np.int64))
+        metrics.count('incremental_updates')
+        return True
+
+    def remove(self, symptom):
+        """Remove ``symptom`` from the set; returns False if it was not present"""
+        if symptom not in self.symptoms:
+            return False
+        self.symptoms.discard(symptom)
+        symptom_id = self.index.symptom_ids.get(symptom)
+        if symptom_id is not None:
+            rows = self.index.postings(symptom_id)
+            self.counts[rows] -= 1
+            if self.totals is not None:
+                self.totals[rows] -= self.compiled.symptom_weights[symptom_id]
+            dropped = rows[self.counts[rows] == 0]
+            if len(dropped):
+                if self.totals is not None:
+                    # Drop the rounding residue along with the row
+                    self.totals[dropped] = 0
+                self._candidates = np.setdiff1d(self._candidates, dropped, assume_unique=True)
+        metrics.count('incremental_updates')
+        return True
+
+    def update(self, symptoms):
+        """Bring the set in line with ``symptoms``, applying only the differences"""
+        target = set(symptoms)
+        for symptom in self.symptoms - target:
+            self.remove(symptom)
+        for symptom in target - self.symptoms:
+            self.add(symptom)
+
+    def clear(self):
+        self.counts[:] = 0
+        if self.totals is not None:
+            self.totals[:] = 0
+        self.symptoms.clear()
+        self._candidates = np.empty(0, dtype=np.int64)
+
+    def top_k(self, k=10):
+        """SymptomResults for the ``k`` best scoring diseases of the current set"""
+        if k <= 0 or len(self._candidates) == 0:
+            return SymptomResults.empty(self.index)
+        with metrics.timer('score'):
+            ids = np.array(sorted(self.index.symptom_ids[s] for s in self.symptoms if s in self.index.symptom_ids),
+                           dtype=np.int64)
+            rows = self._candidates
+            intersections = (self.counts if self.totals is None else self.totals)[rows]
+            user_total = self.compiled.user_total(ids, len(self.symptoms))
+            rows, scores = self.index._select_top_k(rows, intersections, user_total, k, self.compiled)
+            return SymptomResults.from_rows(self.index, rows, scores, ids)
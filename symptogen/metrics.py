@@ -0,0 +1,192 @@
+"""Lightweight stage timers and counters for the analysis hot paths
+
+Instrumented code calls ``timer(stage)`` and ``count(name)`` from this
+module.  Both are no-ops unless metrics are enabled, either process-wide
+(``SYMPTOGEN_METRICS=1`` or ``METRICS.enable()``) or for the current thread
+inside a ``METRICS.run()`` block, so the disabled cost is one attribute check.
+
+Stages used by SymptoGen::
+
+    catalog_load   building or opening the catalogs
+    normalize      resolving and interning user symptoms
+    score          ranking diseases for a symptom query
+    gene_match     matching gene names in genetic input
+    report         generate_report()
+    render         drawing the results tabs in the app
+
+Totals can be exported as Prometheus text or JSON; a run records the
+per-stage breakdown of one analysis, e.g. for the app's debug panel.
+"""
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+_PREFIX = 'symptogen'
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class RunMetrics:
+    """Per-stage seconds and counters of a single analysis run"""
+
+    def __init__(self):
+        self.stages = defaultdict(float)
+        self.counters = defaultdict(int)
+        self.started = time.perf_counter()
+        self.seconds = None
+
+    def merge(self, other):
+        """Add the stages and counters of ``other`` to this run"""
+        for stage, seconds in other.stages.items():
+            self.stages[stage] += seconds
+        for name, n in other.counters.items():
+            self.counters[name] += n
+        return self
+
+    def as_dict(self):
+        return {
+            'seconds': self.seconds,
+            'stages': dict(self.stages),
+            'counters': dict(self.counters)
+        }
+
+
+class Metrics:
+    """Process-wide timer and counter registry"""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.last_run = None
+        self._stage_seconds = defaultdict(float)
+        self._stage_calls = defaultdict(int)
+        self._counters = defaultdict(int)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+
+    def _run(self):
+        return getattr(self._local, 'run', None)
+
+    def current_run(self):
+        """The RunMetrics being recorded on this thread, or None"""
+        return self._run()
+
+    def active(self):
+        """Whether anything is being recorded on this thread"""
+        return self.enabled or self._run() is not None
+
+    def timer(self, stage):
+        """Context manager adding its wall time to ``stage``"""
+        if not self.enabled and self._run() is None:
+            return _NULL_TIMER
+        return _Timer(self, stage)
+
+    def observe(self, stage, seconds):
+        """Add ``seconds`` to ``stage``"""
+        run = self._run()
+        if run is not None:
+            run.stages[stage] += seconds
+        if self.enabled:
+            with self._lock:
+                self._stage_seconds[stage] += seconds
+                self._stage_calls[stage] += 1
+
+    def count(self, name, n=1):
+        """Add ``n`` to the counter ``name``"""
+        run = self._run()
+        if run is not None:
+            run.counters[name] += n
+        if self.enabled:
+            with self._lock:
+                self._counters[name] += n
+
+    @contextmanager
+    def run(self):
+        """Record the stages of one analysis on this thread; kept as ``last_run`` afterwards"""
+        run = RunMetrics()
+        previous = self._run()
+        self._local.run = run
+        try:
+            yield run
+        finally:
+            run.seconds = time.perf_counter() - run.started
+            self._local.run = previous
+            self.last_run = run
+
+    def reset(self):
+        with self._lock:
+            self._stage_seconds.clear()
+            self._stage_calls.clear()
+            self._counters.clear()
+
+    def snapshot(self):
+        """Return the process totals as a dict"""
+        with self._lock:
+            return {
+                'stages': {
+                    stage: {'seconds': seconds, 'calls': self._stage_calls[stage]}
+                    for stage, seconds in self._stage_seconds.items()
+                },
+                'counters': dict(self._counters)
+            }
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2, sort_keys=True)
+
+    def to_prometheus(self, extra_gauges=None):
+        """Return the totals in the Prometheus text exposition format"""
+        snapshot = self.snapshot()
+        lines = [
+            f'# TYPE {_PREFIX}_stage_seconds_total counter',
+            *(f'{_PREFIX}_stage_seconds_total{{stage="{stage}"}} {values["seconds"]:.9f}'
+              for stage, values in sorted(snapshot['stages'].items())),
+            f'# TYPE {_PREFIX}_stage_calls_total counter',
+            *(f'{_PREFIX}_stage_calls_total{{stage="{stage}"}} {values["calls"]}'
+              for stage, values in sorted(snapshot['stages'].items())),
+        ]
+        for name, value in sorted(snapshot['counters'].items()):
+            lines += [f'# TYPE {_PREFIX}_{name}_total counter', f'{_PREFIX}_{name}_total {value}']
+        for name, value in sorted((extra_gauges or {}).items()):
+            lines += [f'# TYPE {_PREFIX}_{name} gauge', f'{_PREFIX}_{name} {value}']
+        return '\n'.join(lines) + '\n'
+
+
+METRICS = Metrics(enabled=os.environ.get('SYMPTOGEN_METRICS', '') not in ('', '0'))
+
+
+def timer(stage):
+    """METRICS.timer(stage)"""
+    return METRICS.timer(stage)
+
+
+def count(name, n=1):
+    """METRICS.count(name, n)"""
+    METRICS.count(name, n)
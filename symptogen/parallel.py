@@ -0,0 +1,119 @@
+"""Multi-core execution of batch symptom and genetic scoring
+
+Patient records are sharded into chunks and scored by a
+``ProcessPoolExecutor``.  The compiled symptom index is written once to a
+temporary directory of ``.npy`` files that every worker memory-maps, so the
+catalog is shared through the OS page cache instead of being pickled into
+each worker.  Results are always yielded in input order.
+"""
+import os
+import shutil
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from symptogen.analyzer import Analyzer
+from symptogen.batch import DEFAULT_CHUNK_SIZE, analyze_chunk
+from symptogen.cohort import aggregate_frame
+from symptogen.engine import SymptomIndex
+
+# Per-worker state installed by _init_worker
+_worker = {}
+
+
+def _init_worker(index_directory, gene_matcher, k, columns, model, report_format, variant_index):
+    # Each worker keeps its own result cache next to the shared index
+    _worker['analyzer'] = Analyzer(SymptomIndex.load(index_directory, mmap_mode='r'), gene_matcher, model=model,
+                                   variant_index=variant_index)
+    _worker['k'] = k
+    _worker['columns'] = columns
+    _worker['report_format'] = report_format
+
+
+def _analyze_in_worker(frame):
+    return analyze_chunk(frame, _worker['analyzer'], _worker['k'], *_worker['columns'],
+                         report_format=_worker['report_format'])
+
+
+def _aggregate_in_worker(frame, k, group_column):
+    _, symptom_column, gene_column = _worker['columns']
+    return aggregate_frame(frame, _worker['analyzer'], k, symptom_column, gene_column, group_column)
+
+
+class ParallelAnalyzer:
+    """Process pool scoring chunks of patient records against a shared catalog
+
+    Use as a context manager::
+
+        with ParallelAnalyzer(index, matcher, workers=8) as analyzer:
+            for records in analyzer.map_frames(read_records(path)):
+                ...
+    """
+
+    def __init__(self, symptom_index, gene_matcher, workers=None, k=10,
+                 id_column='id', symptom_column='symptoms', gene_column='genes', model=None, report_format=None,
+                 variant_index=None):
+        self.symptom_index = symptom_index
+        self.gene_matcher = gene_matcher
+        self.workers = workers or os.cpu_count() or 1
+        self.k = k
+        self.columns = (id_column, symptom_column, gene_column)
+        self.model = model
+        self.report_format = report_format
+        # A loaded VariantIndex pickles as its directory, so workers memory-map it too
+        self.variant_index = variant_index
+        self._directory = None
+        self._executor = None
+
+    def __enter__(self):
+        self._directory = tempfile.mkdtemp(prefix='symptogen-index-')
+        self.symptom_index.save(self._directory)
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self._directory, self.gene_matcher, self.k, self.columns, self.model, self.report_format,
+                      self.variant_index)
+        )
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Shut the pool down and remove the shared index files"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self._directory is not None:
+            shutil.rmtree(self._directory, ignore_errors=True)
+            self._directory = None
+
+    def map_frames(self, frames):
+        """Score DataFrame chunks in parallel, yielding each chunk's records in input order
+
+        At most two chunks per worker are in flight, so memory stays bounded
+        when ``frames`` streams from a large file.
+        """
+        return self._map(_analyze_in_worker, frames)
+
+    def aggregate_frames(self, frames, k=1, group_column=None):
+        """Reduce DataFrame chunks in parallel to cohort aggregates (see symptogen.cohort), in input order"""
+        return self._map(_aggregate_in_worker, frames, k, group_column)
+
+    def _map(self, function, frames, *args):
+        pending = deque()
+        for frame in frames:
+            pending.append(self._executor.submit(function, frame, *args))
+            if len(pending) >= 2 * self.workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+    def analyze(self, symptom_lists, genetic_inputs, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Score aligned lists of symptom lists and gene strings, returning records in input order"""
+        _, symptom_column, gene_column = self.columns
+        frame = pd.DataFrame({symptom_column: list(symptom_lists), gene_column: list(genetic_inputs)})
+        frames = (frame.iloc[start:start + chunk_size] for start in range(0, len(frame), chunk_size))
+        return [record for records in self.map_frames(frames) for record in records]
@@ -0,0 +1,282 @@
+"""Report rendering in Markdown, HTML and JSON
+
+Reports are assembled from precompiled section templates joined once,
+instead of by repeated string concatenation.  A ReportBody renders each
+format lazily, the first time it is asked for, without the "Generated on"
+timestamp; ReportCache keeps bodies per analysis result so identical results
+across sessions or a batch job are rendered only once per format.  Each
+Report served stamps its own timestamp onto the cached body.
+"""
+import json
+from datetime import datetime
+from functools import cached_property
+from html import escape
+
+from symptogen.cache import ResultCache
+from symptogen.results import as_dicts
+
+FORMATS = ('markdown', 'html', 'json')
+
+TOP_PREDICTIONS = 5
+
+DISCLAIMERS = [
+    'Consult with healthcare professionals for proper diagnosis and treatment',
+    'Genetic risk predictions are based on current scientific knowledge and may change',
+    'Individual risk factors may vary significantly',
+    'This tool does not account for family history, lifestyle factors, or other important variables',
+]
+
+RECOMMENDATIONS = [
+    'Discuss these findings with your healthcare provider',
+    'Consider professional genetic counseling if genetic risks are identified',
+    'Maintain regular health check-ups',
+    'Follow evidence-based preventive care guidelines',
+]
+
+EDUCATIONAL_NOTICE = ('This analysis is for educational purposes only and should not be used '
+                      'as a substitute for professional medical advice.')
+
+# Markdown section templates
+
+_MD_TITLE = """
+# SymptoGen Analysis Report
+**Generated on:** """
+
+_MD_HEADER = """
+
+## Symptom Analysis
+**Symptoms Analyzed:** {symptoms}
+
+### Top Disease Predictions:
+"""
+
+_MD_GENETIC_HEADER = """
+## Genetic Analysis
+**Genetic Input:** {genetic_input}
+
+### Genetic Risk Factors:
+"""
+
+_MD_FOOTER = ''.join([
+    '\n## Important Disclaimers\n',
+    f'⚠️ **{EDUCATIONAL_NOTICE}**\n\n',
+    *(f'- {line}\n' for line in DISCLAIMERS),
+    '\n## Recommendations\n',
+    *(f'{i}. {line}\n' for i, line in enumerate(RECOMMENDATIONS, 1)),
+])
+
+# HTML templates
+
+_HTML_PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>SymptoGen Analysis Report</title>
+<style>
+body {{ font-family: Arial, sans-serif; margin: 40px; }}
+h1, h2, h3 {{ color: #333; }}
+.disclaimer {{ background-color: #fff3cd; padding: 15px; border-radius: 5px; border-left: 4px solid #ffc107; margin: 20px 0; }}
+</style>
+</head>
+<body>
+{body}
+</body>
+</html>
+"""
+
+# Everything up to and after the report body
+_HTML_HEAD, _HTML_TAIL = _HTML_PAGE.format(body='\0').split('\0')
+
+_HTML_TITLE = _HTML_HEAD + '<h1>SymptoGen Analysis Report</h1>\n<p><strong>Generated on:</strong> '
+
+_HTML_PREDICTION = """<li><strong>{disease}</strong> (Confidence: {confidence:.1f}%)
+<ul><li>Severity: {severity}</li><li>Matched Symptoms: {matched}</li></ul></li>
+"""
+
+_HTML_RISK = """<li><strong>{gene}</strong>: {disease}
+<ul><li>Risk Level: {risk}</li><li>Prevalence: {prevalence}</li><li>Description: {description}</li></ul></li>
+"""
+
+_HTML_FOOTER = ''.join([
+    '<h2>Important Disclaimers</h2>\n',
+    f'<p class="disclaimer"><strong>{escape(EDUCATIONAL_NOTICE)}</strong></p>\n<ul>\n',
+    *(f'<li>{escape(line)}</li>\n' for line in DISCLAIMERS),
+    '</ul>\n<h2>Recommendations</h2>\n<ol>\n',
+    *(f'<li>{escape(line)}</li>\n' for line in RECOMMENDATIONS),
+    '</ol>\n',
+])
+
+
+class ReportBody:
+    """One analysis result, rendered to each format on first access, everything after the timestamp"""
+
+    def __init__(self, symptom_results, genetic_results, user_symptoms, genetic_input):
+        self.symptom_results = symptom_results
+        self.genetic_results = genetic_results
+        self.user_symptoms = list(user_symptoms or [])
+        self.genetic_input = genetic_input or ''
+
+    @cached_property
+    def markdown(self):
+        parts = [_MD_HEADER.format(
+            symptoms=', '.join(self.user_symptoms) if self.user_symptoms else 'None'
+        )]
+        if self.symptom_results:
+            parts.extend(
+                f"\n{i}. **{r['Disease']}** (Confidence: {r['Confidence']:.1f}%)\n"
+                f"   - Severity: {r['Severity']}\n"
+                f"   - Matched Symptoms: {', '.join(r['Matched_Symptoms'])}\n"
+                for i, r in enumerate(self.symptom_results[:TOP_PREDICTIONS], 1)
+            )
+        else:
+            parts.append("No significant disease matches found based on provided symptoms.\n")
+
+        parts.append(_MD_GENETIC_HEADER.format(genetic_input=self.genetic_input or 'None provided'))
+        if self.genetic_results:
+            parts.extend(
+                f"\n- **{r['Gene']}**: {r['Disease']}\n"
+                f"  - Risk Level: {r['Risk_Level']}\n"
+                f"  - Prevalence: {r['Prevalence']}\n"
+                f"  - Description: {r['Description']}\n"
+                for r in self.genetic_results
+            )
+        else:
+            parts.append("No genetic risk factors identified.\n")
+
+        parts.append(_MD_FOOTER)
+        return ''.join(parts)
+
+    @cached_property
+    def html(self):
+        parts = [
+            '</p>\n',
+            '<h2>Symptom Analysis</h2>\n',
+            f"<p><strong>Symptoms Analyzed:</strong> {escape(', '.join(self.user_symptoms)) or 'None'}</p>\n",
+            '<h3>Top Disease Predictions:</h3>\n',
+        ]
+        if self.symptom_results:
+            parts.append('<ol>\n')
+            parts.extend(
+                _HTML_PREDICTION.format(
+                    disease=escape(r['Disease']), confidence=r['Confidence'], severity=escape(r['Severity']),
+                    matched=escape(', '.join(r['Matched_Symptoms']))
+                )
+                for r in self.symptom_results[:TOP_PREDICTIONS]
+            )
+            parts.append('</ol>\n')
+        else:
+            parts.append('<p>No significant disease matches found based on provided symptoms.</p>\n')
+
+        parts += [
+            '<h2>Genetic Analysis</h2>\n',
+            f"<p><strong>Genetic Input:</strong> {escape(self.genetic_input) or 'None provided'}</p>\n",
+            '<h3>Genetic Risk Factors:</h3>\n',
+        ]
+        if self.genetic_results:
+            parts.append('<ul>\n')
+            parts.extend(
+                _HTML_RISK.format(
+                    gene=escape(r['Gene']), disease=escape(r['Disease']), risk=escape(r['Risk_Level']),
+                    prevalence=escape(r['Prevalence']), description=escape(r['Description'])
+                )
+                for r in self.genetic_results
+            )
+            parts.append('</ul>\n')
+        else:
+            parts.append('<p>No genetic risk factors identified.</p>\n')
+
+        parts += [_HTML_FOOTER, _HTML_TAIL]
+        return ''.join(parts)
+
+    @cached_property
+    def data(self):
+        """The report as a JSON-serializable dict, without ``generated_on``"""
+        return {
+            'user_symptoms': self.user_symptoms,
+            'genetic_input': self.genetic_input,
+            'symptom_results': as_dicts(self.symptom_results),
+            'genetic_results': as_dicts(self.genetic_results),
+            'disclaimers': [EDUCATIONAL_NOTICE] + DISCLAIMERS,
+            'recommendations': RECOMMENDATIONS
+        }
+
+    @cached_property
+    def json(self):
+        return json.dumps(self.data)
+
+
+class Report:
+    """A ReportBody stamped with the time it was generated"""
+
+    def __init__(self, symptom_results, genetic_results, user_symptoms, genetic_input, generated_at=None,
+                 body=None):
+        self.body = body or ReportBody(symptom_results, genetic_results, user_symptoms, genetic_input)
+        self.generated_at = generated_at or datetime.now()
+
+    @property
+    def generated_on(self):
+        return self.generated_at.strftime('%Y-%m-%d %H:%M:%S')
+
+    @cached_property
+    def markdown(self):
+        return _MD_TITLE + self.generated_on + self.body.markdown
+
+    @cached_property
+    def html(self):
+        return _HTML_TITLE + self.generated_on + self.body.html
+
+    @cached_property
+    def data(self):
+        """The report as a JSON-serializable dict"""
+        return {'generated_on': self.generated_on, **self.body.data}
+
+    @cached_property
+    def json(self):
+        # generated_on is the first key, ahead of the cached body
+        return f'{{"generated_on": {json.dumps(self.generated_on)}, {self.body.json[1:]}'
+
+    def render(self, fmt='markdown'):
+        """Return the report in ``fmt``, one of FORMATS"""
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown report format {fmt!r}; choose from {', '.join(FORMATS)}")
+        return getattr(self, fmt)
+
+
+def report_key(symptom_results, genetic_results, user_symptoms, genetic_input, version=None):
+    """Cache key identifying the analysis result a report is rendered from
+
+    ``version`` is the catalog version the results were computed against
+    (Analyzer.version).  Within a catalog, a disease's confidence and the
+    user symptoms determine its matched symptoms, and a gene row determines
+    its risk details; a reloaded catalog may change either.
+    """
+    return (
+        version,
+        tuple((r['Disease'], r['Confidence'], r['Severity']) for r in symptom_results or ()),
+        tuple((r['Gene'], r['Disease'], r['Risk_Level']) for r in genetic_results or ()),
+        tuple(user_symptoms or ()), genetic_input or ''
+    )
+
+
+class ReportCache:
+    """Report bodies memoized per analysis result; the timestamp is not cached"""
+
+    def __init__(self, maxsize=1024):
+        self.cache = ResultCache(maxsize=maxsize)
+
+    def get(self, symptom_results, genetic_results, user_symptoms, genetic_input, generated_at=None, version=None):
+        """Return a Report generated at ``generated_at`` (default: now) over the cached body for an analysis result
+
+        ``version`` is the catalog version of the results (see report_key).
+        """
+        key = report_key(symptom_results, genetic_results, user_symptoms, genetic_input, version)
+        body = self.cache.get_or_compute(
+            key, lambda: ReportBody(symptom_results, genetic_results, user_symptoms, genetic_input)
+        )
+        return Report(symptom_results, genetic_results, user_symptoms, genetic_input, generated_at, body=body)
+
+    def render(self, symptom_results, genetic_results, user_symptoms, genetic_input, fmt='markdown', version=None):
+        return self.get(symptom_results, genetic_results, user_symptoms, genetic_input, version=version).render(fmt)
+
+    def stats(self):
+        return self.cache.stats()
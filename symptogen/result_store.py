@@ -0,0 +1,207 @@
+"""Persistent, deduplicated store of batch results
+
+Nightly batch runs see mostly the same patients as the night before.
+ResultStore keeps every scored record in a local SQLite file under a content
+hash of its normalized inputs (sorted symptom set, gene tokens), the scoring
+options (model, top-k) and the catalog version.  A rerun then scores only
+records whose hash is missing and streams the rest from the store.  Reports
+are not stored; they are stamped and rendered from the stored results (see
+symptogen.report) when the record is served.  Since the catalog version is part of the hash, a catalog update
+simply makes every old entry miss; compact() removes entries of other
+versions and trims the store to its size cap, least recently used first.
+
+Usage::
+
+    python -m symptogen.batch patients.csv results.jsonl --store results.db
+    python -m symptogen.result_store stats results.db
+    python -m symptogen.result_store compact results.db --max-mb 256
+"""
+import argparse
+import hashlib
+import json
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+
+from symptogen.analyzer import gene_query_key
+from symptogen.results import json_default
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# SQLite's default limit on host parameters per statement is 999
+_BATCH = 900
+
+# Fields a stored record does not carry: id and the patient's own symptom
+# spelling come from the record being scored, and the report is rendered
+# from the results when served so it quotes that record and is stamped now
+_UNSTORED_FIELDS = ('id', 'symptoms', 'report')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    version TEXT NOT NULL,
+    payload BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    used INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS results_used ON results (used);
+CREATE TABLE IF NOT EXISTS runs (
+    finished REAL NOT NULL,
+    version TEXT NOT NULL,
+    records INTEGER NOT NULL,
+    skipped INTEGER NOT NULL
+);
+"""
+
+
+def record_key(version, symptoms, genetic_input, model=None, k=10):
+    """Content hash of one record's normalized inputs, scoring options and catalog version"""
+    parts = [version, model, k, sorted(set(symptoms)), gene_query_key(genetic_input)]
+    return hashlib.sha256(json.dumps(parts).encode()).hexdigest()[:32]
+
+
+def encode_record(record):
+    """Compressed JSON of a result record without its id fields and report"""
+    payload = {name: value for name, value in record.items() if name not in _UNSTORED_FIELDS}
+    return zlib.compress(json.dumps(payload, default=json_default).encode())
+
+
+def decode_record(blob):
+    return json.loads(zlib.decompress(blob))
+
+
+class ResultStore:
+    """SQLite-backed map of record hash to scored result, with LRU size capping"""
+
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = str(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._connection.close()
+
+    def get_many(self, keys):
+        """Return {key: payload dict} for the stored ``keys``, marking them as used now"""
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        now = time.time_ns()
+        with self._lock, self._connection:
+            for start in range(0, len(keys), _BATCH):
+                batch = keys[start:start + _BATCH]
+                rows = self._connection.execute(
+                    f"SELECT key, payload FROM results WHERE key IN ({','.join('?' * len(batch))})", batch
+                ).fetchall()
+                found.update((key, decode_record(payload)) for key, payload in rows)
+            self._connection.executemany('UPDATE results SET used = ? WHERE key = ?', [(now, key) for key in found])
+        return found
+
+    def put_many(self, items, version):
+        """Store ``(key, record)`` pairs scored against catalog ``version``"""
+        now = time.time_ns()
+        rows = []
+        for key, record in items:
+            payload = encode_record(record)
+            rows.append((key, version, payload, len(payload), now))
+        with self._lock, self._connection:
+            self._connection.executemany('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)', rows)
+
+    def count(self, hits, misses):
+        """Add one batch's store hits and misses to this run's skip counters"""
+        self.hits += hits
+        self.misses += misses
+
+    def record_run(self, version):
+        """Persist this run's record and skip counts for stats()"""
+        with self._lock, self._connection:
+            self._connection.execute('INSERT INTO runs VALUES (?, ?, ?, ?)',
+                                     (time.time(), version, self.hits + self.misses, self.hits))
+
+    def compact(self, version=None, max_bytes=None):
+        """Drop entries of catalog versions other than ``version``, then the least recently used beyond the size cap
+
+        Returns the number of entries removed; the file is vacuumed when any were.
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        with self._lock:
+            with self._connection:
+                removed = 0
+                if version is not None:
+                    removed += self._connection.execute('DELETE FROM results WHERE version != ?', (version,)).rowcount
+                if max_bytes is not None:
+                    removed += self._connection.execute(
+                        'DELETE FROM results WHERE key IN (SELECT key FROM ('
+                        'SELECT key, SUM(size) OVER (ORDER BY used DESC, key) AS running FROM results'
+                        ') WHERE running > ?)', (max_bytes,)
+                    ).rowcount
+            if removed:
+                self._connection.execute('VACUUM')
+        return removed
+
+    def stats(self):
+        """Entry count and bytes, this run's skip rate and the history of past runs"""
+        with self._lock:
+            entries, size = self._connection.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results').fetchone()
+            versions = self._connection.execute('SELECT COUNT(DISTINCT version) FROM results').fetchone()[0]
+            runs = self._connection.execute(
+                'SELECT finished, version, records, skipped FROM runs ORDER BY finished DESC LIMIT 10'
+            ).fetchall()
+            total_records, total_skipped = self._connection.execute(
+                'SELECT COALESCE(SUM(records), 0), COALESCE(SUM(skipped), 0) FROM runs'
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            'path': self.path,
+            'entries': entries,
+            'bytes': size,
+            'max_bytes': self.max_bytes,
+            'versions': versions,
+            'hits': self.hits,
+            'misses': self.misses,
+            'skip_rate': self.hits / lookups if lookups else 0.0,
+            'lifetime_skip_rate': total_skipped / total_records if total_records else 0.0,
+            'runs': [{'finished': finished, 'version': version, 'records': records, 'skipped': skipped,
+                      'skip_rate': skipped / records if records else 0.0}
+                     for finished, version, records, skipped in runs]
+        }
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m symptogen.result_store',
+                                     description='Inspect or compact a batch result store.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    stats = commands.add_parser('stats', help='print entry counts, size and per-run skip rates as JSON')
+    stats.add_argument('path')
+    compact = commands.add_parser('compact', help='drop stale versions and trim to a size cap')
+    compact.add_argument('path')
+    compact.add_argument('--max-mb', type=float, default=DEFAULT_MAX_BYTES / 1024 / 1024)
+    compact.add_argument('--version', help='keep only entries of this catalog version')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    max_bytes = int(args.max_mb * 1024 * 1024) if args.command == 'compact' else DEFAULT_MAX_BYTES
+    with ResultStore(args.path, max_bytes=max_bytes) as store:
+        if args.command == 'compact':
+            removed = store.compact(args.version)
+            print(f"Removed {removed} entries", file=sys.stderr)
+        print(json.dumps(store.stats(), indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,235 @@
+"""Compact, column-oriented analysis results
+
+analyze_symptoms and analyze_genetic_markers used to return lists of dicts,
+each carrying its own copies of the disease name, severity and a list of
+matched symptom names.  Kept in st.session_state for every session, in the
+result cache and across batch chunks, that is hundreds of bytes per result.
+
+SymptomResults and GeneticResults instead hold the interned catalog rows,
+a float score column and, for symptoms, one bitmask per result over the
+disease's own symptom list (bit j set when its j-th symptom was matched).
+Names are looked up in the shared catalog arrays only when a result is read.
+
+Both types are read-only sequences of result dicts, so code indexing them
+like the old lists keeps working; to_dicts() and to_frame() convert at the
+display and report boundary, and json_default() lets json.dumps serialize
+them.  Pickling (e.g. from batch worker processes) ships only the catalog
+rows the results refer to, not the whole catalog.
+"""
+from collections.abc import Sequence
+
+import numpy as np
+import pandas as pd
+
+SYMPTOM_COLUMNS = ('Disease', 'Confidence', 'Severity', 'Matched_Symptoms')
+GENETIC_COLUMNS = ('Gene', 'Disease', 'Risk_Level', 'Prevalence', 'Description')
+
+
+def match_masks(symptom_index, rows, symptom_ids, row_groups=None, id_groups=None):
+    """Bitmask per row over its own symptom list, bit j set when its j-th symptom is in ``symptom_ids``
+
+    For several queries at once, ``row_groups`` and ``id_groups`` give the
+    query each row and each symptom id belongs to.  Returns a (rows, words)
+    uint64 array, wide enough for the longest symptom list among ``rows``.
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    indptr = symptom_index.indptr
+    starts = np.asarray(indptr[rows], dtype=np.int64)
+    lengths = np.asarray(indptr[rows + 1], dtype=np.int64) - starts
+    words = max(1, -(-int(lengths.max(initial=0)) // 64))
+    masks = np.zeros((len(rows), words), dtype=np.uint64)
+    if not lengths.sum():
+        return masks
+    result_ids = np.repeat(np.arange(len(rows)), lengths)
+    positions = np.arange(len(result_ids)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    entries = np.asarray(symptom_index.indices[starts[result_ids] + positions], dtype=np.int64)
+    query = np.asarray(symptom_ids, dtype=np.int64)
+    if row_groups is not None:
+        # Match (query, symptom id) pairs rather than bare ids
+        width = len(symptom_index.vocabulary)
+        entries = np.asarray(row_groups, dtype=np.int64)[result_ids] * width + entries
+        query = np.asarray(id_groups, dtype=np.int64) * width + query
+    hit = np.isin(entries, query)
+    result_ids, positions = result_ids[hit], positions[hit]
+    np.bitwise_or.at(masks, (result_ids, positions // 64),
+                     np.left_shift(np.uint64(1), (positions % 64).astype(np.uint64)))
+    return masks
+
+
+class _CompactResults(Sequence):
+    """Rows into a shared catalog, exposed as a read-only sequence of result dicts"""
+
+    __slots__ = ()
+    columns = ()
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return self._take(np.arange(len(self))[item])
+        if item < 0:
+            item += len(self)
+        if not 0 <= item < len(self):
+            raise IndexError('result index out of range')
+        return self._record(item)
+
+    def __eq__(self, other):
+        if isinstance(other, (_CompactResults, list, tuple)):
+            return self.to_dicts() == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.to_dicts()!r})'
+
+    def to_dicts(self):
+        """The results as the list of dicts analysis functions used to return"""
+        return [self._record(i) for i in range(len(self))]
+
+    def to_frame(self):
+        """The results as a DataFrame, one row per result"""
+        return pd.DataFrame(self.to_dicts(), columns=list(self.columns))
+
+
+class SymptomResults(_CompactResults):
+    """Ranked disease predictions: catalog rows, scores and matched-symptom bitmasks"""
+
+    __slots__ = ('catalog', 'rows', 'scores', 'masks')
+    columns = SYMPTOM_COLUMNS
+
+    def __init__(self, catalog, rows, scores, masks):
+        # ``catalog`` is a SymptomIndex, or a _CatalogSlice once unpickled
+        self.catalog = catalog
+        self.rows = rows
+        self.scores = scores
+        self.masks = masks
+
+    @classmethod
+    def from_rows(cls, symptom_index, rows, scores, symptom_ids):
+        """Results for ``rows`` ranked with ``scores`` against the interned query ``symptom_ids``"""
+        rows = np.asarray(rows, dtype=np.int32)
+        masks = match_masks(symptom_index, rows, symptom_ids)
+        return cls(symptom_index, rows, np.asarray(scores, dtype=np.float64), masks)
+
+    @classmethod
+    def empty(cls, symptom_index):
+        return cls(symptom_index, np.empty(0, dtype=np.int32), np.empty(0), np.zeros((0, 1), dtype=np.uint64))
+
+    def _take(self, positions):
+        return SymptomResults(self.catalog, self.rows[positions], self.scores[positions], self.masks[positions])
+
+    def matched_symptoms(self, i):
+        """Matched symptom names of result ``i``, in the disease's own order"""
+        catalog = self.catalog
+        row = self.rows[i]
+        symptom_ids = catalog.indices[catalog.indptr[row]:catalog.indptr[row + 1]]
+        positions = np.arange(len(symptom_ids))
+        bits = (self.masks[i][positions // 64] >> (positions % 64).astype(np.uint64)) & np.uint64(1)
+        return [catalog.vocabulary[j] for j in symptom_ids[bits.astype(bool)]]
+
+    def _record(self, i):
+        row = self.rows[i]
+        return {
+            'Disease': str(self.catalog.diseases[row]),
+            'Confidence': float(self.scores[i]),
+            'Severity': str(self.catalog.severities[row]),
+            'Matched_Symptoms': self.matched_symptoms(i)
+        }
+
+    @property
+    def diseases(self):
+        return [str(self.catalog.diseases[row]) for row in self.rows]
+
+    @property
+    def nbytes(self):
+        """Bytes held by this result set itself; the catalog is shared"""
+        return self.rows.nbytes + self.scores.nbytes + self.masks.nbytes
+
+    def __reduce__(self):
+        catalog, rows = _CatalogSlice.of(self.catalog, self.rows)
+        return SymptomResults, (catalog, rows, self.scores, self.masks)
+
+
+class _CatalogSlice:
+    """The few SymptomIndex rows a pickled SymptomResults refers to"""
+
+    __slots__ = ('diseases', 'severities', 'indptr', 'indices', 'vocabulary')
+
+    def __init__(self, diseases, severities, indptr, indices, vocabulary):
+        self.diseases = diseases
+        self.severities = severities
+        self.indptr = indptr
+        self.indices = indices
+        self.vocabulary = vocabulary
+
+    @classmethod
+    def of(cls, catalog, rows):
+        """Slice ``catalog`` down to ``rows``; returns the slice and the rows renumbered into it"""
+        unique_rows, local_rows = np.unique(rows, return_inverse=True)
+        starts = np.asarray(catalog.indptr[unique_rows], dtype=np.int64)
+        stops = np.asarray(catalog.indptr[unique_rows + 1], dtype=np.int64)
+        lengths = stops - starts
+        indptr = np.concatenate([[0], np.cumsum(lengths)])
+        entries = np.concatenate([np.arange(start, stop) for start, stop in zip(starts, stops)]) if len(starts) else \
+            np.empty(0, dtype=np.int64)
+        used, indices = np.unique(np.asarray(catalog.indices)[entries], return_inverse=True)
+        vocabulary = [catalog.vocabulary[i] for i in used]
+        diseases = np.array([str(catalog.diseases[row]) for row in unique_rows], dtype=str)
+        severities = np.array([str(catalog.severities[row]) for row in unique_rows], dtype=str)
+        return cls(diseases, severities, indptr, indices.ravel(), vocabulary), local_rows.ravel().astype(np.int32)
+
+    def __reduce__(self):
+        return _CatalogSlice, (self.diseases, self.severities, self.indptr, self.indices, self.vocabulary)
+
+
+class GeneticResults(_CompactResults):
+    """Matched genetic risk factors: rows into a GeneMatcher's catalog columns"""
+
+    __slots__ = ('catalog', 'rows')
+    columns = GENETIC_COLUMNS
+
+    def __init__(self, catalog, rows):
+        # ``catalog`` is a GeneMatcher, or a _GeneSlice once unpickled
+        self.catalog = catalog
+        self.rows = np.asarray(rows, dtype=np.int32)
+
+    def _take(self, positions):
+        return GeneticResults(self.catalog, self.rows[positions])
+
+    def _record(self, i):
+        return self.catalog.result(self.rows[i])
+
+    @property
+    def nbytes(self):
+        return self.rows.nbytes
+
+    def __reduce__(self):
+        return GeneticResults, (_GeneSlice([self.catalog.result(row) for row in self.rows]),
+                                np.arange(len(self.rows), dtype=np.int32))
+
+
+class _GeneSlice:
+    """The GeneMatcher rows a pickled GeneticResults refers to"""
+
+    __slots__ = ('records',)
+
+    def __init__(self, records):
+        self.records = records
+
+    def result(self, row):
+        return dict(self.records[row])
+
+    def __reduce__(self):
+        return _GeneSlice, (self.records,)
+
+
+def as_dicts(results):
+    """List of result dicts for compact results or an existing list"""
+    return results.to_dicts() if isinstance(results, _CompactResults) else results
+
+
+def json_default(obj):
+    """``default=`` hook for json.dumps that serializes compact results as lists of dicts"""
+    if isinstance(obj, _CompactResults):
+        return obj.to_dicts()
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
@@ -0,0 +1,184 @@
+"""Pluggable symptom scoring models
+
+The match score blends a Jaccard term and a match bonus::
+
+    score = (J * jaccard_weight + I / D * match_bonus_weight) * 100 * prior
+    J     = I / (U + D - I)
+
+With every symptom weighing 1 (the default ``blend`` model), I, U and D are
+the sizes of the intersection, the user set and the disease's symptom set,
+which is exactly calculate_symptom_match_score.  A model may instead give
+each symptom a weight, e.g. its inverse document frequency across the
+catalog, so that "loss_of_taste" counts for more than "fatigue"; I, U and D
+then become weight sums.  Severity priors scale a disease's final score.
+
+Models are compiled once per catalog version into per-symptom and
+per-disease arrays, so scoring stays one sparse matrix-vector product.
+"""
+import numpy as np
+
+# Blend used by calculate_symptom_match_score
+JACCARD_WEIGHT = 0.6
+MATCH_BONUS_WEIGHT = 0.4
+
+# Compiled catalog versions kept per model; old ones only serve in-flight
+# queries after a catalog swap
+MAX_COMPILED_VERSIONS = 2
+
+# Severity multipliers used by the ``idf_severity`` model
+DEFAULT_SEVERITY_PRIORS = {'High': 1.0, 'Medium': 0.95, 'Low': 0.9}
+
+
+def match_scores(intersection, n_user, disease_sizes,
+                 jaccard_weight=JACCARD_WEIGHT, match_bonus_weight=MATCH_BONUS_WEIGHT):
+    """Vectorized equivalent of calculate_symptom_match_score
+
+    ``intersection`` and ``disease_sizes`` are integer arrays aligned per
+    disease and ``n_user`` is the size of the (deduplicated) user symptom set,
+    either a scalar or an array aligned with the other two.  The arithmetic
+    is performed in the same order as the scalar version so the results are
+    bit-for-bit identical.  Weighted models pass weight sums instead of sizes.
+    """
+    intersection = np.asarray(intersection, dtype=np.float64)
+    disease_sizes = np.asarray(disease_sizes, dtype=np.float64)
+
+    union = n_user + disease_sizes - intersection
+    with np.errstate(divide='ignore', invalid='ignore'):
+        jaccard_score = np.where(union > 0, intersection / union, 0.0)
+        match_bonus = np.where(disease_sizes > 0, intersection / disease_sizes, 0.0)
+
+    return (jaccard_score * jaccard_weight + match_bonus * match_bonus_weight) * 100
+
+
+def score_upper_bounds(n_user, disease_sizes,
+                       jaccard_weight=JACCARD_WEIGHT, match_bonus_weight=MATCH_BONUS_WEIGHT):
+    """Best score reachable by diseases of the given sizes against ``n_user`` symptoms
+
+    The score grows with the intersection, which is at most
+    ``min(n_user, disease_size)``, so this bounds every disease of that size.
+    """
+    disease_sizes = np.asarray(disease_sizes)
+    return match_scores(np.minimum(n_user, disease_sizes), n_user, disease_sizes,
+                        jaccard_weight, match_bonus_weight)
+
+
+def idf_weights(symptom_index):
+    """Smoothed inverse document frequency of every symptom id in the catalog"""
+    document_frequency = np.diff(np.asarray(symptom_index.posting_indptr))
+    return np.log((1 + len(symptom_index)) / (1 + document_frequency)) + 1
+
+
+class ScoringModel:
+    """Symptom weights, severity priors and blend weights of the match score
+
+    ``symptom_weights`` is None (every symptom weighs 1), ``'idf'``, a dict
+    of symptom -> weight (missing symptoms weigh 1) or a callable returning
+    one weight per symptom id of a SymptomIndex.
+    """
+
+    def __init__(self, name='blend', symptom_weights=None, severity_priors=None,
+                 jaccard_weight=JACCARD_WEIGHT, match_bonus_weight=MATCH_BONUS_WEIGHT):
+        self.name = name
+        self.symptom_weights = symptom_weights
+        self.severity_priors = severity_priors
+        self.jaccard_weight = jaccard_weight
+        self.match_bonus_weight = match_bonus_weight
+        self._compiled = {}
+
+    def __repr__(self):
+        return f'ScoringModel({self.name!r})'
+
+    def __getstate__(self):
+        # Compiled arrays are rebuilt where the model is used
+        return dict(self.__dict__, _compiled={})
+
+    def compile(self, symptom_index):
+        """Return the model's arrays for ``symptom_index``, computed once per catalog version"""
+        compiled = self._compiled.get(symptom_index.version)
+        if compiled is None:
+            compiled = CompiledModel(self, symptom_index)
+            compiled_versions = dict(self._compiled)
+            compiled_versions[symptom_index.version] = compiled
+            while len(compiled_versions) > MAX_COMPILED_VERSIONS:
+                del compiled_versions[next(iter(compiled_versions))]
+            # Swapped in whole so concurrent lookups never see a half-pruned dict
+            self._compiled = compiled_versions
+        return compiled
+
+    def weight_array(self, symptom_index):
+        """One weight per symptom id, or None when every symptom weighs 1"""
+        weights = self.symptom_weights
+        if weights is None:
+            return None
+        if isinstance(weights, str):
+            if weights != 'idf':
+                raise ValueError(f"Unknown symptom weighting {weights!r}")
+            return idf_weights(symptom_index)
+        if isinstance(weights, dict):
+            return np.array([float(weights.get(s, 1.0)) for s in symptom_index.vocabulary])
+        return np.asarray(weights(symptom_index), dtype=np.float64)
+
+
+class CompiledModel:
+    """A ScoringModel's per-symptom and per-disease arrays for one catalog"""
+
+    def __init__(self, model, symptom_index):
+        self.jaccard_weight = model.jaccard_weight
+        self.match_bonus_weight = model.match_bonus_weight
+        self.symptom_weights = model.weight_array(symptom_index)
+        if self.symptom_weights is None:
+            self.disease_totals = symptom_index.disease_sizes
+            # Unrecognized user symptoms count like a symptom no disease lists
+            self.unknown_weight = 1
+        else:
+            # Row sums of the weighted incidence matrix
+            entry_rows = np.repeat(np.arange(len(symptom_index)), symptom_index.disease_sizes)
+            self.disease_totals = np.bincount(
+                entry_rows, weights=self.symptom_weights[symptom_index.indices], minlength=len(symptom_index)
+            )
+            self.unknown_weight = float(np.log(1 + len(symptom_index)) + 1) if isinstance(model.symptom_weights, str) else 1.0
+        self.priors = None
+        if model.severity_priors is not None:
+            self.priors = np.array([float(model.severity_priors.get(str(s), 1.0)) for s in symptom_index.severities])
+
+    @property
+    def weighted(self):
+        return self.symptom_weights is not None
+
+    def user_total(self, symptom_ids, n_user):
+        """Size (or weight) of the user set: known ids plus unrecognized symptoms"""
+        if self.symptom_weights is None:
+            return n_user
+        return float(self.symptom_weights[symptom_ids].sum()) + (n_user - len(symptom_ids)) * self.unknown_weight
+
+    def scores(self, intersection, user_total, rows):
+        """Scores of disease ``rows`` given their intersection with the user set"""
+        scores = match_scores(intersection, user_total, self.disease_totals[rows],
+                              self.jaccard_weight, self.match_bonus_weight)
+        return scores if self.priors is None else scores * self.priors[rows]
+
+    def upper_bounds(self, user_total, rows):
+        """Best score each of ``rows`` could reach against ``user_total``"""
+        bounds = score_upper_bounds(user_total, self.disease_totals[rows], self.jaccard_weight, self.match_bonus_weight)
+        return bounds if self.priors is None else bounds * self.priors[rows]
+
+
+BLEND = ScoringModel()
+
+MODELS = {
+    'blend': BLEND,
+    'idf': ScoringModel('idf', symptom_weights='idf'),
+    'idf_severity': ScoringModel('idf_severity', symptom_weights='idf', severity_priors=DEFAULT_SEVERITY_PRIORS),
+}
+
+
+def get_model(model=None):
+    """Resolve a model name (or None, for the default blend) to a ScoringModel"""
+    if model is None:
+        return BLEND
+    if isinstance(model, ScoringModel):
+        return model
+    try:
+        return MODELS[model]
+    except KeyError:
+        raise ValueError(f"Unknown scoring model {model!r}; choose from {', '.join(MODELS)}") from None
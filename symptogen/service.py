@@ -0,0 +1,343 @@
+"""Headless asyncio HTTP scoring service
+
+Exposes the scoring core over a small JSON/HTTP API without Streamlit::
+
+    GET  /health               catalog version (and generation, when watching a data directory)
+    GET  /stats                result cache, request batching, catalog and stage timing counters
+    GET  /metrics              the same counters as Prometheus text
+    POST /analyze/symptoms     {"symptoms": [...], "k": 10}
+    POST /analyze/genetics     {"genetic_input": "BRCA1, APOE"}
+    POST /analyze              both of the above in one request
+    POST /report               {"symptom_results", "genetic_results", "user_symptoms", "genetic_input",
+                                "format": "markdown" | "html" | "json"}
+
+Symptom requests arriving within ``max_delay`` seconds of each other are
+coalesced into a single vectorized Analyzer.analyze_symptoms_batch() call.
+
+Usage::
+
+    python -m symptogen.service --port 8080
+    python -m symptogen.service --port 8080 --watch ./data
+
+Without an explicit analyzer every request uses the process-wide one, so
+catalogs swapped in by symptogen.catalog_manager take effect immediately.
+
+For tests, InProcessClient drives the same request handling without sockets.
+"""
+import argparse
+import asyncio
+import json
+import sys
+from collections import defaultdict
+
+from symptogen import metrics
+from symptogen.core import generate_report, get_analyzer, get_catalog_manager, watch_catalog
+from symptogen.report import FORMATS as REPORT_FORMATS
+from symptogen.results import json_default
+
+DEFAULT_MAX_DELAY = 0.005
+DEFAULT_MAX_BATCH = 256
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+
+class RequestError(Exception):
+    """Client error reported back as a JSON error response"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class SymptomBatcher:
+    """Coalesces concurrent symptom queries into vectorized batch calls"""
+
+    def __init__(self, analyzer=None, max_delay=DEFAULT_MAX_DELAY, max_batch=DEFAULT_MAX_BATCH):
+        self._analyzer = analyzer
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+        self.batches = 0
+        self.requests = 0
+        self._queue = None
+        self._worker = None
+
+    @property
+    def analyzer(self):
+        return self._analyzer or get_analyzer()
+
+    async def submit(self, symptoms, k):
+        """Queue one query and wait for its results"""
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((symptoms, k, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self._queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(pending) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    pending.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            by_k = defaultdict(list)
+            for item in pending:
+                by_k[item[1]].append(item)
+            # One catalog for the whole batch, even if a swap lands meanwhile
+            analyzer = self.analyzer
+            for k, items in by_k.items():
+                try:
+                    results = await loop.run_in_executor(
+                        None, analyzer.analyze_symptoms_batch, [symptoms for symptoms, _, _ in items], k
+                    )
+                except Exception as exc:
+                    for _, _, future in items:
+                        if not future.done():
+                            future.set_exception(exc)
+                    continue
+                for (_, _, future), result in zip(items, results):
+                    if not future.done():
+                        future.set_result(result)
+                self.batches += 1
+                self.requests += len(items)
+
+    async def close(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    def stats(self):
+        return {
+            'requests': self.requests,
+            'batches': self.batches,
+            'mean_batch_size': self.requests / self.batches if self.batches else 0.0
+        }
+
+
+def _symptom_list(payload):
+    symptoms = payload.get('symptoms', [])
+    if isinstance(symptoms, str):
+        symptoms = symptoms.split(',')
+    if not isinstance(symptoms, list) or not all(isinstance(s, str) for s in symptoms):
+        raise RequestError(400, "'symptoms' must be a list of strings")
+    return symptoms
+
+
+def _top_k(payload):
+    k = payload.get('k', 10)
+    # bool is an int subclass, but true/false is not a count
+    if isinstance(k, bool) or not isinstance(k, int) or k < 0:
+        raise RequestError(400, "'k' must be a non-negative integer")
+    return k
+
+
+class ScoringService:
+    """JSON request handling on top of the scoring core"""
+
+    def __init__(self, analyzer=None, max_delay=DEFAULT_MAX_DELAY, max_batch=DEFAULT_MAX_BATCH):
+        self._analyzer = analyzer
+        self.batcher = SymptomBatcher(analyzer, max_delay, max_batch)
+        self._routes = {
+            ('GET', '/health'): self._health,
+            ('GET', '/stats'): self._stats,
+            ('GET', '/metrics'): self._metrics,
+            ('POST', '/analyze/symptoms'): self._analyze_symptoms,
+            ('POST', '/analyze/genetics'): self._analyze_genetics,
+            ('POST', '/analyze'): self._analyze,
+            ('POST', '/report'): self._report,
+        }
+
+    @property
+    def analyzer(self):
+        """The fixed Analyzer, or else the current process-wide one"""
+        return self._analyzer or get_analyzer()
+
+    async def handle(self, method, path, payload=None):
+        """Dispatch one request; returns (status, JSON-serializable body or plain text)"""
+        route = self._routes.get((method, path))
+        if route is None:
+            known_path = any(p == path for _, p in self._routes)
+            return (405, {'error': 'method not allowed'}) if known_path else (404, {'error': 'not found'})
+        if payload is not None and not isinstance(payload, dict):
+            return 400, {'error': 'request body must be a JSON object'}
+        try:
+            return 200, await route(payload or {})
+        except RequestError as exc:
+            return exc.status, {'error': str(exc)}
+
+    async def _health(self, payload):
+        health = {'status': 'ok', 'version': self.analyzer.version}
+        manager = get_catalog_manager()
+        if manager is not None and self._analyzer is None:
+            health['generation'] = manager.generation
+        return health
+
+    async def _stats(self, payload):
+        manager = get_catalog_manager()
+        return {
+            'cache': self.analyzer.cache.stats(),
+            'batching': self.batcher.stats(),
+            'catalog': manager.stats() if manager is not None and self._analyzer is None else None,
+            'metrics': metrics.METRICS.snapshot()
+        }
+
+    async def _metrics(self, payload):
+        cache = self.analyzer.cache.stats()
+        batching = self.batcher.stats()
+        return metrics.METRICS.to_prometheus({
+            'cache_size': cache['size'],
+            'cache_hit_rate': cache['hit_rate'],
+            'batched_requests': batching['requests'],
+            'batches': batching['batches']
+        })
+
+    async def _analyze_symptoms(self, payload):
+        return {'results': await self.batcher.submit(_symptom_list(payload), _top_k(payload))}
+
+    async def _analyze_genetics(self, payload):
+        genetic_input = payload.get('genetic_input', '')
+        if not isinstance(genetic_input, str):
+            raise RequestError(400, "'genetic_input' must be a string")
+        # Long inputs take a while to scan; keep the event loop serving meanwhile
+        results, genes_found = await asyncio.get_running_loop().run_in_executor(
+            None, self.analyzer.analyze_genetic_markers, genetic_input
+        )
+        return {'results': results, 'genes_found': genes_found}
+
+    async def _analyze(self, payload):
+        symptoms = _symptom_list(payload)
+        genetic = await self._analyze_genetics(payload)
+        return {
+            'symptom_results': await self.batcher.submit(symptoms, _top_k(payload)) if symptoms else [],
+            'genetic_results': genetic['results'],
+            'genes_found': genetic['genes_found']
+        }
+
+    async def _report(self, payload):
+        fmt = payload.get('format', 'markdown')
+        if fmt not in REPORT_FORMATS:
+            raise RequestError(400, f"'format' must be one of {', '.join(REPORT_FORMATS)}")
+        try:
+            report = generate_report(
+                payload.get('symptom_results', []), payload.get('genetic_results', []),
+                payload.get('user_symptoms', []), payload.get('genetic_input', ''), fmt, self.analyzer.version
+            )
+        except (KeyError, TypeError, AttributeError) as exc:
+            raise RequestError(400, f'malformed analysis results: {exc}') from None
+        return {'report': json.loads(report) if fmt == 'json' else report}
+
+    # HTTP/1.1 transport
+
+    async def _serve_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, path, _ = request_line.decode('latin-1').split(' ', 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                body = await reader.readexactly(int(headers.get('content-length', 0) or 0))
+                try:
+                    payload = json.loads(body) if body else {}
+                    status, response = await self.handle(method, path.split('?', 1)[0], payload)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    status, response = 400, {'error': 'invalid JSON body'}
+                except Exception as exc:
+                    status, response = 500, {'error': str(exc)}
+
+                if isinstance(response, str):
+                    data, content_type = response.encode(), 'text/plain; version=0.0.4'
+                else:
+                    data, content_type = json.dumps(response, default=json_default).encode(), 'application/json'
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                writer.write(
+                    f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+                    f"Content-Type: {content_type}\r\nContent-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host='127.0.0.1', port=8080):
+        """Start listening; returns the asyncio Server"""
+        return await asyncio.start_server(self._serve_connection, host, port)
+
+    async def close(self):
+        await self.batcher.close()
+
+
+class InProcessClient:
+    """Test client calling a ScoringService directly, without sockets
+
+    JSON round-tripping is kept so responses look exactly like HTTP ones.
+    """
+
+    def __init__(self, service=None):
+        self.service = service or ScoringService()
+
+    async def request(self, method, path, payload=None):
+        payload = json.loads(json.dumps(payload)) if payload is not None else None
+        status, body = await self.service.handle(method, path, payload)
+        return status, json.loads(json.dumps(body, default=json_default))
+
+    async def get(self, path):
+        return await self.request('GET', path)
+
+    async def post(self, path, payload):
+        return await self.request('POST', path, payload)
+
+
+async def _serve(host, port, max_delay):
+    service = ScoringService(max_delay=max_delay)
+    server = await service.start(host, port)
+    print(f"SymptoGen scoring service on http://{host}:{port}", file=sys.stderr)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m symptogen.service', description='Run the SymptoGen scoring service.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--max-delay-ms', type=float, default=DEFAULT_MAX_DELAY * 1000,
+                        help='how long to wait for concurrent requests to coalesce')
+    parser.add_argument('--no-metrics', action='store_true', help='do not record stage timings for /metrics')
+    parser.add_argument('--watch', metavar='DIR', help='serve the catalog in DIR, reloading it when it changes')
+    parser.add_argument('--poll-interval', type=float, default=None, help='seconds between checks of --watch DIR')
+    args = parser.parse_args(argv)
+    metrics.METRICS.enable(not args.no_metrics)
+    if args.watch:
+        watch_catalog(args.watch, args.poll_interval)
+    try:
+        asyncio.run(_serve(args.host, args.port, args.max_delay_ms / 1000))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
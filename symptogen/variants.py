@@ -0,0 +1,417 @@
+"""Variant-level genetic lookup by rsID and genomic position
+
+The gene catalog only knows gene symbols, so identifiers such as
+"rs80357906" or positions such as "chr17:43094464" in the genetic input used
+to match nothing.  VariantIndex resolves them to genes, and through the gene
+catalog to diseases:
+
+* rsIDs: a sorted int64 array of rs numbers with the gene of each entry,
+  searched with np.searchsorted for every rsID in the input at once
+* positions: the same for (chromosome, position) keys of known variants,
+  plus a sorted-interval binary search over gene coordinates (intervals
+  sorted by start, with a running maximum of their ends, so a lookup walks
+  back only over intervals that can still contain the position)
+
+Tables the size of ClinVar (millions of variants) are compiled once from a
+local file (ClinVar's variant_summary.txt, or any CSV/TSV with rsid, chrom,
+pos and gene columns) into ``.npy`` arrays that later loads memory-map.
+
+Usage::
+
+    python -m symptogen.variants build variant_summary.txt.gz ./variants --assembly GRCh38
+    python -m symptogen.variants lookup ./variants rs80357906 chr17:43094464
+"""
+import argparse
+import json
+import re
+import sys
+import time
+from functools import cached_property
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from symptogen.engine import array_fingerprint
+
+RSID_PATTERN = re.compile(r'(?<![0-9A-Za-z])rs(\d+)(?![0-9A-Za-z])', re.IGNORECASE)
+POSITION_PATTERN = re.compile(r'(?<![0-9A-Za-z])(?:chr)?([0-9]{1,2}|X|Y|MT?):(?:g\.)?(\d+)(?![0-9A-Za-z])',
+                              re.IGNORECASE)
+
+# Characters an rsID or position token can contain, and the longest one kept
+# across pieces by VariantCollector
+_TOKEN_TAIL = re.compile(r'[0-9A-Za-z:.]*\Z')
+MAX_TOKEN_LENGTH = 64
+
+CHROMOSOMES = [str(i) for i in range(1, 23)] + ['X', 'Y', 'MT']
+_CHROMOSOME_CODES = {name: code for code, name in enumerate(CHROMOSOMES, start=1)}
+_CHROMOSOME_CODES['M'] = _CHROMOSOME_CODES['MT']
+
+# Column names understood in variant and gene coordinate tables; the first
+# of each tuple is the generic name, the rest are ClinVar/Ensembl spellings
+VARIANT_COLUMNS = {
+    'rsid': ('rsid', 'RS# (dbSNP)', 'rs', 'ID'),
+    'chrom': ('chrom', 'Chromosome', 'CHROM', '#CHROM'),
+    'pos': ('pos', 'Start', 'PositionVCF', 'POS'),
+    'gene': ('gene', 'GeneSymbol', 'GENE'),
+    'assembly': ('assembly', 'Assembly')
+}
+GENE_COLUMNS = {
+    'gene': ('gene', 'GeneSymbol', 'Symbol', 'gene_name'),
+    'chrom': ('chrom', 'Chromosome', 'chromosome', 'seqname'),
+    'start': ('start', 'Start', 'start_position'),
+    'end': ('end', 'Stop', 'End', 'end_position')
+}
+
+DEFAULT_CHUNK_SIZE = 500000
+
+FORMAT_VERSION = 1
+
+
+def chromosome_code(name):
+    """Small integer code of a chromosome name ('chr17', '17', 'X', 'MT'), 0 if unknown"""
+    name = str(name).strip().upper()
+    if name.startswith('CHR'):
+        name = name[3:]
+    return _CHROMOSOME_CODES.get(name, 0)
+
+
+def chromosome_codes(names):
+    """chromosome_code() of every entry of a Series, vectorized"""
+    names = names.astype(str).str.strip().str.upper().str.removeprefix('CHR')
+    return names.map(_CHROMOSOME_CODES).fillna(0).to_numpy(dtype=np.int64)
+
+
+def position_keys(chrom_codes, positions):
+    """Sortable int64 key of (chromosome code, position) pairs"""
+    return (np.asarray(chrom_codes, dtype=np.int64) << 32) | np.asarray(positions, dtype=np.int64)
+
+
+def parse_variant_tokens(text):
+    """rs numbers and position keys of the rsIDs and chrom:pos positions in ``text``"""
+    rs_numbers = np.array([int(number) for number in RSID_PATTERN.findall(text)], dtype=np.int64)
+    positions = [(chromosome_code(chrom), int(pos)) for chrom, pos in POSITION_PATTERN.findall(text)]
+    keys = position_keys([c for c, _ in positions], [p for _, p in positions]) if positions else \
+        np.empty(0, dtype=np.int64)
+    return rs_numbers, keys
+
+
+def _expand(lo, hi):
+    """Query number and array position of every entry in the ranges [lo, hi)"""
+    lengths = hi - lo
+    queries = np.repeat(np.arange(len(lo)), lengths)
+    return queries, np.repeat(lo, lengths) + np.arange(int(lengths.sum())) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+
+
+def _sorted_pairs(keys, genes):
+    """(key, gene) pairs sorted by key then gene, without duplicates"""
+    keys = np.asarray(keys, dtype=np.int64)
+    genes = np.asarray(genes, dtype=np.int32)
+    order = np.lexsort((genes, keys))
+    keys, genes = keys[order], genes[order]
+    # ClinVar lists a variant once per assembly and submission
+    first = np.ones(len(keys), dtype=bool)
+    first[1:] = (keys[1:] != keys[:-1]) | (genes[1:] != genes[:-1])
+    return keys[first], genes[first]
+
+
+class VariantIndex:
+    """Sorted-array index from rsIDs and genomic positions to gene symbols"""
+
+    # Arrays persisted by save() and memory-mapped back by load()
+    _ARRAYS = ('genes', 'rs_numbers', 'rs_genes', 'variant_keys', 'variant_genes',
+               'interval_starts', 'interval_ends', 'interval_genes', 'interval_reach')
+
+    def __init__(self, rs_numbers, rs_genes, variant_keys, variant_genes, gene_symbols,
+                 interval_starts=(), interval_ends=(), interval_genes=()):
+        """Index parallel arrays of variants and of gene intervals; genes are given as indexes into ``gene_symbols``"""
+        self.directory = None
+        self.genes = np.asarray(gene_symbols, dtype=str)
+        self.rs_numbers, self.rs_genes = _sorted_pairs(rs_numbers, rs_genes)
+        self.variant_keys, self.variant_genes = _sorted_pairs(variant_keys, variant_genes)
+        order = np.argsort(np.asarray(interval_starts, dtype=np.int64), kind='stable')
+        self.interval_starts = np.asarray(interval_starts, dtype=np.int64)[order]
+        self.interval_ends = np.asarray(interval_ends, dtype=np.int64)[order]
+        self.interval_genes = np.asarray(interval_genes, dtype=np.int32)[order]
+        # Furthest end among the intervals starting at or before each one
+        self.interval_reach = np.maximum.accumulate(self.interval_ends) if len(order) else np.empty(0, dtype=np.int64)
+
+    @classmethod
+    def from_frames(cls, variants, gene_intervals=None):
+        """Build from a variant DataFrame (rsid, chrom, pos, gene) and optional gene intervals (gene, chrom, start, end)
+
+        rsid may be 'rs123' or a bare number; rows whose gene cell lists
+        several symbols (ClinVar separates them with ';') map to each one.
+        Without ``gene_intervals``, every gene spans its variants.
+        """
+        genes = variants['gene'].fillna('').astype(str).str.upper().str.split(';')
+        variants = variants.assign(gene=genes).explode('gene')
+        variants = variants[variants['gene'].str.strip() != '']
+        symbols = sorted(set(variants['gene'].str.strip()) |
+                         (set(gene_intervals['gene'].astype(str).str.upper()) if gene_intervals is not None else set()))
+        gene_ids = {symbol: i for i, symbol in enumerate(symbols)}
+        variant_genes = variants['gene'].str.strip().map(gene_ids).to_numpy(dtype=np.int32)
+
+        rs = pd.to_numeric(variants['rsid'].astype(str).str.lower().str.removeprefix('rs'), errors='coerce')
+        known_rs = (rs > 0).to_numpy()
+        chrom = chromosome_codes(variants['chrom'])
+        pos = pd.to_numeric(variants['pos'], errors='coerce').to_numpy()
+        placed = (chrom > 0) & ~np.isnan(pos) & (np.nan_to_num(pos) > 0)
+        keys = position_keys(chrom[placed], pos[placed].astype(np.int64))
+
+        if gene_intervals is not None:
+            interval_chrom = chromosome_codes(gene_intervals['chrom'])
+            starts = position_keys(interval_chrom, pd.to_numeric(gene_intervals['start']).to_numpy(np.int64))
+            ends = position_keys(interval_chrom, pd.to_numeric(gene_intervals['end']).to_numpy(np.int64))
+            interval_genes = gene_intervals['gene'].astype(str).str.upper().map(gene_ids).to_numpy(dtype=np.int32)
+            keep = interval_chrom > 0
+            starts, ends, interval_genes = starts[keep], ends[keep], interval_genes[keep]
+        else:
+            # Span of each gene's variants on each chromosome
+            spans = pd.DataFrame({'gene': variant_genes[placed], 'key': keys}).groupby(
+                ['gene', keys >> 32])['key'].agg(['min', 'max'])
+            starts, ends = spans['min'].to_numpy(), spans['max'].to_numpy()
+            interval_genes = spans.index.get_level_values('gene').to_numpy(dtype=np.int32)
+
+        return cls(rs[known_rs].to_numpy(np.int64), variant_genes[known_rs], keys, variant_genes[placed], symbols,
+                   starts, ends, interval_genes)
+
+    @classmethod
+    def from_table(cls, path, genes_path=None, assembly=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Build from a local variant table (ClinVar variant_summary.txt[.gz] or CSV/TSV), read in chunks"""
+        return cls.from_frames(read_table(path, VARIANT_COLUMNS, assembly, chunk_size),
+                               read_table(genes_path, GENE_COLUMNS) if genes_path else None)
+
+    def save(self, directory):
+        """Write the compiled arrays to ``directory`` as one .npy file each, plus index.json"""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for name in self._ARRAYS:
+            np.save(directory / f'{name}.npy', getattr(self, name), allow_pickle=False)
+        meta = {'format': FORMAT_VERSION, 'version': self.version, 'genes': len(self.genes),
+                'rsids': len(self.rs_numbers), 'positions': len(self.variant_keys)}
+        # Written last, so its presence marks a complete index
+        (directory / 'index.json').write_text(json.dumps(meta, indent=2))
+        return self.version
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r'):
+        """Open an index written by save(), memory-mapping the arrays by default"""
+        directory = Path(directory)
+        meta = json.loads((directory / 'index.json').read_text())
+        if meta.get('format') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported variant index format {meta.get('format')!r} in {directory}")
+        index = cls.__new__(cls)
+        for name in cls._ARRAYS:
+            setattr(index, name, np.load(directory / f'{name}.npy', mmap_mode=mmap_mode, allow_pickle=False))
+        # The stored content hash stands in for hashing the arrays again
+        index.version = meta['version']
+        index.directory = directory
+        return index
+
+    def __reduce__(self):
+        if self.directory is not None:
+            # Worker processes memory-map the same files instead of receiving a copy
+            return VariantIndex.load, (str(self.directory),)
+        return _restore_index, ({name: getattr(self, name) for name in self._ARRAYS},)
+
+    def __len__(self):
+        return len(self.rs_numbers)
+
+    @cached_property
+    def version(self):
+        """Content hash of the index, used to invalidate derived caches"""
+        return array_fingerprint([getattr(self, name) for name in self._ARRAYS])
+
+    def gene_ids(self, symbols):
+        """Index of each gene symbol in ``genes``, -1 when the index does not know it"""
+        symbols = np.asarray([str(s).upper() for s in symbols], dtype=str)
+        if not len(self.genes) or not len(symbols):
+            return np.full(len(symbols), -1, dtype=np.int64)
+        found = np.minimum(np.searchsorted(self.genes, symbols), len(self.genes) - 1)
+        return np.where(self.genes[found] == symbols, found, -1)
+
+    def lookup_rsids(self, rs_numbers):
+        """(query number, gene id) of every gene of each rs number, all queries in one search"""
+        rs_numbers = np.asarray(rs_numbers, dtype=np.int64)
+        lo = np.searchsorted(self.rs_numbers, rs_numbers, side='left')
+        hi = np.searchsorted(self.rs_numbers, rs_numbers, side='right')
+        queries, entries = _expand(lo, hi)
+        return queries, np.asarray(self.rs_genes[entries], dtype=np.int64)
+
+    def lookup_positions(self, keys):
+        """(query number, gene id) of the known variants at, and gene intervals around, each position key"""
+        keys = np.asarray(keys, dtype=np.int64)
+        lo = np.searchsorted(self.variant_keys, keys, side='left')
+        hi = np.searchsorted(self.variant_keys, keys, side='right')
+        queries, entries = _expand(lo, hi)
+        found_queries = [queries]
+        found_genes = [np.asarray(self.variant_genes[entries], dtype=np.int64)]
+
+        # Last interval starting at or before each key, then back while an
+        # earlier interval can still reach the key
+        candidate = np.searchsorted(self.interval_starts, keys, side='right') - 1
+        active = np.flatnonzero(candidate >= 0)
+        while len(active):
+            at = candidate[active]
+            reaches = self.interval_reach[at] >= keys[active]
+            active, at = active[reaches], at[reaches]
+            hit = self.interval_ends[at] >= keys[active]
+            found_queries.append(active[hit])
+            found_genes.append(np.asarray(self.interval_genes[at[hit]], dtype=np.int64))
+            candidate[active] -= 1
+            active = active[candidate[active] >= 0]
+        return np.concatenate(found_queries), np.concatenate(found_genes)
+
+    def resolve(self, text):
+        """Gene ids hit by the rsIDs and positions in ``text``, sorted and de-duplicated"""
+        rs_numbers, keys = parse_variant_tokens(text)
+        _, rs_genes = self.lookup_rsids(rs_numbers)
+        _, position_genes = self.lookup_positions(keys)
+        return np.unique(np.concatenate([rs_genes, position_genes]))
+
+    def explain(self, text):
+        """Per rsID or position token in ``text``, the gene symbols it resolves to"""
+        tokens = [f'rs{number}' for number in RSID_PATTERN.findall(text)]
+        tokens += [f'chr{chrom.upper()}:{pos}' for chrom, pos in POSITION_PATTERN.findall(text)]
+        rs_numbers, keys = parse_variant_tokens(text)
+        rs_queries, rs_genes = self.lookup_rsids(rs_numbers)
+        position_queries, position_genes = self.lookup_positions(keys)
+        found = {token: [] for token in tokens}
+        for query, gene in zip(rs_queries, rs_genes):
+            found[tokens[query]].append(str(self.genes[gene]))
+        for query, gene in zip(position_queries, position_genes):
+            found[tokens[len(rs_numbers) + query]].append(str(self.genes[gene]))
+        return {token: sorted(set(genes)) for token, genes in found.items()}
+
+
+def _restore_index(arrays):
+    index = VariantIndex.__new__(VariantIndex)
+    index.directory = None
+    for name, array in arrays.items():
+        setattr(index, name, array)
+    return index
+
+
+class VariantCollector:
+    """Collects rsID and position tokens from text delivered in pieces
+
+    Pieces may split a token; the unfinished tail of each piece is carried
+    into the next.
+    """
+
+    def __init__(self):
+        self.tokens = set()
+        self._tail = ''
+        # Leading characters of the tail kept only as left context
+        self._context = 0
+
+    def feed(self, text):
+        text = self._tail + text
+        # The trailing run of token characters may continue in the next
+        # piece; only its last MAX_TOKEN_LENGTH characters are looked at, so
+        # a long unbroken run costs linear time
+        cut = _TOKEN_TAIL.search(text, max(0, len(text) - MAX_TOKEN_LENGTH)).start()
+        # A match running past the cut is carried whole, within a bounded tail
+        carry = max(self._add(text, self._context, cut), len(text) - 2 * MAX_TOKEN_LENGTH)
+        # One character before the carried tail keeps the left boundary check
+        self._context = 1 if carry else 0
+        self._tail = text[carry - self._context:]
+
+    def watch(self, pieces):
+        """Pass ``pieces`` through unchanged, collecting their tokens on the way"""
+        for piece in pieces:
+            self.feed(piece)
+            yield piece
+
+    def _add(self, text, start=0, end=None):
+        # Keeps the matches starting at or after ``start`` and ending by
+        # ``end``, and returns where the first match running past ``end`` starts
+        end = len(text) if end is None else end
+        carry = end
+        for pattern, token in ((RSID_PATTERN, 'rs{}'), (POSITION_PATTERN, '{}:{}')):
+            # Scanning from ``start`` still lets the lookbehind see the context
+            for match in pattern.finditer(text, start):
+                if match.end() <= end:
+                    self.tokens.add(token.format(*match.groups()))
+                else:
+                    carry = min(carry, match.start())
+        return carry
+
+    def finish(self):
+        """The distinct tokens seen, joined into one string for VariantIndex.resolve"""
+        self._add(self._tail, self._context)
+        self._tail = ''
+        self._context = 0
+        return ' '.join(sorted(self.tokens))
+
+
+def _pick_columns(columns, spellings):
+    picked = {}
+    for name, options in spellings.items():
+        for option in options:
+            if option in columns:
+                picked[option] = name
+                break
+    return picked
+
+
+def read_table(path, spellings, assembly=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Read the recognized columns of a CSV/TSV (optionally gzipped) table, renamed to their generic names
+
+    The file is read ``chunk_size`` rows at a time, keeping only the needed
+    columns; with ``assembly`` (e.g. GRCh38) rows of other assemblies are
+    dropped.
+    """
+    separator = ',' if str(path).removesuffix('.gz').endswith('.csv') else '\t'
+    header = pd.read_csv(path, sep=separator, nrows=0).columns
+    picked = _pick_columns(header, spellings)
+    missing = [name for name in spellings if name not in picked.values() and name != 'assembly']
+    if missing:
+        raise ValueError(f"{path} has no column for {', '.join(missing)}; expected one of "
+                         + '; '.join(f'{name}: {options}' for name, options in spellings.items() if name in missing))
+    frames = []
+    for chunk in pd.read_csv(path, sep=separator, usecols=list(picked), dtype=str, keep_default_na=False,
+                             chunksize=chunk_size):
+        chunk = chunk.rename(columns=picked)
+        if assembly and 'assembly' in chunk:
+            chunk = chunk[chunk['assembly'] == assembly]
+        frames.append(chunk.drop(columns=['assembly'], errors='ignore'))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=list(spellings))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m symptogen.variants',
+                                     description='Compile and query a variant -> gene index.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help='compile a variant table into an index directory')
+    build.add_argument('table', help='ClinVar variant_summary.txt[.gz] or a CSV/TSV with rsid, chrom, pos, gene')
+    build.add_argument('directory')
+    build.add_argument('--genes', help='CSV/TSV of gene coordinates (gene, chrom, start, end)')
+    build.add_argument('--assembly', help='keep only rows of this assembly, e.g. GRCh38')
+    lookup = commands.add_parser('lookup', help='resolve rsIDs and chrom:pos positions with a compiled index')
+    lookup.add_argument('directory')
+    lookup.add_argument('tokens', nargs='+')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == 'build':
+        start = time.perf_counter()
+        index = VariantIndex.from_table(args.table, args.genes, args.assembly)
+        version = index.save(args.directory)
+        print(f"Indexed {len(index.rs_numbers)} rsID and {len(index.variant_keys)} position entries over "
+              f"{len(index.genes)} genes in {time.perf_counter() - start:.1f}s (version {version})", file=sys.stderr)
+    else:
+        index = VariantIndex.load(args.directory)
+        start = time.perf_counter()
+        found = index.explain(' '.join(args.tokens))
+        elapsed = time.perf_counter() - start
+        print(json.dumps(found, indent=2))
+        print(f"Resolved {len(found)} tokens in {elapsed * 1000:.2f} ms", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""Symptom vocabulary: interning, synonyms and fuzzy resolution of free text
+
+Every catalog symptom is interned to a small integer id shared with the
+SymptomIndex, so scoring never hashes symptom strings.  Free-text phrases
+are normalized, then resolved by exact name, by the synonym table and
+finally by a fuzzy match; resolutions are kept in an LRU cache so a repeated
+phrase costs one dict lookup.
+"""
+import difflib
+import re
+from functools import lru_cache
+
+import numpy as np
+
+# Canonical symptom -> free-text phrases that mean the same thing
+SYMPTOM_SYNONYMS = {
+    'fever': ['high temperature', 'temperature', 'pyrexia', 'feverish', 'febrile'],
+    'mild_fever': ['low grade fever', 'slight fever', 'low fever'],
+    'cough': ['coughing', 'persistent cough'],
+    'mild_cough': ['slight cough', 'dry tickle'],
+    'fatigue': ['tiredness', 'tired', 'exhaustion', 'exhausted', 'lethargy', 'low energy'],
+    'headache': ['head ache', 'head pain', 'cephalalgia'],
+    'muscle_aches': ['body aches', 'aching muscles', 'myalgia', 'sore muscles'],
+    'sore_throat': ['throat pain', 'scratchy throat', 'pharyngitis'],
+    'runny_nose': ['rhinorrhea', 'dripping nose', 'nose running'],
+    'sneezing': ['sneeze', 'sneezes'],
+    'nausea': ['feeling sick', 'queasy', 'queasiness', 'nauseous'],
+    'vomiting': ['throwing up', 'vomit', 'being sick', 'emesis'],
+    'diarrhea': ['diarrhoea', 'loose stools', 'runny stools'],
+    'abdominal_pain': ['stomach ache', 'stomach pain', 'belly pain', 'tummy ache'],
+    'abdominal_cramps': ['stomach cramps', 'belly cramps'],
+    'chest_pain': ['chest ache', 'pain in chest'],
+    'chest_tightness': ['tight chest', 'chest pressure'],
+    'difficulty_breathing': ['trouble breathing', 'breathing difficulty', 'labored breathing', 'laboured breathing'],
+    'shortness_of_breath': ['short of breath', 'breathlessness', 'breathless', 'sob', 'dyspnea', 'dyspnoea'],
+    'dizziness': ['dizzy', 'lightheaded', 'light headed', 'vertigo'],
+    'rash': ['skin rash', 'hives', 'spots'],
+    'joint_pain': ['arthralgia', 'aching joints', 'sore joints'],
+    'loss_of_taste': ['no taste', 'ageusia', 'cannot taste'],
+    'loss_of_smell': ['no smell', 'anosmia', 'cannot smell'],
+    'chills': ['shivering', 'shivers', 'rigors'],
+    'sweating': ['sweats', 'night sweats', 'perspiration'],
+    'blurred_vision': ['blurry vision', 'vision blurred'],
+    'frequent_urination': ['peeing a lot', 'polyuria', 'urinating often'],
+    'excessive_thirst': ['very thirsty', 'polydipsia', 'always thirsty'],
+    'weight_loss': ['losing weight', 'lost weight'],
+    'weight_gain': ['gaining weight', 'gained weight'],
+    'restlessness': ['restless', 'agitation', 'fidgety'],
+    'anxiety': ['anxious', 'worry', 'nervousness'],
+    'depression': ['depressed', 'low mood'],
+    'insomnia': ['sleeplessness', 'cannot sleep', 'trouble sleeping'],
+    'muscle_weakness': ['weak muscles', 'weakness'],
+    'numbness': ['numb'],
+    'tingling': ['pins and needles', 'paresthesia'],
+    'sensitivity_to_light': ['photophobia', 'light sensitivity'],
+    'visual_disturbances': ['aura', 'vision problems', 'visual aura'],
+    'wheezing': ['wheeze', 'whistling breath'],
+    'itchy_eyes': ['eye itching', 'itchy eye'],
+    'nasal_congestion': ['stuffy nose', 'blocked nose', 'congestion'],
+    'muscle_tension': ['tense muscles', 'muscle tightness'],
+    'difficulty_concentrating': ['brain fog', 'trouble concentrating', 'poor concentration'],
+}
+
+DEFAULT_FUZZY_CUTOFF = 0.85
+DEFAULT_CACHE_SIZE = 4096
+
+_NON_WORD = re.compile(r'[^a-z0-9]+')
+
+
+def normalize_phrase(phrase):
+    """Lower-case a phrase and join its words with underscores"""
+    return _NON_WORD.sub('_', phrase.lower()).strip('_')
+
+
+class SymptomVocabulary:
+    """Interned symptom names with synonym and fuzzy resolution of free text"""
+
+    def __init__(self, symptoms, synonyms=None, fuzzy_cutoff=DEFAULT_FUZZY_CUTOFF, cache_size=DEFAULT_CACHE_SIZE):
+        self.symptoms = list(dict.fromkeys(symptoms))
+        self.ids = {s: i for i, s in enumerate(self.symptoms)}
+        self.fuzzy_cutoff = fuzzy_cutoff
+
+        # Normalized surface form -> canonical symptom, for every known name
+        self._lookup = {normalize_phrase(s): s for s in self.symptoms}
+        for canonical, phrases in (SYMPTOM_SYNONYMS if synonyms is None else synonyms).items():
+            if canonical in self.ids:
+                for phrase in phrases:
+                    # Real catalog names always win over synonyms
+                    self._lookup.setdefault(normalize_phrase(phrase), canonical)
+        self._fuzzy_keys = list(self._lookup)
+        self._resolve_cached = lru_cache(maxsize=cache_size)(self._resolve)
+
+    @classmethod
+    def from_index(cls, symptom_index, **kwargs):
+        """Build a vocabulary whose ids are the column ids of ``symptom_index``"""
+        return cls(symptom_index.vocabulary, **kwargs)
+
+    def __len__(self):
+        return len(self.symptoms)
+
+    def _resolve(self, phrase):
+        key = normalize_phrase(phrase)
+        if not key:
+            return None
+        if key in self._lookup:
+            return self._lookup[key]
+        close = difflib.get_close_matches(key, self._fuzzy_keys, n=1, cutoff=self.fuzzy_cutoff)
+        return self._lookup[close[0]] if close else None
+
+    def resolve(self, phrase):
+        """Return the canonical symptom for a free-text phrase, or None"""
+        return self._resolve_cached(phrase)
+
+    def resolve_all(self, phrases):
+        """Resolve phrases; returns (canonical symptoms, normalized unrecognized phrases)"""
+        resolved = []
+        unrecognized = []
+        for phrase in phrases:
+            symptom = self.resolve(phrase)
+            if symptom is not None:
+                resolved.append(symptom)
+            elif normalize_phrase(phrase):
+                unrecognized.append(normalize_phrase(phrase))
+        return list(dict.fromkeys(resolved)), list(dict.fromkeys(unrecognized))
+
+    def encode(self, phrases):
+        """Intern phrases to (sorted symptom ids, size of the user symptom set)
+
+        Unrecognized phrases get no id but still count towards the user set,
+        as they would in calculate_symptom_match_score.
+        """
+        resolved, unrecognized = self.resolve_all(phrases)
+        ids = np.array(sorted(self.ids[s] for s in resolved), dtype=np.int32)
+        return ids, len(resolved) + len(unrecognized)
+
+    def cache_info(self):
+        """Return the hit/miss statistics of the phrase resolution cache"""
+        return self._resolve_cached.cache_info()
@@ -0,0 +1,42 @@
+"""Synthetic catalogs and queries for the tests
+
+A copy of the generator in benchmarks/synthetic.py, so the test suite does
+not import the benchmarks.  Symptom popularity follows a power law, so a
+few symptoms appear in a large share of diseases, as in real catalogs.
+"""
+import numpy as np
+import pandas as pd
+
+SEVERITIES = np.array(['High', 'Medium', 'Low'])
+
+
+def symptom_names(n_symptoms):
+    return [f'symptom_{i}' for i in range(n_symptoms)]
+
+
+def _popularity(n_symptoms, exponent=1.1):
+    weights = 1.0 / np.arange(1, n_symptoms + 1) ** exponent
+    return weights / weights.sum()
+
+
+def _draw(rng, n_rows, n_symptoms, min_size, max_size):
+    names = np.array(symptom_names(n_symptoms))
+    sizes = rng.integers(min_size, max_size + 1, size=n_rows)
+    draws = rng.choice(n_symptoms, size=(n_rows, max_size), p=_popularity(n_symptoms))
+    return [list(dict.fromkeys(names[row[:size]].tolist())) for row, size in zip(draws, sizes)]
+
+
+def synthetic_symptom_frame(n_diseases, n_symptoms=None, min_size=3, max_size=8, seed=0):
+    """DataFrame shaped like load_symptom_disease_data() with ``n_diseases`` rows"""
+    rng = np.random.default_rng(seed)
+    n_symptoms = n_symptoms or int(min(max(45, n_diseases // 5), 50000))
+    return pd.DataFrame({
+        'Disease': [f'Disease {i}' for i in range(n_diseases)],
+        'Primary_Symptoms': _draw(rng, n_diseases, n_symptoms, min_size, max_size),
+        'Severity': SEVERITIES[rng.integers(0, 3, size=n_diseases)].tolist()
+    })
+
+
+def synthetic_symptom_queries(n_queries, n_symptoms, min_size=1, max_size=6, seed=1):
+    """Symptom lists drawn with the same popularity skew as the catalog"""
+    return _draw(np.random.default_rng(seed), n_queries, n_symptoms, min_size, max_size)
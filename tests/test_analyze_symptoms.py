@@ -0,0 +1,74 @@
+"""analyze_symptoms against the original row-by-row scorer
+
+The compiled index must rank exactly as scoring every catalog row with
+calculate_symptom_match_score and sorting by confidence, keeping catalog
+order between ties.
+"""
+import random
+
+import pandas as pd
+import pytest
+
+from symptogen.analyzer import Analyzer
+from symptogen.catalog import genetic_disease_frame, symptom_disease_frame
+from symptogen.core import analyze_symptoms, calculate_symptom_match_score
+from symptogen.engine import SymptomIndex
+from symptogen.genetics import GeneMatcher
+
+
+def baseline_analyze_symptoms(frame, user_symptoms, k=10):
+    """The app's original analyze_symptoms over ``frame``, iterating columns instead of iterrows()"""
+    results = []
+    for disease, symptoms, severity in zip(frame['Disease'], frame['Primary_Symptoms'], frame['Severity']):
+        score = calculate_symptom_match_score(user_symptoms, symptoms)
+        if score > 0:
+            results.append({
+                'Disease': disease,
+                'Confidence': score,
+                'Severity': severity,
+                'Matched_Symptoms': list(set(user_symptoms).intersection(set(symptoms)))
+            })
+    results = sorted(results, key=lambda x: x['Confidence'], reverse=True)
+    return results[:k]
+
+
+def normalized(results):
+    return [(r['Disease'], r['Confidence'], r['Severity'], sorted(r['Matched_Symptoms'])) for r in results]
+
+
+def synthetic_frame(n, vocabulary, seed):
+    rng = random.Random(seed)
+    return pd.DataFrame({
+        'Disease': [f'D{i}' for i in range(n)],
+        # Some rows are empty and some repeat the most common symptom
+        'Primary_Symptoms': [rng.sample(vocabulary, rng.randint(0, 8)) + ([vocabulary[0]] if rng.random() < .1 else [])
+                             for _ in range(n)],
+        'Severity': [rng.choice(['High', 'Medium', 'Low']) for _ in range(n)]
+    })
+
+
+def random_queries(vocabulary, n, seed):
+    rng = random.Random(seed)
+    # Unknown symptoms and duplicated entries included
+    names = vocabulary + ['unknown_a', 'unknown_b']
+    return [rng.sample(names, rng.randint(0, 7)) * rng.choice([1, 1, 2]) for _ in range(n)]
+
+
+def test_builtin_catalog_matches_baseline():
+    frame = symptom_disease_frame()
+    vocabulary = sorted({s for symptoms in frame['Primary_Symptoms'] for s in symptoms})
+    for user_symptoms in random_queries(vocabulary, 300, seed=0):
+        expected = baseline_analyze_symptoms(frame, user_symptoms)
+        assert normalized(analyze_symptoms(user_symptoms)) == normalized(expected), user_symptoms
+
+
+@pytest.mark.parametrize('seed', range(3))
+@pytest.mark.parametrize('k', [1, 3, 10, 1000])
+def test_synthetic_catalog_matches_baseline(seed, k):
+    vocabulary = [f's{i}' for i in range(60)]
+    frame = synthetic_frame(400, vocabulary, seed)
+    analyzer = Analyzer(SymptomIndex.from_frame(frame), GeneMatcher.from_frame(genetic_disease_frame()))
+    for user_symptoms in random_queries(vocabulary, 100, seed):
+        expected = baseline_analyze_symptoms(frame, user_symptoms, k)
+        assert normalized(analyze_symptoms(user_symptoms, k=k, analyzer=analyzer)) == normalized(expected), \
+            user_symptoms
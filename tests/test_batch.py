@@ -0,0 +1,67 @@
+"""run_batch over CSV and Parquet inputs"""
+import json
+
+import pandas as pd
+import pytest
+
+from symptogen.batch import parse_symptoms, run_batch
+
+PATIENTS = [
+    ('p1', ['fever', 'cough', 'fatigue'], 'BRCA1'),
+    ('p2', ['headache'], ''),
+    ('p3', [], 'TP53 APOE'),
+]
+
+
+def read_jsonl(path):
+    with open(path, encoding='utf-8') as handle:
+        return [json.loads(line) for line in handle]
+
+
+def write_patients_csv(path):
+    pd.DataFrame({'id': [p[0] for p in PATIENTS], 'symptoms': [','.join(p[1]) for p in PATIENTS],
+                  'genes': [p[2] for p in PATIENTS]}).to_csv(path, index=False)
+
+
+def test_parquet_list_column_matches_csv(tmp_path):
+    pytest.importorskip('pyarrow')
+    write_patients_csv(tmp_path / 'patients.csv')
+    pd.DataFrame({'id': [p[0] for p in PATIENTS], 'symptoms': [p[1] for p in PATIENTS],
+                  'genes': [p[2] for p in PATIENTS]}).to_parquet(tmp_path / 'patients.parquet')
+
+    run_batch(tmp_path / 'patients.csv', tmp_path / 'csv.jsonl', k=5)
+    run_batch(tmp_path / 'patients.parquet', tmp_path / 'parquet.jsonl', k=5)
+    from_csv = read_jsonl(tmp_path / 'csv.jsonl')
+    assert from_csv == read_jsonl(tmp_path / 'parquet.jsonl')
+    assert from_csv[0]['symptoms'] == ['fever', 'cough', 'fatigue']
+    assert from_csv[0]['symptom_results']
+
+
+def test_parse_symptoms_rejects_unknown_cells():
+    assert parse_symptoms(None) == []
+    assert parse_symptoms(float('nan')) == []
+    with pytest.raises(TypeError):
+        parse_symptoms(3)
+
+
+def test_default_catalog_and_model_come_from_the_environment(tmp_path, monkeypatch):
+    from symptogen.catalog import AVAILABLE_SYMPTOMS, genetic_disease_frame, symptom_disease_frame
+    from symptogen.catalog_store import save_catalog
+
+    # A three-disease catalog, so results show which catalog was used
+    symptoms = symptom_disease_frame().head(3)
+    save_catalog(tmp_path / 'catalog', symptoms, genetic_disease_frame(), AVAILABLE_SYMPTOMS)
+    write_patients_csv(tmp_path / 'patients.csv')
+
+    monkeypatch.setenv('SYMPTOGEN_CATALOG', str(tmp_path / 'catalog'))
+    monkeypatch.setenv('SYMPTOGEN_SCORING_MODEL', 'idf')
+    run_batch(tmp_path / 'patients.csv', tmp_path / 'env.jsonl')
+    monkeypatch.delenv('SYMPTOGEN_CATALOG')
+    monkeypatch.delenv('SYMPTOGEN_SCORING_MODEL')
+    for model in ('idf', 'blend'):
+        run_batch(tmp_path / 'patients.csv', tmp_path / f'{model}.jsonl', catalog=tmp_path / 'catalog', model=model)
+
+    from_env = read_jsonl(tmp_path / 'env.jsonl')
+    assert from_env == read_jsonl(tmp_path / 'idf.jsonl')
+    assert from_env != read_jsonl(tmp_path / 'blend.jsonl')
+    assert {r['Disease'] for record in from_env for r in record['symptom_results']} <= set(symptoms['Disease'])
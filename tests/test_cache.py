@@ -0,0 +1,82 @@
+"""ResultCache eviction, expiry and version invalidation"""
+from symptogen.cache import ResultCache
+from symptogen.core import load_default_analyzer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResultCache(maxsize=3)
+    for key in 'abc':
+        cache.put(key, key.upper())
+    # Reading 'a' makes 'b' the least recently used
+    assert cache.get('a') == 'A'
+    cache.put('d', 'D')
+    assert cache.get('b') is None
+    assert [cache.get(key) for key in 'acd'] == ['A', 'C', 'D']
+    # Overwriting 'c' refreshes it, leaving 'a' the least recently used
+    cache.put('c', 'C2')
+    cache.put('e', 'E')
+    assert cache.get('a') is None
+    assert [cache.get(key) for key in 'cde'] == ['C2', 'D', 'E']
+    assert len(cache) == 3
+    assert cache.evictions == 2
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = ResultCache(ttl=10, clock=clock)
+    cache.put('a', 1)
+    clock.now = 5
+    cache.put('b', 2)
+    clock.now = 9.9
+    assert cache.get('a') == 1
+    # A hit does not extend the lifetime
+    clock.now = 10
+    assert cache.get('a') is None
+    assert cache.get('b') == 2
+    clock.now = 15
+    assert cache.get('b') is None
+    assert len(cache) == 0
+    assert (cache.hits, cache.misses) == (2, 2)
+
+
+def test_version_change_empties_the_cache():
+    cache = ResultCache()
+    cache.put('a', 1, version='v1')
+    cache.put('b', 2, version='v1')
+    assert cache.get('a', version='v1') == 1
+    assert cache.get('a', version='v2') is None
+    assert len(cache) == 0
+    assert cache.invalidations == 1
+    cache.put('a', 3, version='v2')
+    assert cache.get('a', version='v2') == 3
+    assert cache.stats()['version'] == 'v2'
+
+
+def test_get_or_compute_calls_once_per_key():
+    cache = ResultCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return len(calls)
+
+    assert cache.get_or_compute('a', compute, version=1) == 1
+    assert cache.get_or_compute('a', compute, version=1) == 1
+    assert cache.get_or_compute('a', compute, version=2) == 2
+    assert cache.stats()['hit_rate'] == 1 / 3
+
+
+def test_analyzer_queries_share_canonical_entries():
+    analyzer = load_default_analyzer()
+    first = analyzer.analyze_symptoms(['fever', 'cough'], k=5)
+    assert analyzer.analyze_symptoms(['Cough', 'fever', 'fever'], k=5) is first
+    assert analyzer.analyze_symptoms(['fever', 'cough'], k=3) is not first
+    assert (analyzer.cache.hits, analyzer.cache.misses) == (1, 2)
@@ -0,0 +1,36 @@
+"""CatalogManager swaps over a source data directory"""
+import os
+
+from symptogen.catalog import symptom_disease_frame
+from symptogen.catalog_manager import CatalogManager
+
+
+def write_symptoms(directory, suffix, mtime):
+    frame = symptom_disease_frame()
+    frame['Disease'] = frame['Disease'] + suffix
+    frame['Primary_Symptoms'] = [','.join(symptoms) for symptoms in frame['Primary_Symptoms']]
+    path = directory / 'symptoms.csv'
+    frame.to_csv(path, index=False)
+    # Equal-size rewrites within one mtime tick would look unchanged
+    os.utime(path, ns=(mtime, mtime))
+
+
+def test_generations_keep_their_own_cache(tmp_path):
+    write_symptoms(tmp_path, ' v1', 1_000_000_000)
+    manager = CatalogManager(tmp_path)
+    old = manager.analyzer
+    old.analyze_symptoms(['fever', 'cough'])
+
+    write_symptoms(tmp_path, ' v2', 2_000_000_000)
+    assert manager.reload()
+    new = manager.analyzer
+    assert manager.generation == 2
+    assert new.cache is not old.cache
+    assert new.cache.maxsize == old.cache.maxsize
+
+    # A query still running on the old catalog and a new one do not evict each other
+    assert new.analyze_symptoms(['fever', 'cough']).diseases[0].endswith(' v2')
+    assert old.analyze_symptoms(['fever', 'cough']).diseases[0].endswith(' v1')
+    assert old.cache.hits == 1 and old.cache.invalidations == 0
+    new.analyze_symptoms(['fever', 'cough'])
+    assert new.cache.hits == 1 and new.cache.invalidations == 0
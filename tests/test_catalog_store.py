@@ -0,0 +1,61 @@
+"""save_catalog / load_catalog round trip"""
+import numpy as np
+
+from symptogen.analyzer import Analyzer
+from symptogen.catalog import AVAILABLE_SYMPTOMS, genetic_disease_frame, symptom_disease_frame
+from symptogen.catalog_store import GENE_COLUMNS, load_catalog, save_catalog
+from symptogen.engine import SymptomIndex
+from symptogen.genetics import GeneMatcher
+
+INDEX_ARRAYS = ('indptr', 'indices', 'disease_sizes', 'posting_indptr', 'posting_rows')
+
+
+def test_round_trip(tmp_path):
+    symptoms, genes = symptom_disease_frame(), genetic_disease_frame()
+    version = save_catalog(tmp_path, symptoms, genes, AVAILABLE_SYMPTOMS)
+    catalog = load_catalog(tmp_path)
+    fresh = SymptomIndex.from_frame(symptoms, vocabulary=AVAILABLE_SYMPTOMS)
+    loaded = catalog.symptom_index
+
+    assert list(loaded.vocabulary) == list(fresh.vocabulary)
+    assert loaded.symptom_ids == fresh.symptom_ids
+    assert list(loaded.diseases) == list(fresh.diseases)
+    assert list(loaded.severities) == list(fresh.severities)
+    for name in INDEX_ARRAYS:
+        assert np.array_equal(getattr(loaded, name), getattr(fresh, name)), name
+    # Arrays are memory-mapped read-only, not loaded into memory
+    assert isinstance(loaded.indices, np.memmap) and not loaded.indices.flags.writeable
+
+    for column in GENE_COLUMNS:
+        assert catalog.genetic_frame[column].tolist() == genes[column].astype(str).tolist()
+    assert catalog.symptom_frame['Primary_Symptoms'].tolist() == symptoms['Primary_Symptoms'].tolist()
+
+    assert catalog.version == version == catalog.meta['version']
+    assert loaded.version == catalog.gene_matcher.version == version
+    assert catalog.meta['diseases'] == len(symptoms) and catalog.meta['genes'] == len(genes)
+
+
+def test_loaded_catalog_scores_like_the_source(tmp_path):
+    symptoms, genes = symptom_disease_frame(), genetic_disease_frame()
+    save_catalog(tmp_path, symptoms, genes, AVAILABLE_SYMPTOMS)
+    catalog = load_catalog(tmp_path)
+    loaded = Analyzer(catalog.symptom_index, catalog.gene_matcher)
+    fresh = Analyzer(SymptomIndex.from_frame(symptoms, vocabulary=AVAILABLE_SYMPTOMS), GeneMatcher.from_frame(genes))
+
+    for query in (['fever', 'cough'], ['headache', 'nausea', 'fatigue'], ['rash']):
+        assert list(loaded.analyze_symptoms(query)) == list(fresh.analyze_symptoms(query))
+    genetic_input = 'BRCA1, APOE'
+    assert list(loaded.analyze_genetic_markers(genetic_input)[0]) == list(fresh.analyze_genetic_markers(genetic_input)[0])
+
+
+def test_version_follows_content(tmp_path):
+    symptoms, genes = symptom_disease_frame(), genetic_disease_frame()
+    version = save_catalog(tmp_path / 'a', symptoms, genes, AVAILABLE_SYMPTOMS)
+    assert save_catalog(tmp_path / 'b', symptoms, genes, AVAILABLE_SYMPTOMS) == version
+
+    changed = genes.copy()
+    changed.loc[0, 'Description'] = 'Revised description'
+    assert save_catalog(tmp_path / 'c', symptoms, changed, AVAILABLE_SYMPTOMS) != version
+    regraded = symptoms.copy()
+    regraded.loc[0, 'Severity'] = 'Critical'
+    assert save_catalog(tmp_path / 'd', regraded, genes, AVAILABLE_SYMPTOMS) != version
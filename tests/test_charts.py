@@ -0,0 +1,52 @@
+"""CohortChartData against the list-based cohort aggregations
+
+Adding a cohort chunk by chunk must give the same tables as aggregating the
+whole lists, and the per-patient sample must stay within its bound.
+"""
+import numpy as np
+import pytest
+
+from symptogen.charts import CohortChartData, confidence_histogram, prediction_frequency, risk_distribution
+
+
+def cohort(n, seed=0):
+    rng = np.random.default_rng(seed)
+    diseases = [f'Disease {i}' for i in rng.integers(0, 30, n)]
+    confidences = rng.random(n) * 100
+    levels = list(rng.choice(['High', 'Medium', 'Low'], n))
+    return diseases, confidences, levels
+
+
+def chunked(n, chunk_size, max_points):
+    diseases, confidences, levels = cohort(n)
+    data = CohortChartData(max_points=max_points)
+    for start in range(0, n, chunk_size):
+        end = start + chunk_size
+        data.add(diseases[start:end], confidences[start:end], levels[start:end])
+    return data, diseases, confidences, levels
+
+
+@pytest.mark.parametrize('n,chunk_size', [(1, 1), (250, 7), (5000, 1000)])
+def test_tables_match_whole_cohort(n, chunk_size):
+    data, diseases, confidences, levels = chunked(n, chunk_size, max_points=64)
+    expected = prediction_frequency(diseases, confidences)
+    frequency = data.prediction_frequency()
+    assert frequency['Disease'].tolist() == expected['Disease'].tolist()
+    assert frequency['Patients'].tolist() == expected['Patients'].tolist()
+    assert np.allclose(frequency['Mean_Confidence'], expected['Mean_Confidence'])
+    assert data.confidence_histogram().equals(confidence_histogram(confidences))
+    assert data.risk_distribution().equals(risk_distribution(levels))
+
+
+@pytest.mark.parametrize('n,chunk_size,max_points', [(60, 9, 64), (65, 64, 64), (10007, 333, 64), (3001, 3001, 100)])
+def test_sample_keeps_extremes_within_bound(n, chunk_size, max_points):
+    data, _, confidences, _ = chunked(n, chunk_size, max_points)
+    patients, sampled = data.sample()
+    assert len(patients) <= max_points
+    assert np.array_equal(confidences[patients], sampled)
+    assert np.all(np.diff(patients) > 0)
+    assert confidences.argmin() in patients and confidences.argmax() in patients
+    if n <= max_points:
+        assert np.array_equal(patients, np.arange(n))
+    # Every bucket of consecutive patients is represented
+    assert len(np.unique(patients // data.bucket_size)) == -(-n // data.bucket_size)
@@ -0,0 +1,86 @@
+"""CohortAggregate merging against aggregating all patients at once
+
+Merging partial aggregates, in any split and through a save/load round
+trip, must give the same counts as one aggregate over the union; pair
+counts must match a plain Counter over each patient's symptom pairs.
+"""
+import itertools
+import random
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from symptogen.cohort import CohortAggregate, aggregate_frame, load_cohorts, merge_cohorts, save_cohorts
+from symptogen.core import load_default_analyzer
+
+FIELDS = ('symptom_counts', 'top_counts', 'predicted_counts', 'gene_hits', 'pair_keys', 'pair_counts')
+GENES = ['BRCA1', 'APOE', 'CFTR', 'TP53', 'HTT', '']
+
+
+@pytest.fixture(scope='module')
+def analyzer():
+    return load_default_analyzer()
+
+
+@pytest.fixture(scope='module')
+def patients(analyzer):
+    rng = random.Random(0)
+    symptoms = list(analyzer.vocabulary.symptoms)
+    symptom_lists = [rng.sample(symptoms, rng.randint(0, 6)) for _ in range(400)]
+    genetic_inputs = [' '.join(rng.sample(GENES, rng.randint(0, 3))) for _ in range(400)]
+    return symptom_lists, genetic_inputs
+
+
+def assert_same_counts(merged, whole):
+    assert (merged.patients, merged.symptom_patients, merged.genetic_patients) == \
+        (whole.patients, whole.symptom_patients, whole.genetic_patients)
+    for name in FIELDS:
+        assert np.array_equal(getattr(merged, name), getattr(whole, name)), name
+    assert np.allclose(merged.top_confidence, whole.top_confidence)
+
+
+@pytest.mark.parametrize('split', [0, 1, 137, 399, 400])
+def test_merged_halves_equal_the_union(analyzer, patients, split):
+    symptom_lists, genetic_inputs = patients
+    whole = CohortAggregate.for_analyzer(analyzer, k=3).add(analyzer, symptom_lists, genetic_inputs)
+    first = CohortAggregate.for_analyzer(analyzer, k=3).add(analyzer, symptom_lists[:split], genetic_inputs[:split])
+    second = CohortAggregate.for_analyzer(analyzer, k=3).add(analyzer, symptom_lists[split:], genetic_inputs[split:])
+    assert_same_counts(first.merge(second), whole)
+
+
+def test_pair_counts_match_a_counter(analyzer, patients):
+    symptom_lists, genetic_inputs = patients
+    aggregate = CohortAggregate.for_analyzer(analyzer).add(analyzer, symptom_lists, genetic_inputs)
+    expected = Counter()
+    for symptoms in symptom_lists:
+        ids = sorted(set(analyzer.vocabulary.encode(symptoms)[0].tolist()))
+        expected.update(a * aggregate.n_symptoms + b for a, b in itertools.combinations(ids, 2))
+    assert dict(zip(aggregate.pair_keys.tolist(), aggregate.pair_counts.tolist())) == dict(expected)
+    assert aggregate.pair_keys.tolist() == sorted(expected)
+
+
+def test_groups_and_saved_parts_merge_to_the_union(tmp_path, analyzer, patients):
+    symptom_lists, genetic_inputs = patients
+    frame = pd.DataFrame({'symptoms': [','.join(symptoms) for symptoms in symptom_lists], 'genes': genetic_inputs,
+                          'site': ['north', 'south'] * (len(symptom_lists) // 2)})
+    whole = aggregate_frame(frame, analyzer, k=2)
+    by_site = aggregate_frame(frame, analyzer, k=2, group_column='site')
+    save_cohorts(tmp_path / 'part1.npz', aggregate_frame(frame.iloc[:150], analyzer, k=2))
+    save_cohorts(tmp_path / 'part2.npz', aggregate_frame(frame.iloc[150:], analyzer, k=2))
+
+    merged = merge_cohorts(load_cohorts(tmp_path / 'part1.npz'), load_cohorts(tmp_path / 'part2.npz'))
+    assert list(merged) == list(whole)
+    assert_same_counts(merged['All patients'], whole['All patients'])
+    assert_same_counts(by_site['north'].merge(by_site['south']), whole['All patients'])
+
+
+def test_merge_rejects_other_catalogs_and_k(analyzer):
+    aggregate = CohortAggregate.for_analyzer(analyzer, k=1)
+    other = CohortAggregate.for_analyzer(analyzer, k=1)
+    other.version = 'another'
+    with pytest.raises(ValueError):
+        aggregate.merge(other)
+    with pytest.raises(ValueError):
+        aggregate.merge(CohortAggregate.for_analyzer(analyzer, k=2))
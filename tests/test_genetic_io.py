@@ -0,0 +1,93 @@
+"""Streaming genetic file ingestion against reading the whole file
+
+Every path (memory-mapped, gzip, file objects, VCF and FASTA) must yield
+the same text and tokens as a whole-file read, with chunk sizes small
+enough that tokens and multi-byte characters straddle chunk boundaries.
+"""
+import gzip
+import io
+
+import pytest
+
+from symptogen.catalog import genetic_disease_frame
+from symptogen.genetic_io import iter_fasta_tokens, iter_genetic_pieces, iter_text_chunks, iter_vcf_tokens
+from symptogen.genetics import GeneMatcher
+
+CHUNK_SIZES = [1, 3, 7, 64]
+
+TEXT = 'Patient notes — carrier of BRCA1; APOE e4/e4.\r\nNot BRCA12, but CFTR and ñ HTT\nlast line MTHFR'
+
+VCF = '\n'.join([
+    '##fileformat=VCFv4.2',
+    '##INFO=<ID=GENEINFO,Number=1,Type=String,Description="Gene(s)">',
+    '#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO',
+    '17\t43094464\trs80357906\tG\tA\t.\t.\tGENEINFO=BRCA1:672',
+    '19\t44908684\trs429358;rs7412\tT\tC\t.\t.\tGENE=APOE,TOMM40;DP=12',
+    '7\t117559590\t.\tATCT\tA\t.\t.\tGENEINFO=CFTR:1080|CFTR-AS1:100',
+    '1\t1000\t.\tA\tG\t.\t.\tDP=3',
+]) + '\n'
+
+FASTA = '\n'.join([
+    '>NM_007294.4 Homo sapiens BRCA1 DNA repair associated',
+    'ACGTACGTACGTACGTACGTACGTACGTACGTACGT' * 4,
+    'ACGT',
+    '>NM_000492.4 CFTR transcript variant 1',
+    'GGGGCCCCAAAATTTT',
+]) + '\n'
+
+
+def write(path, text, compress=False):
+    data = text.encode('utf-8')
+    path.write_bytes(gzip.compress(data) if compress else data)
+    return path
+
+
+@pytest.fixture(scope='module')
+def matcher():
+    return GeneMatcher.from_frame(genetic_disease_frame())
+
+
+@pytest.mark.parametrize('chunk_size', CHUNK_SIZES)
+@pytest.mark.parametrize('name,compress', [('notes.txt', False), ('notes.txt.gz', True)])
+def test_text_chunks_match_whole_file(tmp_path, matcher, chunk_size, name, compress):
+    path = write(tmp_path / name, TEXT, compress)
+    assert ''.join(iter_text_chunks(path, chunk_size)) == TEXT
+    pieces = list(iter_genetic_pieces(path, chunk_size=chunk_size))
+    assert ''.join(pieces) == TEXT
+    assert matcher.match_stream(pieces) == matcher.match(TEXT)
+    assert matcher.gene_names(matcher.match(TEXT)) == ['BRCA1', 'APOE', 'CFTR', 'HTT', 'MTHFR']
+
+
+@pytest.mark.parametrize('chunk_size', CHUNK_SIZES)
+@pytest.mark.parametrize('compress', [False, True])
+def test_file_objects_match_whole_file(matcher, chunk_size, compress):
+    data = TEXT.encode('utf-8')
+    # Uploads carry no .gz name; compression is recognized from the content
+    upload = io.BytesIO(gzip.compress(data) if compress else data)
+    pieces = list(iter_genetic_pieces(upload, name='upload.txt', chunk_size=chunk_size))
+    assert ''.join(pieces) == TEXT
+    assert matcher.match_stream(pieces) == matcher.match(TEXT)
+
+
+def test_empty_file(tmp_path):
+    assert list(iter_genetic_pieces(write(tmp_path / 'empty.txt', ''))) == []
+
+
+@pytest.mark.parametrize('chunk_size', CHUNK_SIZES)
+@pytest.mark.parametrize('name,compress', [('calls.vcf', False), ('calls.vcf.gz', True), ('calls.txt', False)])
+def test_vcf_tokens_match_whole_file(tmp_path, chunk_size, name, compress):
+    path = write(tmp_path / name, VCF, compress)
+    expected = list(iter_vcf_tokens(VCF.splitlines()))
+    assert expected == ['rs80357906', 'BRCA1', 'rs429358', 'rs7412', 'APOE', 'TOMM40', 'CFTR', 'CFTR-AS1']
+    assert list(iter_genetic_pieces(path, chunk_size=chunk_size)) == [token + '\n' for token in expected]
+
+
+@pytest.mark.parametrize('chunk_size', CHUNK_SIZES)
+@pytest.mark.parametrize('name,compress', [('seqs.fasta', False), ('seqs.fa.gz', True)])
+def test_fasta_headers_match_whole_file(tmp_path, matcher, chunk_size, name, compress):
+    path = write(tmp_path / name, FASTA, compress)
+    expected = list(iter_fasta_tokens(FASTA.splitlines()))
+    assert len(expected) == 2
+    pieces = list(iter_genetic_pieces(path, chunk_size=chunk_size))
+    assert pieces == [header + '\n' for header in expected]
+    assert matcher.gene_names(matcher.match_stream(pieces)) == ['BRCA1', 'CFTR']
@@ -0,0 +1,89 @@
+"""GeneMatcher and GeneScanner against the original substring scan
+
+On input where every gene is written as a whole token, the automaton must
+find exactly what ``gene in text`` found; inside longer tokens it must not,
+and splitting the input into chunks anywhere must not change the result.
+"""
+import random
+
+import pytest
+
+from symptogen.catalog import genetic_disease_frame
+from symptogen.genetics import GeneMatcher
+
+SEPARATORS = [' ', ', ', '; ', '\n', '\t', ' / ', '-', '(', ')']
+NOISE = ['carrier', 'variant', 'of', 'unknown', 'significance', 'heterozygous', 'rs80357906', 'chr17', 'p.R1699W']
+
+
+def baseline_match(matcher, genetic_input):
+    # The original scan: every catalog gene that occurs anywhere in the input
+    text = genetic_input.upper()
+    return [row for row, gene in enumerate(matcher.genes) if gene.upper() in text]
+
+
+@pytest.fixture(scope='module')
+def matcher():
+    return GeneMatcher.from_frame(genetic_disease_frame())
+
+
+def random_input(matcher, rng):
+    words = []
+    for _ in range(rng.randint(0, 12)):
+        word = rng.choice(matcher.genes) if rng.random() < 0.4 else rng.choice(NOISE)
+        words.append(rng.choice([word, word.lower(), word.capitalize()]))
+    return ''.join(word + rng.choice(SEPARATORS) for word in words)
+
+
+def chunks(text, rng):
+    cuts = sorted(rng.sample(range(1, len(text)), min(len(text) - 1, rng.randint(1, 8)))) if len(text) > 1 else []
+    return [text[start:end] for start, end in zip([0] + cuts, cuts + [len(text)])]
+
+
+def test_matches_substring_scan_on_whole_tokens(matcher):
+    rng = random.Random(0)
+    for _ in range(500):
+        genetic_input = random_input(matcher, rng)
+        assert matcher.match(genetic_input) == baseline_match(matcher, genetic_input)
+
+
+@pytest.mark.parametrize('genetic_input,expected', [
+    ('BRCA1', ['BRCA1']),
+    ('brca1, apoe', ['BRCA1', 'APOE']),
+    ('BRCA12', []),
+    ('XBRCA1', []),
+    ('BRCA1A', []),
+    ('BRCA1-BRCA12', ['BRCA1']),
+    ('F5', ['F5']),
+    ('F55 HF5 F5x', []),
+    ('(CYP2D6)', ['CYP2D6']),
+    ('', []),
+])
+def test_token_boundaries(matcher, genetic_input, expected):
+    assert matcher.gene_names(matcher.match(genetic_input)) == \
+        [gene for gene in matcher.genes if gene in expected]
+
+
+def test_match_split_across_chunks(matcher):
+    rng = random.Random(1)
+    for _ in range(300):
+        genetic_input = random_input(matcher, rng) + rng.choice(['BRCA12', 'XAPOE', 'HTT', ''])
+        assert matcher.match_stream(chunks(genetic_input, rng)) == matcher.match(genetic_input)
+
+
+@pytest.mark.parametrize('pieces,expected', [
+    (['BRC', 'A1'], ['BRCA1']),
+    (['BRCA1', '2'], []),
+    (['X', 'BRCA1'], []),
+    (['B', 'R', 'C', 'A', '1', ' '], ['BRCA1']),
+    (['APOE,', 'CFT', 'R'], ['APOE', 'CFTR']),
+])
+def test_chunk_boundary_cases(matcher, pieces, expected):
+    assert matcher.gene_names(matcher.match_stream(pieces)) == [gene for gene in matcher.genes if gene in expected]
+
+
+def test_rsid_patterns():
+    frame = genetic_disease_frame()
+    frame['rsIDs'] = [['rs80357906'] if gene == 'BRCA1' else [] for gene in frame['Gene']]
+    matcher = GeneMatcher.from_frame(frame)
+    assert matcher.gene_names(matcher.match_stream(['variant RS8035', '7906 found'])) == ['BRCA1']
+    assert matcher.match('rs803579061') == []
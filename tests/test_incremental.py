@@ -0,0 +1,81 @@
+"""IncrementalScorer against a full SymptomIndex.top_k recompute
+
+After any sequence of adds, removes and whole-set updates, the live top-k
+must equal scoring the current symptom set from scratch.
+"""
+import random
+
+import pytest
+
+from symptogen.core import get_analyzer
+from symptogen.engine import SymptomIndex
+from symptogen.incremental import IncrementalScorer
+from synthetic import symptom_names, synthetic_symptom_frame
+
+
+def builtin_index():
+    index = get_analyzer().symptom_index
+    return index, list(index.vocabulary)
+
+
+def synthetic_index():
+    names = symptom_names(600)
+    return SymptomIndex.from_frame(synthetic_symptom_frame(3000), vocabulary=names), names
+
+
+def toggles(names, steps, seed):
+    """Random add/remove/update steps over the first 60 names, with the set expected after each"""
+    rng = random.Random(seed)
+    # Unknown symptoms are tracked but never match
+    names = names[:60] + ['unknown_symptom']
+    current = set()
+    for step in range(steps):
+        symptom = rng.choice(names)
+        if symptom in current and rng.random() < 0.6:
+            current.discard(symptom)
+            yield 'remove', symptom, set(current)
+        else:
+            current.add(symptom)
+            yield 'add', symptom, set(current)
+        if step % 7 == 0:
+            current = set(rng.sample(names, rng.randint(0, 6)))
+            yield 'update', set(current), set(current)
+
+
+def scores(results):
+    return [(r['Disease'], r['Severity'], sorted(r['Matched_Symptoms'])) for r in results], \
+        [r['Confidence'] for r in results]
+
+
+@pytest.mark.parametrize('catalog', [builtin_index, synthetic_index])
+def test_matches_full_recompute(catalog):
+    index, names = catalog()
+    scorer = IncrementalScorer(index)
+    rng = random.Random(1)
+    for action, argument, expected in toggles(names, 1500, seed=0):
+        getattr(scorer, action)(argument)
+        k = rng.choice([1, 5, 10, 50])
+        assert scorer.top_k(k) == index.top_k(list(expected), k), (action, argument)
+
+
+@pytest.mark.parametrize('model', ['idf', 'idf_severity'])
+def test_weighted_models_rank_like_full_recompute(model):
+    # Weight sums are accumulated in toggle order, so only the last bits of
+    # the scores may differ
+    index, names = synthetic_index()
+    scorer = IncrementalScorer(index, model)
+    for action, argument, expected in toggles(names, 500, seed=2):
+        getattr(scorer, action)(argument)
+        records, confidences = scores(scorer.top_k(10))
+        expected_records, expected_confidences = scores(index.top_k(list(expected), 10, model))
+        assert records == expected_records, (action, argument)
+        assert confidences == pytest.approx(expected_confidences)
+
+
+def test_clear_empties_the_set():
+    index, names = builtin_index()
+    scorer = IncrementalScorer(index)
+    scorer.update(names[:3])
+    scorer.clear()
+    assert len(scorer) == 0
+    assert len(scorer.top_k(10)) == 0
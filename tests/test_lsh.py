@@ -0,0 +1,74 @@
+"""MinHashLSH bucket cap and recall against exact search
+
+Small seeded catalogs keep the results deterministic.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from symptogen.core import calculate_symptom_match_score
+from symptogen.engine import SymptomIndex
+from symptogen.lsh import MinHashLSH
+from synthetic import synthetic_symptom_frame, synthetic_symptom_queries
+
+
+def query_buckets(lsh, symptom_ids):
+    """Row arrays of the buckets a query falls into, one per band"""
+    buckets = []
+    for band, key in enumerate(lsh.query_keys(symptom_ids)):
+        keys = lsh.bucket_keys[band]
+        lo, hi = np.searchsorted(keys, key, side='left'), np.searchsorted(keys, key, side='right')
+        buckets.append(lsh.bucket_rows[band, lo:hi])
+    return buckets
+
+
+@pytest.fixture(scope='module')
+def crowded():
+    # 60 diseases share the symptom set {fever}, so its buckets hold at least 60 rows
+    rows = [['fever']] * 60 + [['fever', 'rash'], ['cough', 'fever'], ['rash'], ['cough', 'rash', 'fever']] * 5
+    frame = pd.DataFrame({'Disease': [f'D{i}' for i in range(len(rows))], 'Primary_Symptoms': rows,
+                          'Severity': ['Low'] * len(rows)})
+    return SymptomIndex.from_frame(frame)
+
+
+def test_buckets_above_the_cap_are_skipped(crowded):
+    lsh = MinHashLSH(crowded, num_perm=16, bands=8, max_bucket_size=20)
+    ids, _ = crowded.encode(['fever'])
+    buckets = query_buckets(lsh, ids)
+    assert min(len(bucket) for bucket in buckets) >= 60
+
+    assert len(lsh.candidates(ids)) == 0
+    assert len(lsh.candidates(ids, max_bucket_size=59)) == 0
+    uncapped = np.unique(np.concatenate(buckets))
+    assert np.array_equal(lsh.candidates(ids, max_bucket_size=0), uncapped)
+    assert set(range(60)) <= set(lsh.candidates(ids, max_bucket_size=1000).tolist())
+    assert len(lsh.top_k(['fever'], k=5)) == 0
+    assert len(lsh.top_k(['fever'], k=5, max_bucket_size=0)) == 5
+
+
+@pytest.mark.parametrize('cap', [0, 1, 5, 25, 200])
+def test_candidates_are_the_small_buckets(cap):
+    index = SymptomIndex.from_frame(synthetic_symptom_frame(1500, seed=3))
+    lsh = MinHashLSH(index, num_perm=32, bands=16, seed=1)
+    for symptoms in synthetic_symptom_queries(50, len(index.vocabulary), seed=4):
+        ids, _ = index.encode(symptoms)
+        kept = [bucket for bucket in query_buckets(lsh, ids) if not cap or len(bucket) <= cap]
+        expected = np.unique(np.concatenate(kept)) if kept else np.empty(0, dtype=np.int64)
+        assert np.array_equal(lsh.candidates(ids, max_bucket_size=cap), expected)
+
+
+def test_recall_floor_against_exact_top_k():
+    frame = synthetic_symptom_frame(3000)
+    index = SymptomIndex.from_frame(frame)
+    queries = synthetic_symptom_queries(150, len(index.vocabulary))
+    lsh = MinHashLSH(index)
+    for cap, floor in ((0, 0.95), (None, 0.95), (200, 0.9)):
+        report = lsh.measure_recall(queries, k=10, max_bucket_size=cap)
+        assert report['recall'] >= floor, (cap, report)
+
+    # Candidates are re-ranked exactly: every returned score is the disease's exact score
+    disease_symptoms = dict(zip(frame['Disease'], frame['Primary_Symptoms']))
+    for symptoms in queries[:50]:
+        for result in lsh.top_k(symptoms, k=10):
+            exact = calculate_symptom_match_score(symptoms, disease_symptoms[result['Disease']])
+            assert result['Confidence'] == pytest.approx(exact)
@@ -0,0 +1,28 @@
+"""ReportCache bodies across catalog versions"""
+from datetime import datetime
+
+from symptogen.catalog import genetic_disease_frame
+from symptogen.genetics import GeneMatcher
+from symptogen.report import ReportCache
+
+
+def matcher(description):
+    frame = genetic_disease_frame()
+    frame.loc[frame['Gene'] == 'BRCA1', 'Description'] = description
+    return GeneMatcher.from_frame(frame)
+
+
+def test_reloaded_catalog_gets_its_own_body():
+    old, new = matcher('Old BRCA1 text'), matcher('New BRCA1 text')
+    assert old.version != new.version
+    reports = ReportCache()
+    at = datetime(2024, 1, 1)
+
+    first = reports.get([], old.results(old.match('BRCA1')), [], 'BRCA1', at, version=old.version)
+    # Same gene, disease and risk level; only the catalog text changed
+    second = reports.get([], new.results(new.match('BRCA1')), [], 'BRCA1', at, version=new.version)
+    again = reports.get([], old.results(old.match('BRCA1')), [], 'BRCA1', at, version=old.version)
+
+    assert 'Old BRCA1 text' in first.markdown
+    assert 'New BRCA1 text' in second.markdown
+    assert again.body is first.body
@@ -0,0 +1,90 @@
+"""ResultStore deduplication and compaction, and stored records in run_batch
+
+A record served from the store must equal the record scored afresh, with
+its id, symptoms and report taken from the record being served.
+"""
+import json
+import time
+
+import pandas as pd
+
+from symptogen.batch import run_batch
+from symptogen.result_store import ResultStore, record_key
+
+
+def read_jsonl(path):
+    with open(path, encoding='utf-8') as handle:
+        return [json.loads(line) for line in handle]
+
+
+def write_csv(path, rows):
+    pd.DataFrame(rows, columns=['id', 'symptoms', 'genes']).to_csv(path, index=False)
+
+
+def test_key_ignores_order_duplicates_and_gene_case():
+    key = record_key('v1', ['fever', 'cough'], 'BRCA1, APOE')
+    assert record_key('v1', ['cough', 'fever', 'fever'], 'apoe brca1') == key
+    assert record_key('v2', ['fever', 'cough'], 'BRCA1, APOE') != key
+    assert record_key('v1', ['fever', 'cough'], 'BRCA1, APOE', model='idf') != key
+    assert record_key('v1', ['fever', 'cough'], 'BRCA1, APOE', k=5) != key
+    assert record_key('v1', ['fever'], 'BRCA1, APOE') != key
+
+
+def test_rerun_serves_stored_records(tmp_path):
+    first = [('a', 'fever,cough', 'BRCA1'), ('b', 'Headache', ''), ('c', '', 'TP53')]
+    # The same patients under new ids and a different spelling, plus one new patient
+    second = [('x', 'cough, fever, fever', 'brca1'), ('y', 'headache', ''), ('z', 'rash', ''), ('w', '', 'TP53')]
+    write_csv(tmp_path / 'first.csv', first)
+    write_csv(tmp_path / 'second.csv', second)
+    store = tmp_path / 'results.db'
+
+    stats = run_batch(tmp_path / 'first.csv', tmp_path / 'first.jsonl', k=3, store_path=store)
+    assert stats['skipped'] == 0
+    stats = run_batch(tmp_path / 'second.csv', tmp_path / 'stored.jsonl', k=3, store_path=store,
+                      report_format='markdown')
+    assert (stats['records'], stats['skipped'], stats['skip_rate']) == (4, 3, 0.75)
+    run_batch(tmp_path / 'second.csv', tmp_path / 'fresh.jsonl', k=3, report_format='markdown')
+
+    stored, fresh = read_jsonl(tmp_path / 'stored.jsonl'), read_jsonl(tmp_path / 'fresh.jsonl')
+    assert [record['id'] for record in stored] == ['x', 'y', 'z', 'w']
+    assert stored[0]['symptoms'] == ['cough', 'fever', 'fever']
+    for served, scored in zip(stored, fresh):
+        assert {name: value for name, value in served.items() if name != 'report'} == \
+            {name: value for name, value in scored.items() if name != 'report'}
+        # Reports quote the served record and differ at most in their timestamp
+        assert served['report'].split('\n', 2)[2] == scored['report'].split('\n', 2)[2]
+    assert '**Symptoms Analyzed:** cough, fever, fever' in stored[0]['report']
+
+    with ResultStore(store) as results:
+        assert results.stats()['entries'] == 4
+        assert [run['skipped'] for run in results.stats()['runs']] == [3, 0]
+
+
+def test_compact_drops_other_versions(tmp_path):
+    record = {'symptom_results': [], 'genetic_results': []}
+    with ResultStore(tmp_path / 'results.db') as store:
+        store.put_many([('a', record), ('b', record)], 'v1')
+        store.put_many([('c', record)], 'v2')
+        assert store.compact('v2', max_bytes=None) == 2
+        assert set(store.get_many('abc')) == {'c'}
+        assert store.compact('v2', max_bytes=None) == 0
+
+
+def test_compact_keeps_the_most_recently_used_within_the_cap(tmp_path):
+    record = {'symptom_results': [{'Disease': 'Influenza', 'Confidence': 0.5}], 'genetic_results': []}
+    with ResultStore(tmp_path / 'results.db') as store:
+        for key in 'abcde':
+            store.put_many([(key, record)], 'v1')
+            time.sleep(0.001)
+        size = store.stats()['bytes'] // 5
+        # Reading 'a' and 'b' makes 'c' the least recently used
+        store.get_many(['a'])
+        time.sleep(0.001)
+        store.get_many(['b'])
+
+        assert store.compact(max_bytes=4 * size) == 1
+        assert set(store.get_many('abcde')) == set('abde')
+        store.get_many(['d'])
+        assert store.compact(max_bytes=2 * size + size // 2) == 2
+        assert set(store.get_many('abcde')) == set('ad')
+        assert store.stats()['bytes'] == 2 * size
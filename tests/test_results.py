@@ -0,0 +1,108 @@
+"""SymptomResults and GeneticResults against the lists of dicts they replace
+
+Read as sequences, converted, serialized or compared, compact results must
+behave like the list of dicts built straight from the catalog frames, and
+must survive pickling, as they do when returned from batch worker processes.
+"""
+import json
+import pickle
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import pytest
+
+from symptogen.catalog import genetic_disease_frame, symptom_disease_frame
+from symptogen.core import calculate_symptom_match_score, load_default_analyzer
+from symptogen.results import GENETIC_COLUMNS, SymptomResults, as_dicts, json_default
+
+GENETIC_INPUTS = ['BRCA1, APOE', 'TP53', 'no known genes', 'CFTR HTT MTHFR BRCA2']
+
+
+@pytest.fixture(scope='module')
+def analyzer():
+    return load_default_analyzer()
+
+
+def symptom_queries(n=100, seed=0):
+    rng = random.Random(seed)
+    vocabulary = sorted({s for symptoms in symptom_disease_frame()['Primary_Symptoms'] for s in symptoms})
+    return [rng.sample(vocabulary, rng.randint(1, 6)) for _ in range(n)]
+
+
+def symptom_dicts(results, user_symptoms):
+    """The list of dicts the returned diseases used to be, built from the catalog frame"""
+    frame = symptom_disease_frame().set_index('Disease')
+    return [{
+        'Disease': disease,
+        'Confidence': calculate_symptom_match_score(user_symptoms, frame.loc[disease, 'Primary_Symptoms']),
+        'Severity': frame.loc[disease, 'Severity'],
+        'Matched_Symptoms': [s for s in frame.loc[disease, 'Primary_Symptoms'] if s in user_symptoms]
+    } for disease in results.diseases]
+
+
+def genetic_dicts(genetic_input):
+    frame = genetic_disease_frame().rename(columns={'Associated_Disease': 'Disease'})
+    return [{column: str(row[column]) for column in GENETIC_COLUMNS}
+            for _, row in frame.iterrows() if row['Gene'] in genetic_input]
+
+
+def assert_reads_like(results, expected):
+    assert len(results) == len(expected)
+    assert results == expected and results.to_dicts() == expected and as_dicts(results) == expected
+    assert list(results) == expected
+    assert [results[i] for i in range(-len(expected), 0)] == expected
+    assert results[1:3] == expected[1:3] and results[::-1] == expected[::-1]
+    with pytest.raises(IndexError):
+        results[len(expected)]
+    assert json.dumps({'results': results}, default=json_default) == json.dumps({'results': expected})
+    pd.testing.assert_frame_equal(results.to_frame(), pd.DataFrame(expected, columns=list(results.columns)))
+
+
+def test_symptom_results_read_like_dicts(analyzer):
+    for user_symptoms in symptom_queries():
+        results = analyzer.analyze_symptoms(user_symptoms, k=5)
+        expected = symptom_dicts(results, user_symptoms)
+        assert_reads_like(results, expected)
+        assert [r['Confidence'] for r in expected] == sorted((r['Confidence'] for r in expected), reverse=True)
+
+
+def test_genetic_results_read_like_dicts(analyzer):
+    for genetic_input in GENETIC_INPUTS:
+        results, gene_names = analyzer.analyze_genetic_markers(genetic_input)
+        expected = genetic_dicts(genetic_input)
+        assert_reads_like(results, expected)
+        assert gene_names == [r['Gene'] for r in expected]
+
+
+def test_pickled_results_keep_only_their_rows(analyzer):
+    for user_symptoms in symptom_queries(20, seed=1):
+        results = analyzer.analyze_symptoms(user_symptoms, k=3)
+        restored = pickle.loads(pickle.dumps(results))
+        assert type(restored) is SymptomResults
+        assert restored == results and restored.diseases == results.diseases
+        assert len(restored.catalog.diseases) <= len(results)
+        # A restored result set can be sliced and pickled again
+        assert pickle.loads(pickle.dumps(restored[1:])) == results[1:]
+    empty = analyzer.analyze_symptoms(['not_a_symptom'])
+    assert len(empty) == 0 and pickle.loads(pickle.dumps(empty)) == []
+
+    for genetic_input in GENETIC_INPUTS:
+        results = analyzer.analyze_genetic_markers(genetic_input)[0]
+        restored = pickle.loads(pickle.dumps(results))
+        assert type(restored) is type(results) and restored == results
+        assert pickle.loads(pickle.dumps(restored[::-1])) == results[::-1]
+
+
+def analyze_in_worker(user_symptoms, genetic_input):
+    analyzer = load_default_analyzer()
+    return analyzer.analyze_symptoms(user_symptoms, k=5), analyzer.analyze_genetic_markers(genetic_input)[0]
+
+
+def test_results_cross_a_process_pool(analyzer):
+    queries = symptom_queries(4, seed=2)
+    with ProcessPoolExecutor(2) as pool:
+        returned = list(pool.map(analyze_in_worker, queries, GENETIC_INPUTS))
+    for user_symptoms, genetic_input, (symptom_results, genetic_results) in zip(queries, GENETIC_INPUTS, returned):
+        assert symptom_results == analyzer.analyze_symptoms(user_symptoms, k=5)
+        assert genetic_results == genetic_dicts(genetic_input)
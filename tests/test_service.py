@@ -0,0 +1,92 @@
+"""ScoringService request handling through InProcessClient"""
+import asyncio
+
+import pytest
+
+from symptogen.core import load_default_analyzer
+from symptogen.results import as_dicts
+from symptogen.service import InProcessClient, ScoringService
+
+QUERIES = [['fever', 'cough'], ['headache'], ['fatigue', 'nausea', 'fever'], ['rash'], []]
+
+
+@pytest.fixture(scope='module')
+def analyzer():
+    return load_default_analyzer()
+
+
+def run(service, requests):
+    """Send ``requests`` (method, path, payload) concurrently and return their (status, body) responses"""
+    async def send():
+        client = InProcessClient(service)
+        try:
+            return await asyncio.gather(*(client.request(*request) for request in requests))
+        finally:
+            await service.close()
+
+    return asyncio.run(send())
+
+
+def test_concurrent_symptom_requests_are_coalesced(analyzer):
+    service = ScoringService(analyzer, max_delay=0.05)
+    responses = run(service, [('POST', '/analyze/symptoms', {'symptoms': symptoms, 'k': 5}) for symptoms in QUERIES])
+
+    assert service.batcher.stats()['requests'] == len(QUERIES)
+    assert service.batcher.stats()['batches'] == 1
+    for symptoms, (status, body) in zip(QUERIES, responses):
+        assert status == 200
+        assert body['results'] == as_dicts(analyzer.analyze_symptoms(symptoms, k=5))
+
+
+def test_requests_with_different_k_are_batched_per_k(analyzer):
+    service = ScoringService(analyzer, max_delay=0.05)
+    responses = run(service, [('POST', '/analyze/symptoms', {'symptoms': ['fever'], 'k': k}) for k in (1, 3, 3)])
+
+    assert [len(body['results']) for _, body in responses] == [1, 3, 3]
+    assert service.batcher.stats()['batches'] == 2
+
+
+def test_genetics_route(analyzer):
+    genetic_input = 'Carrier of BRCA1 and APOE; BRCA12 is not a catalog gene'
+    [(status, body)] = run(ScoringService(analyzer), [('POST', '/analyze/genetics', {'genetic_input': genetic_input})])
+
+    results, genes_found = analyzer.analyze_genetic_markers(genetic_input)
+    assert status == 200
+    assert body['results'] == as_dicts(results)
+    assert body['genes_found'] == list(genes_found)
+    assert {'BRCA1', 'APOE'} <= set(body['genes_found'])
+
+
+def test_analyze_combines_both_routes(analyzer):
+    payload = {'symptoms': ['fever', 'cough'], 'genetic_input': 'BRCA1', 'k': 3}
+    [(status, body)] = run(ScoringService(analyzer), [('POST', '/analyze', payload)])
+
+    assert status == 200
+    assert body['symptom_results'] == as_dicts(analyzer.analyze_symptoms(['fever', 'cough'], k=3))
+    assert body['genes_found'] == ['BRCA1']
+
+
+@pytest.mark.parametrize('path,payload', [
+    ('/analyze/symptoms', {'symptoms': 42}),
+    ('/analyze/symptoms', {'symptoms': ['fever', 3]}),
+    ('/analyze/symptoms', {'symptoms': ['fever'], 'k': -1}),
+    ('/analyze/symptoms', {'symptoms': ['fever'], 'k': True}),
+    ('/analyze/symptoms', {'symptoms': ['fever'], 'k': 2.5}),
+    ('/analyze/genetics', {'genetic_input': ['BRCA1']}),
+    ('/analyze', {'symptoms': ['fever'], 'genetic_input': 7}),
+    ('/report', {'format': 'pdf'}),
+    ('/report', {'symptom_results': [{'Disease': 'Flu'}]}),
+    ('/analyze/symptoms', ['fever']),
+])
+def test_bad_requests_get_400(analyzer, path, payload):
+    service = ScoringService(analyzer)
+    [(status, body)] = run(service, [('POST', path, payload)])
+
+    assert status == 400
+    assert 'error' in body
+    assert service.batcher.stats()['requests'] == 0
+
+
+def test_unknown_routes(analyzer):
+    responses = run(ScoringService(analyzer), [('GET', '/nowhere', None), ('GET', '/analyze', None)])
+    assert [status for status, _ in responses] == [404, 405]
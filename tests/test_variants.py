@@ -0,0 +1,56 @@
+"""VariantCollector against scanning the whole text at once
+
+Splitting the input into pieces anywhere must find the same rsIDs and
+positions, and a long unbroken run of token characters must stay linear.
+"""
+import random
+import time
+
+from symptogen.variants import POSITION_PATTERN, RSID_PATTERN, VariantCollector
+
+
+def whole_text_tokens(text):
+    return ({f'rs{number}' for number in RSID_PATTERN.findall(text)}
+            | {f'{chrom}:{pos}' for chrom, pos in POSITION_PATTERN.findall(text)})
+
+
+def collect(pieces):
+    collector = VariantCollector()
+    for piece in pieces:
+        collector.feed(piece)
+    return set(collector.finish().split())
+
+
+def random_pieces(text, rng):
+    cuts = sorted(rng.sample(range(1, len(text)), min(len(text) - 1, 40)))
+    return [text[start:end] for start, end in zip([0] + cuts, cuts + [len(text)])]
+
+
+def test_tokens_split_across_pieces():
+    rng = random.Random(0)
+    words = ['rs80357906', 'chr17:43094464', '13:g.32315474', 'xrs12', 'rs12x', 'BRCA1',
+             'chrX:100', 'rs7', '17:43094464.', 'MT:3243', 'A' * 70 + 'rs5', ':rs99']
+    for _ in range(200):
+        text = ''.join(rng.choice(words) + rng.choice([' ', ',', '\t', '\n', '', ';'])
+                       for _ in range(rng.randint(1, 30)))
+        if len(text) < 2:
+            continue
+        assert collect(random_pieces(text, rng)) == whole_text_tokens(text)
+
+
+def test_token_inside_a_long_run():
+    # The run is longer than the carried tail, and the cut lands inside a token
+    text = 'MT:3243:13:g.32315474:' + '1' * 60 + ' rs7'
+    pieces = [text[:18], text[18:24]] + [text[i:i + 3] for i in range(24, len(text), 3)]
+    assert collect(pieces) == whole_text_tokens(text) == {'MT:3243', '13:32315474', 'rs7'}
+
+
+def test_long_token_run_is_linear():
+    text = 'A' * 20000 + ' rs80357906 ' + 'rs1' * 7000
+    start = time.perf_counter()
+    tokens = collect([text])
+    single = time.perf_counter() - start
+    assert tokens == whole_text_tokens(text) == {'rs80357906'}
+    assert single < 0.5
+    pieces = [text[i:i + 7] for i in range(0, len(text), 7)]
+    assert collect(pieces) == {'rs80357906'}